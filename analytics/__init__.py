@@ -0,0 +1,17 @@
+"""
+Analytics over parsed chat DataFrames, usable without the Streamlit app.
+"""
+
+from .conversation import ConversationStats, conversation_stats
+from .content import ContentFeatures, extract_content_features
+from .vocabulary import TermCounts, build_term_counts, log_odds_terms, tfidf_terms
+from .sketches import ChatSketch, CountMinSketch, HyperLogLog, ReservoirSample, TopK, sketch_dataframe
+from .query import QueryEngine
+
+__all__ = [
+    'ConversationStats', 'conversation_stats',
+    'ContentFeatures', 'extract_content_features',
+    'TermCounts', 'build_term_counts', 'log_odds_terms', 'tfidf_terms',
+    'ChatSketch', 'CountMinSketch', 'HyperLogLog', 'ReservoirSample', 'TopK', 'sketch_dataframe',
+    'QueryEngine',
+]
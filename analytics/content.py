@@ -0,0 +1,221 @@
+"""
+Content features of messages: emoji, links, mentions, hashtags and length.
+
+All token kinds are matched by a single combined regular expression, so
+each message text is scanned once no matter how many features are
+extracted. Messages that cannot hold any token are skipped by a vectorized
+prefilter first. Texts are processed in chunks; only compact per-message
+counts and running totals are kept between chunks.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Upper bounds of the message length buckets, in characters
+LENGTH_BUCKET_EDGES = [0, 1, 10, 50, 200, 1000, np.inf]
+LENGTH_BUCKET_LABELS = ['empty', '1-9', '10-49', '50-199', '200-999', '1000+']
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _char_class(ranges) -> str:
+    """Build a regex character class from (first, last) code point ranges."""
+    return '[' + ''.join(f'{chr(first)}-{chr(last)}' for first, last in ranges) + ']'
+
+
+# Single emoji code points (pictographs, symbols, dingbats)
+_EMOJI_CHAR = _char_class([
+    (0x1F300, 0x1F5FF), (0x1F600, 0x1F64F), (0x1F680, 0x1F6FF),
+    (0x1F900, 0x1F9FF), (0x1FA70, 0x1FAFF), (0x2600, 0x26FF), (0x2700, 0x27BF),
+])
+
+# Regional indicators, two of which form a flag
+_REGIONAL_INDICATOR = _char_class([(0x1F1E6, 0x1F1FF)])
+
+# Skin tone modifiers and the emoji presentation selector
+_EMOJI_MODIFIER = _char_class([(0x1F3FB, 0x1F3FF), (0xFE0F, 0xFE0F)]) + '*'
+
+# A flag or a ZWJ sequence counts as one emoji
+_EMOJI = (
+    f'{_REGIONAL_INDICATOR}{{2}}'
+    f'|{_EMOJI_CHAR}{_EMOJI_MODIFIER}(?:{chr(0x200D)}{_EMOJI_CHAR}{_EMOJI_MODIFIER})*'
+)
+
+# One alternative per feature, in FEATURES order; URLs come first so '#'
+# or '@' inside a link is consumed by the link
+CONTENT_PATTERN = (
+    r'(?P<url>(?:https?://|www\.)[^\s<>"]+)'
+    r'|(?P<mention>@(?<!\w@)\w+)'
+    r'|(?P<hashtag>#(?<!\w#)\w+)'
+    rf'|(?P<emoji>{_EMOJI})'
+)
+
+FEATURES = ('url', 'mention', 'hashtag', 'emoji')
+
+# Cheap superset of CONTENT_PATTERN (no lookbehind, so RE2 accepts it) used
+# to skip messages without any token before the full scan
+_CANDIDATE_PATTERN = rf'(?:https?://|www\.)|[@#]\S|{_EMOJI_CHAR}|{_REGIONAL_INDICATOR}'
+
+_CONTENT_RE = re.compile(CONTENT_PATTERN)
+
+_DOMAIN_PATTERN = r'^(?:https?://)?(?:www\.)?(?P<domain>[^/:?#\s]+)'
+
+
+@dataclass
+class ContentFeatures:
+    """
+    Content features of a chat.
+
+    Attributes:
+        messages: One row per message (aligned with the input index) with
+            'length', 'length_bucket' and per-feature counts
+            ('emoji', 'url', 'mention', 'hashtag')
+        by_sender: Per-sender message count, mean length and feature totals
+        emoji_counts: Occurrences of each emoji
+        domain_counts: Occurrences of each linked domain
+        mention_counts: Occurrences of each @mention
+        hashtag_counts: Occurrences of each #hashtag
+    """
+    messages: pd.DataFrame
+    by_sender: pd.DataFrame
+    emoji_counts: pd.Series
+    domain_counts: pd.Series
+    mention_counts: pd.Series
+    hashtag_counts: pd.Series
+
+    @property
+    def length_histogram(self) -> pd.Series:
+        """Number of messages per length bucket."""
+        return self.messages['length_bucket'].value_counts(sort=False)
+
+
+def _chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yield consecutive row slices of at most ``chunk_size`` rows."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _add_counts(total: pd.Series, counts: pd.Series) -> pd.Series:
+    """Add value counts of one chunk to a running total."""
+    if total.empty:
+        return counts
+    return total.add(counts, fill_value=0)
+
+
+def _sorted_counts(counts: pd.Series, name: str) -> pd.Series:
+    """Integer counts sorted by frequency."""
+    counts = counts.astype(np.int64).sort_values(ascending=False, kind='stable')
+    counts.name = name
+    return counts
+
+
+def _candidate_mask(texts: pd.Series) -> np.ndarray:
+    """Flag the messages that may contain a token, with RE2 when pyarrow is installed."""
+    try:
+        import pyarrow as pa
+        texts = texts.astype(pd.ArrowDtype(pa.string()))
+    except ImportError:
+        pass
+    return texts.str.contains(_CANDIDATE_PATTERN).to_numpy(dtype=bool)
+
+
+def _scan(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Find the tokens of all texts in one pass over their concatenation.
+
+    Args:
+        texts: Message texts
+
+    Returns:
+        Text index of each token, feature index of each token (in FEATURES
+        order) and the token strings
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    starts = np.cumsum(lengths + 1) - (lengths + 1)
+
+    # No token can span the newline separating two texts
+    positions, kinds, values = [], [], []
+    for match in _CONTENT_RE.finditer('\n'.join(texts)):
+        positions.append(match.start())
+        kinds.append(match.lastindex - 1)
+        values.append(match.group())
+
+    rows = np.searchsorted(starts, positions, side='right') - 1
+    return rows, np.asarray(kinds, dtype=np.int8), values
+
+
+def _normalize_tokens(feature: str, tokens: pd.Series) -> pd.Series:
+    """Map raw tokens to the values that are counted (e.g. URLs to domains)."""
+    if feature == 'url':
+        return tokens.str.extract(_DOMAIN_PATTERN)['domain'].str.lower().str.rstrip('.,;:!?)')
+    if feature == 'hashtag':
+        return tokens.str.lower()
+    return tokens
+
+
+def extract_content_features(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ContentFeatures:
+    """
+    Extract content features of every message in one regex pass.
+
+    Args:
+        df: DataFrame with 'sender' and 'text' columns
+        chunk_size: Number of messages processed at once
+
+    Returns:
+        ContentFeatures
+    """
+    feature_frames = []
+    totals = {feature: pd.Series(dtype=np.int64) for feature in FEATURES}
+
+    for chunk in _chunks(df[['text']], chunk_size):
+        texts = chunk['text'].fillna('').astype(str)
+
+        candidates = _candidate_mask(texts)
+        rows, kinds, values = _scan(texts[candidates].tolist())
+        rows = np.flatnonzero(candidates)[rows]
+        values = pd.Series(values, dtype=object)
+
+        features = pd.DataFrame({'length': texts.str.len().to_numpy(dtype=np.int32)}, index=chunk.index)
+        for index, feature in enumerate(FEATURES):
+            is_feature = kinds == index
+            counts = np.bincount(rows[is_feature], minlength=len(chunk))
+            # Saturate rather than wrap for pathological messages
+            features[feature] = np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16)
+            tokens = _normalize_tokens(feature, values[is_feature])
+            totals[feature] = _add_counts(totals[feature], tokens.value_counts())
+        feature_frames.append(features)
+
+    if feature_frames:
+        messages = pd.concat(feature_frames)
+    else:
+        messages = pd.DataFrame(
+            {'length': pd.Series(dtype=np.int32), **{feature: pd.Series(dtype=np.uint16) for feature in FEATURES}},
+            index=df.index
+        )
+    messages.insert(1, 'length_bucket', pd.cut(
+        messages['length'], LENGTH_BUCKET_EDGES, labels=LENGTH_BUCKET_LABELS, right=False
+    ))
+
+    by_sender = (
+        messages[['length', *FEATURES]]
+        .astype(np.int64)
+        .groupby(df['sender'].to_numpy())
+        .agg({'length': ['size', 'mean'], **{feature: 'sum' for feature in FEATURES}})
+    )
+    by_sender.columns = ['messages', 'mean_length', *FEATURES]
+    by_sender.index.name = 'sender'
+    by_sender = by_sender.sort_values('messages', ascending=False)
+
+    return ContentFeatures(
+        messages=messages,
+        by_sender=by_sender,
+        emoji_counts=_sorted_counts(totals['emoji'], 'emoji'),
+        domain_counts=_sorted_counts(totals['url'], 'domain'),
+        mention_counts=_sorted_counts(totals['mention'], 'mention'),
+        hashtag_counts=_sorted_counts(totals['hashtag'], 'hashtag')
+    )
@@ -0,0 +1,127 @@
+"""
+Conversation dynamics: who replies to whom, how fast, and in which sessions.
+
+Everything is computed with shift/diff/cumsum over arrays sorted by time,
+so a chat of n messages costs O(n) plus one sort.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+# Default silence that ends a conversation session
+DEFAULT_SESSION_GAP_MINUTES = 30
+
+# Histogram bin edges for reply latencies, in seconds: under 1s, then log-spaced up to 1 week
+LATENCY_BIN_EDGES = np.concatenate(([0.0], np.logspace(0, np.log10(7 * 24 * 3600), 40)))
+
+
+@dataclass
+class ConversationStats:
+    """
+    Conversation analytics of one chat.
+
+    Attributes:
+        senders: Sender names, indexing the transition matrix
+        transitions: Sender × sender counts of consecutive messages within a
+            session (rows: previous sender, columns: next sender)
+        reply_latency: Reply latency summary per (previous sender, replier)
+            pair, in seconds
+        latency_histogram: Counts of all reply latencies per log-spaced bin
+        sessions: One row per session with start, end, duration, message
+            and participant counts
+        session_gap_minutes: Silence that separates sessions
+    """
+    senders: List[str]
+    transitions: pd.DataFrame
+    reply_latency: pd.DataFrame
+    latency_histogram: pd.DataFrame
+    sessions: pd.DataFrame
+    session_gap_minutes: float
+
+    @property
+    def replies(self) -> int:
+        """Number of messages answering another sender within a session."""
+        return int(self.reply_latency['replies'].sum()) if len(self.reply_latency) else 0
+
+
+def conversation_stats(df: pd.DataFrame, session_gap_minutes: float = DEFAULT_SESSION_GAP_MINUTES) -> ConversationStats:
+    """
+    Compute sender transitions, reply latencies and sessions.
+
+    A message starts a new session when it follows the previous message by
+    more than ``session_gap_minutes``. A reply is a message whose sender
+    differs from the previous message's sender in the same session; its
+    latency is the time since that previous message.
+
+    Args:
+        df: DataFrame with 'datetime' and 'sender' columns
+        session_gap_minutes: Silence that separates sessions
+
+    Returns:
+        ConversationStats
+    """
+    ordered = df[['datetime', 'sender']].sort_values('datetime', kind='stable')
+    codes, senders = pd.factorize(ordered['sender'])
+    timestamps = ordered['datetime'].to_numpy()
+    n_senders = len(senders)
+
+    # Seconds since the previous message; the first message has no predecessor
+    gaps = np.diff(timestamps).astype('timedelta64[ms]').astype(np.float64) / 1000.0
+    new_session = np.concatenate(([True], gaps > session_gap_minutes * 60))[:len(timestamps)]
+    session_ids = np.cumsum(new_session) - 1
+
+    previous = codes[:-1]
+    current = codes[1:]
+    same_session = ~new_session[1:]
+
+    # Transition counts within sessions, as one bincount over pair ids
+    pair_ids = previous[same_session] * n_senders + current[same_session]
+    transition_counts = np.bincount(pair_ids, minlength=n_senders * n_senders).reshape(n_senders, n_senders)
+    transitions = pd.DataFrame(transition_counts, index=senders, columns=senders)
+
+    # Replies are transitions between different senders
+    is_reply = same_session & (previous != current)
+    replies = pd.DataFrame({
+        'from_sender': pd.Categorical.from_codes(previous[is_reply], senders),
+        'to_sender': pd.Categorical.from_codes(current[is_reply], senders),
+        'latency': gaps[is_reply],
+    })
+    by_pair = replies.groupby(['from_sender', 'to_sender'], observed=True)['latency']
+    quantiles = by_pair.quantile([0.25, 0.75, 0.9]).unstack().reindex(columns=[0.25, 0.75, 0.9])
+    quantiles.columns = ['p25', 'p75', 'p90']
+    reply_latency = (
+        by_pair.agg(replies='size', mean='mean', median='median')
+        .join(quantiles)
+        .reset_index()
+        .sort_values('replies', ascending=False, ignore_index=True)
+    )
+
+    # Replies slower than the last edge are counted in the last bin
+    counts, _ = np.histogram(np.minimum(gaps[is_reply], LATENCY_BIN_EDGES[-1]), bins=LATENCY_BIN_EDGES)
+    latency_histogram = pd.DataFrame({
+        'lower': LATENCY_BIN_EDGES[:-1],
+        'upper': LATENCY_BIN_EDGES[1:],
+        'replies': counts,
+    })
+
+    session_frame = pd.DataFrame({'session': session_ids, 'datetime': timestamps, 'sender': codes})
+    sessions = session_frame.groupby('session').agg(
+        start=('datetime', 'min'),
+        end=('datetime', 'max'),
+        messages=('datetime', 'size'),
+        participants=('sender', 'nunique'),
+    )
+    sessions['duration_minutes'] = (sessions['end'] - sessions['start']).dt.total_seconds() / 60
+
+    return ConversationStats(
+        senders=list(senders),
+        transitions=transitions,
+        reply_latency=reply_latency,
+        latency_histogram=latency_histogram,
+        sessions=sessions.reset_index(drop=True),
+        session_gap_minutes=session_gap_minutes
+    )
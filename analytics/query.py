@@ -0,0 +1,207 @@
+"""
+SQL over parsed chats with an in-process analytical database.
+
+Datasets are registered with DuckDB as Arrow tables or as (partitioned)
+Parquet files, so queries run on columnar data: DuckDB pushes column
+projections and filters into the scan, and results come back as Arrow
+tables or DataFrames without passing through Python objects.
+
+DuckDB is optional; it is only imported when a ``QueryEngine`` is created.
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union, TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+DEFAULT_TABLE = 'messages'
+
+
+def is_available() -> bool:
+    """Check whether the query engine's dependencies are installed."""
+    try:
+        import duckdb  # noqa: F401
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table name for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    """Quote a string literal for use in SQL."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+class QueryEngine:
+    """
+    In-process DuckDB database with chat datasets registered as tables.
+    """
+
+    def __init__(self, database: str = ':memory:', threads: Optional[int] = None):
+        """
+        Open the database.
+
+        Args:
+            database: DuckDB database file, or ':memory:'
+            threads: Number of DuckDB worker threads (defaults to all cores)
+
+        Raises:
+            ImportError: If duckdb or pyarrow is not installed
+        """
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("The query engine requires duckdb: pip install duckdb") from e
+
+        self.connection = duckdb.connect(database)
+        # Registered Arrow tables are visible only to this connection, so
+        # queries from several threads take turns on it
+        self._lock = threading.Lock()
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+
+    def restrict(self) -> None:
+        """
+        Lock the database down for queries from untrusted users.
+
+        Afterwards queries can read only the tables registered so far: files,
+        network and extensions are off limits (so ``register_parquet`` and
+        ``write_parquet`` fail as well), Python variables are no longer
+        scanned by name and the configuration can no longer be changed.
+        """
+        self._execute("SET python_enable_replacements = false")
+        self._execute("SET enable_external_access = false")
+        self._execute("SET lock_configuration = true")
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> 'QueryEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def register_dataframe(self, df: pd.DataFrame, name: str = DEFAULT_TABLE) -> None:
+        """
+        Register a parsed DataFrame as a table.
+
+        The DataFrame is converted to an Arrow table once; DuckDB scans it
+        in place with projection and filter pushdown.
+
+        Args:
+            df: DataFrame with message data
+            name: Table name
+        """
+        import pyarrow as pa
+
+        self.register_arrow(pa.Table.from_pandas(df, preserve_index=False), name)
+
+    def register_arrow(self, table: 'pa.Table', name: str = DEFAULT_TABLE) -> None:
+        """
+        Register an Arrow table (or dataset) as a table.
+
+        Args:
+            table: Arrow table, record batch reader or dataset
+            name: Table name
+        """
+        with self._lock:
+            self.connection.register(name, table)
+
+    def register_parquet(self, path: Union[str, Path], name: str = DEFAULT_TABLE) -> None:
+        """
+        Register a Parquet file or a directory of Parquet files as a table.
+
+        Hive-style directories (``month=2023-01/part-0.parquet``) expose
+        their partition keys as columns, and filters on them skip whole
+        files.
+
+        Args:
+            path: Parquet file or dataset directory
+            name: Table name
+        """
+        path = Path(path)
+        pattern = str(path / '**' / '*.parquet') if path.is_dir() else str(path)
+        self._execute(
+            f"CREATE OR REPLACE VIEW {_quote_identifier(name)} AS "
+            f"SELECT * FROM read_parquet({_quote_literal(pattern)}, hive_partitioning = true)"
+        )
+
+    def write_parquet(self, name: str, path: Union[str, Path]) -> Path:
+        """
+        Cache a registered table as a Parquet file.
+
+        Args:
+            name: Table name
+            path: Destination file
+
+        Returns:
+            Path of the written file
+        """
+        path = Path(path)
+        self._execute(
+            f"COPY (SELECT * FROM {_quote_identifier(name)}) TO {_quote_literal(str(path))} (FORMAT parquet)"
+        )
+        return path
+
+    def _execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[tuple]:
+        """Run a statement under the connection lock and fetch its rows."""
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def tables(self) -> List[str]:
+        """Names of the registered tables and views."""
+        return [row[0] for row in self._execute("SHOW TABLES")]
+
+    def query_arrow(self, sql: str, params: Optional[Sequence[Any]] = None) -> 'pa.Table':
+        """
+        Run a query and return the result as an Arrow table.
+
+        Args:
+            sql: SQL query
+            params: Values for ``?`` placeholders
+
+        Returns:
+            Arrow table with the result
+        """
+        with self._lock:
+            return self.connection.execute(sql, params).fetch_arrow_table()
+
+    def query_df(self, sql: str, params: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+        """
+        Run a query and return the result as a DataFrame.
+
+        Args:
+            sql: SQL query
+            params: Values for ``?`` placeholders
+
+        Returns:
+            DataFrame with the result
+        """
+        with self._lock:
+            return self.connection.execute(sql, params).df()
+
+    def explain(self, sql: str) -> str:
+        """
+        Show the physical plan of a query, including pushed-down
+        projections and filters.
+
+        Args:
+            sql: SQL query
+
+        Returns:
+            The plan as text
+        """
+        rows = self._execute(f"EXPLAIN {sql}")
+        return '\n'.join(row[1] for row in rows)
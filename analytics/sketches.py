@@ -0,0 +1,533 @@
+"""
+Probabilistic summaries for chats too large for exact statistics.
+
+Every sketch is updated with whole batches of values (hashed with
+``pandas.util.hash_array``) and can be merged with another sketch of the
+same configuration, so chunks parsed separately or in different worker
+processes combine into the summary of the whole chat.
+
+- ``HyperLogLog`` estimates distinct counts
+- ``CountMinSketch`` estimates frequencies; ``TopK`` keeps the heavy
+  hitters on top of it
+- ``ReservoirSample`` keeps a uniform random sample of messages
+- ``ChatSketch`` combines them into a parser aggregator, so the summary of
+  a chat is ready when parsing ends
+"""
+
+import heapq
+import math
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.message import Message
+from parsers.aggregators import Aggregator
+from .vocabulary import tokenize
+
+
+DEFAULT_BATCH_SIZE = 50_000
+
+# Fields of a sampled message
+SAMPLE_COLUMNS = ('datetime', 'sender', 'text', 'media_type')
+
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def hash_values(values: Iterable[Any]) -> np.ndarray:
+    """
+    Hash values to 64-bit integers, consistently across processes.
+
+    Args:
+        values: Values to hash (strings, numbers)
+
+    Returns:
+        Array of uint64 hashes
+    """
+    array = np.asarray(values, dtype=object) if not isinstance(values, np.ndarray) else values
+    return pd.util.hash_array(array.astype(object, copy=False), categorize=False)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of significant bits of each uint64 (0 for 0)."""
+    # Both 32-bit halves are exact in float64, so log2 never rounds up
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & _MASK_32).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        high_bits = np.where(high > 0, np.floor(np.log2(high)) + 33, 0)
+        low_bits = np.where(low > 0, np.floor(np.log2(low)) + 1, 0)
+    return np.where(high > 0, high_bits, low_bits).astype(np.int64)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter (Flajolet et al., 2007).
+
+    Uses ``2 ** precision`` one-byte registers; the relative standard error
+    of the estimate is ``1.04 / sqrt(2 ** precision)`` (0.8% by default).
+    """
+
+    def __init__(self, precision: int = 14):
+        """
+        Initialize an empty counter.
+
+        Args:
+            precision: Number of hash bits selecting a register (4-18)
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add a batch of values."""
+        self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Add a batch of precomputed 64-bit hashes."""
+        if len(hashes) == 0:
+            return
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << remaining_bits) - 1)
+        # Position of the leftmost 1-bit among the remaining bits
+        rank = (remaining_bits - _bit_length(remainder) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self) -> float:
+        """Estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        # Linear counting is more accurate while many registers are empty
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            return m * math.log(m / empty)
+        return float(estimate)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Combine with a counter of the same precision, in place."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog counters of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+
+class CountMinSketch:
+    """
+    Count-Min frequency sketch (Cormode & Muthukrishnan, 2005).
+
+    Estimates never undercount; with probability ``1 - exp(-depth)`` they
+    overcount by at most ``e / width`` times the total count.
+    """
+
+    def __init__(self, width: int = 2 ** 16, depth: int = 5):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows (independent hash functions)
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def epsilon(self) -> float:
+        """Overcount bound as a fraction of the total count."""
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        """Probability that an estimate exceeds the bound."""
+        return math.exp(-self.depth)
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum overcount of an estimate, with probability ``1 - delta``."""
+        return self.epsilon * self.total
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        """Column of each hash in each row, by double hashing."""
+        first = (hashes & _MASK_32).astype(np.int64)
+        second = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        rows = np.arange(self.depth, dtype=np.int64)[:, None]
+        return (first[None, :] + rows * second[None, :]) % self.width
+
+    def update_hashes(self, hashes: np.ndarray, counts: Optional[np.ndarray] = None) -> None:
+        """Add precomputed hashes, each ``counts`` times (once by default)."""
+        if len(hashes) == 0:
+            return
+        weights = np.ones(len(hashes), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row, columns in enumerate(self._columns(hashes)):
+            self.table[row] += np.bincount(columns, weights=weights, minlength=self.width).astype(np.int64)
+        self.total += int(weights.sum())
+
+    def update(self, values: Iterable[Any], counts: Optional[np.ndarray] = None) -> None:
+        """Add a batch of values, each ``counts`` times (once by default)."""
+        self.update_hashes(hash_values(values), counts)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """Estimated counts of precomputed hashes."""
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def estimate(self, values: Iterable[Any]) -> np.ndarray:
+        """Estimated counts of values."""
+        return self.estimate_hashes(hash_values(values))
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        """Combine with a sketch of the same shape, in place."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different shape")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class TopK:
+    """
+    Heavy hitters tracked with a Count-Min sketch and a bounded candidate heap.
+
+    Only ``k`` candidates are kept; after each batch they are re-ranked by
+    their sketch estimates, so memory does not grow with the number of
+    distinct values.
+    """
+
+    def __init__(self, k: int = 50, width: int = 2 ** 16, depth: int = 5):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            k: Number of heavy hitters kept
+            width: Count-Min sketch width
+            depth: Count-Min sketch depth
+        """
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: dict = {}
+
+    def update(self, values: Iterable[Any], counts: Optional[np.ndarray] = None) -> None:
+        """Add a batch of values, each ``counts`` times (once by default)."""
+        values = pd.Series(np.asarray(values, dtype=object))
+        if counts is None:
+            # Count repeats within the batch first so each value is hashed once
+            batch = values.value_counts(sort=False)
+            values, counts = batch.index.to_numpy(dtype=object), batch.to_numpy()
+        else:
+            values = values.to_numpy()
+        if len(values) == 0:
+            return
+
+        self.sketch.update(values, counts)
+        self._rerank(values)
+
+    def _rerank(self, new_values: np.ndarray) -> None:
+        """Re-estimate the candidates plus new values and keep the top k."""
+        pool = np.asarray(list(self.candidates) + list(new_values), dtype=object)
+        pool = pd.unique(pool)
+        estimates = self.sketch.estimate(pool)
+        keep = heapq.nlargest(self.k, range(len(pool)), key=estimates.__getitem__)
+        self.candidates = {pool[i]: int(estimates[i]) for i in keep}
+
+    def top(self, n: Optional[int] = None) -> pd.Series:
+        """
+        Heavy hitters with their estimated counts, most frequent first.
+
+        Args:
+            n: Number of values returned (all k by default)
+
+        Returns:
+            Series of estimated counts indexed by value
+        """
+        items = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)[:n]
+        return pd.Series(dict(items), dtype=np.int64, name='count')
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum overcount of an estimate, with probability ``1 - delta``."""
+        return self.sketch.error_bound
+
+    def merge(self, other: 'TopK') -> 'TopK':
+        """Combine with a tracker of the same shape, in place."""
+        self.sketch.merge(other.sketch)
+        self._rerank(np.asarray(list(other.candidates), dtype=object))
+        return self
+
+
+class ReservoirSample:
+    """
+    Uniform random sample of fixed size over a stream (Vitter's algorithm R).
+    """
+
+    def __init__(self, size: int = 10_000, seed: Optional[int] = None):
+        """
+        Initialize an empty sample.
+
+        Args:
+            size: Maximum number of items kept
+            seed: Seed of the random generator
+        """
+        self.size = size
+        self.items = np.empty(0, dtype=object)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, items: Iterable[Any]) -> None:
+        """Offer a batch of items to the sample."""
+        batch = np.fromiter(items, dtype=object)
+        self.update_indexed(len(batch), batch.__getitem__)
+
+    def update_indexed(self, count: int, take: Callable[[np.ndarray], np.ndarray]) -> None:
+        """
+        Offer a batch of items, materializing only those that enter the sample.
+
+        Args:
+            count: Number of items in the batch
+            take: Returns the items at an array of batch positions, as an
+                object array
+        """
+        if count == 0:
+            return
+
+        # Fill the free slots first
+        free = min(max(self.size - len(self.items), 0), count)
+        if free:
+            self.items = np.concatenate([self.items, take(np.arange(free))])
+            self.seen += free
+            if free == count:
+                return
+
+        # Item number t replaces a random slot with probability size / t
+        rest = count - free
+        positions = self.seen + 1 + np.arange(rest)
+        slots = (self.rng.random(rest) * positions).astype(np.int64)
+        accepted = np.flatnonzero(slots < self.size)
+        if len(accepted):
+            # A later item overwrites an earlier one taking the same slot
+            last = len(accepted) - 1 - np.unique(slots[accepted][::-1], return_index=True)[1]
+            chosen = accepted[last]
+            self.items[slots[chosen]] = take(free + chosen)
+        self.seen += rest
+
+    def merge(self, other: 'ReservoirSample') -> 'ReservoirSample':
+        """Combine with another sample into a uniform sample of both streams, in place."""
+        total = self.seen + other.seen
+        size = min(self.size, len(self.items) + len(other.items))
+        if total == 0 or size == 0:
+            self.seen = total
+            return self
+
+        # How many of the merged items come from each stream
+        from_self = self.rng.hypergeometric(self.seen, other.seen, size)
+        from_self = min(max(from_self, size - len(other.items)), len(self.items))
+        keep_self = self.rng.choice(len(self.items), from_self, replace=False)
+        keep_other = self.rng.choice(len(other.items), size - from_self, replace=False)
+        self.items = np.concatenate([self.items[keep_self], other.items[keep_other]])
+        self.seen = total
+        return self
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the stream held in the sample."""
+        return len(self.items) / self.seen if self.seen else 0.0
+
+
+class ChatSketch(Aggregator):
+    """
+    Approximate summary of a chat, built while messages are parsed.
+
+    Registered with ``BaseParser.add_aggregator``, it buffers the emitted
+    messages column-wise and folds them into the sketches one batch at a
+    time, so neither the chat nor a DataFrame of it is needed. Reading any
+    sketch attribute folds in the messages still buffered; ``flush`` does
+    so explicitly, e.g. before the sketch is shared between threads.
+    """
+
+    def __init__(self, seed: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            seed: Seed of the reservoir sample
+            batch_size: Messages buffered before they are folded in
+        """
+        self.batch_size = batch_size
+        self._messages = 0
+        self._first_message: Optional[Any] = None
+        self._last_message: Optional[Any] = None
+        self._senders = HyperLogLog()
+        self._words = HyperLogLog()
+        self._top_senders = TopK(k=50)
+        self._top_words = TopK(k=100)
+        self._sample = ReservoirSample(seed=seed)
+        self._pending: Dict[str, list] = {name: [] for name in SAMPLE_COLUMNS}
+
+    @property
+    def messages(self) -> int:
+        """Exact number of messages."""
+        self.flush()
+        return self._messages
+
+    @property
+    def first_message(self) -> Optional[Any]:
+        """Earliest timestamp, or None if empty."""
+        self.flush()
+        return self._first_message
+
+    @property
+    def last_message(self) -> Optional[Any]:
+        """Latest timestamp, or None if empty."""
+        self.flush()
+        return self._last_message
+
+    @property
+    def senders(self) -> HyperLogLog:
+        """Distinct sender counter."""
+        self.flush()
+        return self._senders
+
+    @property
+    def words(self) -> HyperLogLog:
+        """Distinct word counter."""
+        self.flush()
+        return self._words
+
+    @property
+    def top_senders(self) -> TopK:
+        """Most active senders."""
+        self.flush()
+        return self._top_senders
+
+    @property
+    def top_words(self) -> TopK:
+        """Most frequent words."""
+        self.flush()
+        return self._top_words
+
+    @property
+    def sample(self) -> ReservoirSample:
+        """Uniform sample of messages as (datetime, sender, text, media_type)."""
+        self.flush()
+        return self._sample
+
+    def update(self, message: Message) -> None:
+        pending = self._pending
+        pending['datetime'].append(message.datetime)
+        pending['sender'].append(message.sender)
+        pending['text'].append(message.text)
+        pending['media_type'].append(message.media_type)
+        if len(pending['datetime']) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Fold the buffered messages into the sketches."""
+        if not self._pending['datetime']:
+            return
+        df = pd.DataFrame(self._pending)
+        self._pending = {name: [] for name in SAMPLE_COLUMNS}
+        self._update_batch(df)
+
+    def update_frame(self, df: pd.DataFrame) -> None:
+        """
+        Add a batch of messages given as a DataFrame.
+
+        Args:
+            df: DataFrame with 'datetime', 'sender', 'text' and 'media_type'
+        """
+        for start in range(0, len(df), self.batch_size):
+            self._update_batch(df.iloc[start:start + self.batch_size])
+
+    def _update_batch(self, df: pd.DataFrame) -> None:
+        """Fold one batch of messages into the sketches."""
+        if len(df) == 0:
+            return
+
+        self._messages += len(df)
+        first, last = df['datetime'].min(), df['datetime'].max()
+        self._first_message = first if self._first_message is None else min(self._first_message, first)
+        self._last_message = last if self._last_message is None else max(self._last_message, last)
+
+        sender_counts = df['sender'].value_counts(sort=False)
+        senders = sender_counts.index.to_numpy(dtype=object)
+        self._senders.update(senders)
+        self._top_senders.update(senders, sender_counts.to_numpy())
+
+        _, codes, terms = tokenize(df['text'].fillna('').astype(str).reset_index(drop=True))
+        if len(terms):
+            self._words.update(terms)
+            self._top_words.update(terms, np.bincount(codes, minlength=len(terms)))
+
+        # Only the rows that enter the sample are turned into tuples
+        def take(positions: np.ndarray) -> np.ndarray:
+            rows = df.iloc[positions]
+            items = np.empty(len(rows), dtype=object)
+            items[:] = list(zip(*(rows[name].tolist() for name in SAMPLE_COLUMNS)))
+            return items
+
+        self._sample.update_indexed(len(df), take)
+
+    def update_messages(self, messages: Iterable[Message]) -> None:
+        """
+        Add messages from a stream, e.g. ``parser.iter_messages()``.
+
+        Args:
+            messages: Message iterator
+        """
+        for message in messages:
+            self.update(message)
+        self.flush()
+
+    def spawn(self) -> 'ChatSketch':
+        # Workers draw their own seeds, so their samples are not correlated
+        return ChatSketch(seed=int(self._sample.rng.integers(2 ** 63)), batch_size=self.batch_size)
+
+    def merge(self, other: 'ChatSketch') -> 'ChatSketch':
+        """Combine with the sketch of another part of the chat, in place."""
+        self.flush()
+        other.flush()
+        self._messages += other._messages
+        for name, pick in (('_first_message', min), ('_last_message', max)):
+            values = [value for value in (getattr(self, name), getattr(other, name)) if value is not None]
+            setattr(self, name, pick(values) if values else None)
+        self._senders.merge(other._senders)
+        self._words.merge(other._words)
+        self._top_senders.merge(other._top_senders)
+        self._top_words.merge(other._top_words)
+        self._sample.merge(other._sample)
+        return self
+
+    def sample_dataframe(self) -> pd.DataFrame:
+        """The sampled messages as a DataFrame, in time order."""
+        df = pd.DataFrame(list(self.sample.items), columns=list(SAMPLE_COLUMNS))
+        if len(df):
+            df['datetime'] = pd.to_datetime(df['datetime'])
+            df = df.sort_values('datetime', ignore_index=True)
+        return df
+
+
+def sketch_dataframe(df: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE, seed: Optional[int] = None) -> ChatSketch:
+    """
+    Build the approximate summary of a parsed chat in batches.
+
+    Args:
+        df: DataFrame with 'datetime', 'sender', 'text' and 'media_type'
+        batch_size: Number of messages per sketch update
+        seed: Seed of the reservoir sample
+
+    Returns:
+        ChatSketch
+    """
+    sketch = ChatSketch(seed=seed, batch_size=batch_size)
+    sketch.update_frame(df)
+    return sketch
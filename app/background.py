@@ -0,0 +1,347 @@
+"""
+Background parsing of large uploads.
+
+A worker thread parses the upload and publishes the messages in batches
+of DataFrames. The job lives in the session state, so every rerun of the
+script (and the auto-refreshing live view) renders the messages received
+so far while parsing continues. A cancelled job stops at the next message
+and keeps its partial result. The overview statistics are accumulated by
+the parser as it emits messages and kept with the dataset, as is the
+approximate summary once parsing stops.
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import closing
+from typing import Callable, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from analytics.sketches import ChatSketch
+from models.message import Message
+from parsers.aggregators import ChatSummary
+from parsers.progress import Progress
+from parsers.registry import get_parser_class
+from app.registry import Dataset, get_registry
+from app.session import use_dataset
+from app.utils import create_dataframe
+
+
+logger = logging.getLogger(__name__)
+
+# Uploads at least this large are parsed in the background
+DEFAULT_BACKGROUND_THRESHOLD_MB = 8
+
+# Messages per published batch
+DEFAULT_BATCH_SIZE = 50_000
+
+# Seconds after which a smaller batch is published anyway
+PUBLISH_INTERVAL = 1.0
+
+# Messages parsed between two checks of the publish interval
+CHECK_EVERY = 1_000
+
+
+class UploadReader(io.BufferedIOBase):
+    """
+    Read-only stream over the bytes of an upload, with its own position.
+    
+    The worker reads the upload while the script keeps using the uploaded
+    file, without copying it: the bytes object is immutable, slices are
+    copied only as they are read, and ``getvalue`` hands out the bytes
+    themselves. (``UploadedFile.getbuffer`` would copy the whole upload to
+    unshare the file's buffer.)
+    """
+    
+    def __init__(self, data: bytes, name: str = ''):
+        self._data = data
+        self._view = memoryview(data)
+        self._position = 0
+        self.name = name
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def getvalue(self) -> bytes:
+        return self._data
+    
+    def read(self, size: Optional[int] = -1) -> bytes:
+        start = min(self._position, len(self._data))
+        end = len(self._data) if size is None or size < 0 else min(start + size, len(self._data))
+        self._position = end
+        if start == 0 and end == len(self._data):
+            return self._data
+        return self._view[start:end].tobytes()
+    
+    read1 = read
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+    
+    def tell(self) -> int:
+        return self._position
+
+
+class ParseJob:
+    """
+    Parse an export in a worker thread, publishing DataFrame batches.
+    
+    States are 'running', 'done', 'cancelled' and 'failed'.
+    """
+    
+    def __init__(
+        self,
+        parser,
+        dataset_key: str,
+        on_complete: Optional[Callable[[pd.DataFrame, dict], Dataset]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        publish_interval: float = PUBLISH_INTERVAL
+    ):
+        """
+        Create a job; ``start`` launches the worker.
+        
+        Args:
+            parser: Parser of the export; only the worker uses it
+            dataset_key: Identifies the export (content hash and platform)
+            on_complete: Called in the worker with the complete DataFrame and
+                its metadata once parsing succeeds (e.g. to register the
+                dataset); its return value becomes ``result``
+            batch_size: Messages per published batch
+            publish_interval: Seconds after which a smaller batch is published
+        """
+        self.parser = parser
+        self.summary = ChatSummary()
+        self.sketch = ChatSketch(seed=0)
+        self.parser.add_aggregator(self.summary).add_aggregator(self.sketch)
+        self.dataset_key = dataset_key
+        self.on_complete = on_complete
+        self.batch_size = batch_size
+        self.publish_interval = publish_interval
+        
+        self.state = 'running'
+        self.error: Optional[str] = None
+        self.progress: Optional[Progress] = None
+        self.result: Optional[Dataset] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        
+        self._frames: List[pd.DataFrame] = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._combined: Optional[pd.DataFrame] = None
+        self._combined_frames = 0
+        self._sketched = False
+        self._thread = threading.Thread(target=self._run, name=f"parse-{dataset_key[:12]}", daemon=True)
+    
+    @property
+    def running(self) -> bool:
+        """Whether the worker is still parsing."""
+        return self.state == 'running'
+    
+    @property
+    def messages(self) -> int:
+        """Messages published so far."""
+        with self._lock:
+            return sum(len(frame) for frame in self._frames)
+    
+    @property
+    def metadata(self) -> dict:
+        """Parse results kept with the dataset; the sketch only once the worker has flushed it."""
+        return {
+            'media_manifest': self.parser.media_manifest,
+            'parse_report': self.parser.report,
+            'summary': self.summary,
+            'sketch': self.sketch if self._sketched else None,
+        }
+    
+    def start(self) -> 'ParseJob':
+        """Launch the worker thread."""
+        self._thread.start()
+        return self
+    
+    def cancel(self) -> None:
+        """Stop parsing after the current message; published batches are kept."""
+        self._cancel.set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the worker to stop.
+        
+        Args:
+            timeout: Seconds to wait at most
+        
+        Returns:
+            True if the worker has stopped
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+    
+    def dataframe(self) -> Optional[pd.DataFrame]:
+        """
+        The messages received so far as one DataFrame.
+        
+        Batches are concatenated once per new batch, not on every call.
+        
+        Returns:
+            DataFrame, or None if no batch has been published yet
+        """
+        with self._lock:
+            frames = list(self._frames)
+        if not frames:
+            return None
+        
+        if len(frames) != self._combined_frames:
+            # Batches without media infer an object column; align with create_dataframe
+            self._combined = pd.concat(frames, ignore_index=True).infer_objects()
+            self._combined_frames = len(frames)
+        return self._combined
+    
+    def _run(self) -> None:
+        """Worker: parse, publish batches and record the final state."""
+        self.parser.set_progress(self._record_progress)
+        batch: List[Message] = []
+        last_publish = time.perf_counter()
+        
+        try:
+            with closing(self.parser.iter_messages()) as messages:
+                for count, message in enumerate(messages, 1):
+                    batch.append(message)
+                    if self._cancel.is_set():
+                        break
+                    if len(batch) >= self.batch_size or (
+                        count % CHECK_EVERY == 0 and time.perf_counter() - last_publish >= self.publish_interval
+                    ):
+                        self._publish(batch)
+                        batch = []
+                        last_publish = time.perf_counter()
+            
+            self._publish(batch)
+            # Buffered messages enter the sketch before readers see it
+            self.sketch.flush()
+            self._sketched = True
+            if self._cancel.is_set():
+                self.state = 'cancelled'
+            else:
+                df = self.dataframe()
+                if df is not None:
+                    # The batches are no longer needed once combined
+                    with self._lock:
+                        self._frames = [df]
+                    self._combined_frames = 1
+                    if self.on_complete is not None:
+                        self.result = self.on_complete(df, self.metadata)
+                self.state = 'done'
+        except Exception as e:
+            logger.exception("Background parse of %s failed", self.dataset_key)
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.finished = time.perf_counter()
+    
+    def _publish(self, batch: List[Message]) -> None:
+        """Convert a batch of messages and make it visible to readers."""
+        if not batch:
+            return
+        frame = create_dataframe(batch)
+        with self._lock:
+            self._frames.append(frame)
+    
+    def _record_progress(self, progress: Progress) -> None:
+        """Keep the latest progress snapshot for the live view."""
+        self.progress = progress
+
+
+def background_threshold() -> int:
+    """
+    Upload size from which files are parsed in the background.
+    
+    Read from the CHAT_ANALYTICS_BACKGROUND_PARSE_MB environment variable.
+    
+    Returns:
+        Threshold in bytes
+    """
+    value = os.environ.get('CHAT_ANALYTICS_BACKGROUND_PARSE_MB')
+    return int(float(value) * 1024 * 1024) if value else DEFAULT_BACKGROUND_THRESHOLD_MB * 1024 * 1024
+
+
+def start_parse_job(uploaded_file, platform: str, dataset_key: str) -> ParseJob:
+    """
+    Get the session's parse job for an upload, starting it if needed.
+    
+    A job for a different upload is cancelled. The worker reads the upload
+    through its own ``UploadReader``, which shares the upload's bytes instead
+    of copying them, so the script can keep using the file.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        platform: Chat platform
+        dataset_key: Identifies the upload (content hash and platform)
+    
+    Returns:
+        Running or finished ParseJob
+    """
+    job = st.session_state.get('parse_job')
+    if job is not None and job.dataset_key == dataset_key:
+        return job
+    cancel_parse_job()
+    
+    parser = get_parser_class(platform)(UploadReader(uploaded_file.getvalue(), uploaded_file.name))
+    registry = get_registry()
+    
+    def register(df: pd.DataFrame, metadata: dict) -> Dataset:
+        # Runs in the worker; the registry is thread-safe and process-wide,
+        # so the result is shared even if the session is gone by then
+        return registry.put(dataset_key, df, metadata)
+    
+    job = ParseJob(parser, dataset_key, on_complete=register).start()
+    st.session_state.parse_job = job
+    return job
+
+
+def cancel_parse_job() -> None:
+    """Cancel and forget the session's parse job, if any."""
+    job = st.session_state.pop('parse_job', None)
+    if job is not None:
+        job.cancel()
+
+
+def finish_parse_job(job: ParseJob) -> Optional[pd.DataFrame]:
+    """
+    Make the result of a stopped job the session's dataset.
+    
+    A cancelled job leaves a partial dataset that is kept in the session
+    only; it is not shared with other sessions. Once its result is in the
+    session, the job is dropped; a job without messages stays, so reruns
+    do not parse the file again.
+    
+    Args:
+        job: Job that is no longer running
+    
+    Returns:
+        DataFrame with message data, or None if nothing was parsed
+    """
+    if job.result is None and job.dataframe() is None:
+        return None
+    if st.session_state.get('parse_job') is job:
+        del st.session_state.parse_job
+    
+    if job.result is not None:
+        return use_dataset(job.dataset_key, job.result)
+    
+    df = use_dataset(job.dataset_key, Dataset(job.dataset_key, job.dataframe(), 0, job.metadata))
+    st.session_state.dataset['partial'] = job.state != 'done'
+    return df
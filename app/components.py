@@ -5,9 +5,25 @@ UI components for the Streamlit app.
 import streamlit as st
 import pandas as pd
 import io
+import time
 from datetime import datetime
+from typing import Optional, Tuple
 
+from analytics import query
+from parsers.progress import Progress, ProgressObserver
+from storage.partitioned import PartitionedArchive
 
+
+# Maximum number of result rows rendered in the Query tab
+QUERY_RESULT_ROWS = 10_000
+
+DEFAULT_QUERY = """SELECT sender, count(*) AS messages, min(datetime) AS first_message
+FROM messages
+GROUP BY sender
+ORDER BY messages DESC"""
+
+
+@st.fragment
 def display_message_viewer(df: pd.DataFrame):
     """
     Display message viewer with search and filters.
@@ -101,6 +117,7 @@ def display_message_viewer(df: pd.DataFrame):
         st.info("No messages match your filters.")
 
 
+@st.fragment
 def display_export_options(df: pd.DataFrame):
     """
     Display export options for the data.
@@ -111,44 +128,137 @@ def display_export_options(df: pd.DataFrame):
     st.markdown('<h2 class="section-header">💾 Export Your Data</h2>', unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
+    # Exports are generated only when their button is clicked
     with col1:
         # CSV export
-        csv = df.to_csv(index=False)
         st.download_button(
             label="📄 Download CSV",
-            data=csv,
-            file_name=f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=lambda: df.to_csv(index=False),
+            file_name=f"chat_export_{timestamp}.csv",
             mime="text/csv",
             use_container_width=True
         )
     
     with col2:
         # JSON export
-        json_str = df.to_json(orient='records', date_format='iso')
         st.download_button(
             label="📋 Download JSON",
-            data=json_str,
-            file_name=f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            data=lambda: df.to_json(orient='records', date_format='iso'),
+            file_name=f"chat_export_{timestamp}.json",
             mime="application/json",
             use_container_width=True
         )
     
     with col3:
-        # Excel export (requires openpyxl)
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Messages', index=False)
-        
+        # Excel export (requires xlsxwriter)
         st.download_button(
             label="📊 Download Excel",
-            data=buffer.getvalue(),
-            file_name=f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            data=lambda: _to_excel(df),
+            file_name=f"chat_export_{timestamp}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
         )
 
 
+def _to_excel(df: pd.DataFrame) -> bytes:
+    """Serialize the messages to an Excel workbook."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='Messages', index=False)
+    return buffer.getvalue()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_arrow_table(dataset_key: str, _df: pd.DataFrame):
+    """Convert the dataset to an Arrow table, once per dataset."""
+    import pyarrow as pa
+    
+    return pa.Table.from_pandas(_df, preserve_index=False)
+
+
+def _session_query_engine(dataset_key: str, df: pd.DataFrame) -> query.QueryEngine:
+    """
+    Get this session's query engine, opening a new one when the dataset changes.
+    
+    Every session queries its own restricted connection, so statements of
+    one user can neither read server files nor change the tables of another.
+    
+    Args:
+        dataset_key: Identifies the uploaded dataset
+        df: DataFrame with message data
+        
+    Returns:
+        Query engine with the dataset registered as the messages table
+    """
+    current = st.session_state.get('query_engine')
+    if current is not None and current[0] == dataset_key:
+        return current[1]
+    if current is not None:
+        current[1].close()
+    
+    engine = query.QueryEngine()
+    engine.register_arrow(_cached_arrow_table(dataset_key, df), query.DEFAULT_TABLE)
+    engine.restrict()
+    st.session_state.query_engine = (dataset_key, engine)
+    return engine
+
+
+@st.fragment
+def display_query_tab(df: pd.DataFrame, dataset_key: str):
+    """
+    Display the SQL query editor over the parsed messages.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
+    """
+    st.markdown('<h2 class="section-header">🧮 SQL Query</h2>', unsafe_allow_html=True)
+    
+    if not query.is_available():
+        st.info("Install `duckdb` and `pyarrow` to query your chats with SQL.")
+        return
+    
+    engine = _session_query_engine(dataset_key, df)
+    columns = ', '.join(f"`{name}` ({dtype})" for name, dtype in df.dtypes.astype(str).items())
+    st.caption(f"Table `{query.DEFAULT_TABLE}`: {columns}")
+    
+    sql = st.text_area("SQL", value=DEFAULT_QUERY, height=150, key="query_sql")
+    
+    # A result of another dataset is stale
+    if st.session_state.get('query_result', (dataset_key,))[0] != dataset_key:
+        del st.session_state.query_result
+    
+    if st.button("▶️ Run Query", type="primary"):
+        try:
+            started = time.perf_counter()
+            result = engine.query_arrow(sql)
+            st.session_state.query_result = (dataset_key, sql, result, time.perf_counter() - started)
+        except Exception as e:
+            st.session_state.pop('query_result', None)
+            st.error(f"❌ Query failed: {str(e)}")
+    
+    if 'query_result' in st.session_state:
+        _, last_sql, result, seconds = st.session_state.query_result
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("📋 Rows", f"{result.num_rows:,}")
+        with col2:
+            st.metric("⏱️ Time", f"{seconds * 1000:.0f} ms")
+        
+        if result.num_rows > QUERY_RESULT_ROWS:
+            st.caption(f"Showing the first {QUERY_RESULT_ROWS:,} rows")
+        st.dataframe(result.slice(0, QUERY_RESULT_ROWS), use_container_width=True, hide_index=True)
+        
+        with st.expander("🔍 Query Plan"):
+            try:
+                st.code(engine.explain(last_sql), language=None)
+            except Exception as e:
+                st.error(f"❌ Could not explain the query: {str(e)}")
+
+
 def display_sidebar(uploaded_file):
     """
     Display sidebar content.
@@ -162,7 +272,7 @@ def display_sidebar(uploaded_file):
         st.success(f"✅ File uploaded: {uploaded_file.name}")
         
         # Show file info
-        file_size = len(uploaded_file.getvalue()) / 1024 / 1024  # MB
+        file_size = uploaded_file.size / 1024 / 1024  # MB
         st.info(f"📁 Size: {file_size:.2f} MB")
     
     # Instructions expander
@@ -172,7 +282,7 @@ def display_sidebar(uploaded_file):
         1. Open the chat
         2. Tap ⋮ → More → Export chat
         3. Choose "Without media"
-        4. Save the .txt file
+        4. Upload the .txt file, or the .zip if you exported with media
         
         **Telegram:**
         1. Open Telegram Desktop
@@ -183,6 +293,137 @@ def display_sidebar(uploaded_file):
         """)
 
 
+def display_archive_selector() -> Optional[Tuple[str, str, str]]:
+    """
+    Display the form for opening a partitioned archive on the server.
+    
+    Returns:
+        (archive directory, first month, last month) or None if no archive
+        is open
+    """
+    st.markdown("### 📂 Open Partitioned Archive")
+    path = st.text_input(
+        "Archive directory",
+        key="archive_path",
+        placeholder="/data/chats/family",
+        help="Directory written by `python cli.py ingest`; only the months in the selected range are read"
+    )
+    if not path:
+        return None
+    
+    if not PartitionedArchive.is_archive(path):
+        st.error("❌ No partitioned archive found in this directory.")
+        return None
+    
+    months = PartitionedArchive(path).partitions()
+    if len(months) > 1:
+        first, last = st.select_slider("Months", options=months, value=(months[0], months[-1]), key="archive_months")
+    else:
+        first = last = months[0]
+    
+    return path, first, last
+
+
+def display_parse_report(report):
+    """
+    Display how the last file was parsed.
+    
+    Args:
+        report: ParseReport of the last parse, or None
+    """
+    if report is None:
+        return
+    
+    with st.expander("⏱️ Parse Report"):
+        st.markdown(f"**Parser:** {report.parser}")
+        st.markdown(f"**Messages:** {report.messages:,}")
+        for name, value in report.details.items():
+            st.markdown(f"**{name.replace('_', ' ').capitalize()}:** {value}")
+        for stage, seconds in report.timings.items():
+            st.markdown(f"**{stage.capitalize()}:** {seconds * 1000:.0f} ms")
+
+
+class StreamlitProgress(ProgressObserver):
+    """
+    Progress bar for a parse run, removed once the run ends.
+    """
+    
+    def __init__(self, label: str = "🔄 Parsing messages..."):
+        """
+        Show an empty progress bar.
+        
+        Args:
+            label: Text shown above the bar
+        """
+        self.label = label
+        self._bar = st.progress(0.0, text=label)
+    
+    def update(self, progress: Progress):
+        self._bar.progress(progress.fraction or 0.0, text=describe_progress(progress, self.label))
+    
+    def close(self, progress: Progress):
+        self._bar.empty()
+    
+
+def describe_progress(progress: Optional[Progress], label: str) -> str:
+    """
+    Progress bar label with the bytes read, messages parsed and time left.
+    
+    Args:
+        progress: Latest progress snapshot, or None before the first one
+        label: Leading text
+        
+    Returns:
+        Label text
+    """
+    if progress is None:
+        return label
+    
+    parts = [label]
+    if progress.total_bytes:
+        parts.append(f"{progress.bytes_read / 1024 / 1024:,.1f} of {progress.total_bytes / 1024 / 1024:,.1f} MB")
+    parts.append(f"{progress.messages:,} messages")
+    if progress.eta is not None:
+        parts.append(f"about {progress.eta:,.0f} s left")
+    return " · ".join(parts)
+
+
+def display_registry_status(stats: dict):
+    """
+    Display the usage of the server-wide dataset registry.
+    
+    Args:
+        stats: Counters from ``DatasetRegistry.stats()``
+    """
+    with st.expander("🗄️ Shared Datasets"):
+        st.markdown(f"**Datasets:** {stats['datasets']}")
+        st.markdown(
+            f"**Memory:** {stats['resident_bytes'] / 1024 / 1024:,.1f} MB "
+            f"of {stats['budget_bytes'] / 1024 / 1024:,.0f} MB"
+        )
+        st.markdown(f"**Hits / misses:** {stats['hits']:,} / {stats['misses']:,}")
+        st.markdown(f"**Evictions:** {stats['evictions']:,}")
+
+
+def display_approximate_toggle(message_count: int, threshold: int) -> bool:
+    """
+    Display the approximate mode switch.
+    
+    Args:
+        message_count: Number of parsed messages
+        threshold: Message count above which approximate mode is on by default
+        
+    Returns:
+        Whether approximate mode is enabled
+    """
+    return st.toggle(
+        "⚡ Approximate mode",
+        value=message_count > threshold,
+        help=f"Use sketches and a random sample instead of exact statistics "
+             f"(on by default above {threshold:,} messages)"
+    )
+
+
 def display_landing_page():
     """
     Display landing page when no file is uploaded.
@@ -0,0 +1,259 @@
+"""
+Process-wide registry of parsed datasets shared between sessions.
+
+Every browser session of the Streamlit server runs in the same process.
+Datasets are registered once under a key derived from the file content,
+so analysts opening the same export reuse one parsed DataFrame instead of
+parsing and holding their own copy. Resident bytes are tracked, and the
+least recently used datasets are evicted when the memory budget is
+exceeded.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MB = 2048
+
+# Bytes read at once while hashing an upload
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(stream: IO[bytes], chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Hash the content of a seekable binary file.
+    
+    Args:
+        stream: File object; its position is restored afterwards
+        chunk_size: Bytes read at once
+    
+    Returns:
+        Hex digest of the content
+    """
+    position = stream.tell()
+    stream.seek(0)
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+def dataset_nbytes(df: pd.DataFrame) -> int:
+    """Resident size of a DataFrame, including string data."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+@dataclass
+class Dataset:
+    """
+    A registered dataset.
+    
+    Attributes:
+        key: Registry key (content hash and platform)
+        df: Message DataFrame
+        nbytes: Resident size of the DataFrame
+        metadata: Parse results shown alongside the data (e.g. the parse
+            report and media manifest)
+    """
+    key: str
+    df: pd.DataFrame
+    nbytes: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    def view(self) -> 'Dataset':
+        """
+        A handle for one session.
+        
+        The DataFrame is a shallow copy: it shares the registered data,
+        and with copy-on-write a session that modifies it gets its own
+        copy of the changed columns instead of altering the shared one.
+        """
+        return Dataset(self.key, self.df.copy(deep=False), self.nbytes, dict(self.metadata))
+
+
+class DatasetRegistry:
+    """
+    Thread-safe LRU store of parsed datasets with a memory budget.
+    """
+    
+    def __init__(self, budget_bytes: int):
+        """
+        Create an empty registry.
+        
+        Args:
+            budget_bytes: Resident bytes above which datasets are evicted
+        """
+        self.budget_bytes = budget_bytes
+        self._datasets: 'OrderedDict[str, Dataset]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def resident_bytes(self) -> int:
+        """Total size of the registered datasets."""
+        return sum(dataset.nbytes for dataset in self._datasets.values())
+    
+    def __len__(self) -> int:
+        return len(self._datasets)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._datasets
+    
+    def get(self, key: str) -> Optional[Dataset]:
+        """
+        Look up a dataset and mark it as recently used.
+        
+        Args:
+            key: Registry key
+        
+        Returns:
+            A session view of the dataset, or None if it is not registered
+        """
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                self.misses += 1
+                return None
+            self._datasets.move_to_end(key)
+            self.hits += 1
+            return dataset.view()
+    
+    def put(self, key: str, df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> Dataset:
+        """
+        Register a dataset, evicting least recently used ones if needed.
+        
+        A dataset larger than the whole budget is not kept; the caller
+        still gets a view of it.
+        
+        Args:
+            key: Registry key
+            df: Message DataFrame (treated as read-only from now on)
+            metadata: Parse results to keep with the data
+        
+        Returns:
+            A session view of the dataset
+        """
+        dataset = Dataset(key, df, dataset_nbytes(df), metadata or {})
+        
+        with self._lock:
+            self._datasets.pop(key, None)
+            if dataset.nbytes > self.budget_bytes:
+                logger.warning(
+                    "Dataset %s (%d bytes) exceeds the registry budget of %d bytes; not shared",
+                    key, dataset.nbytes, self.budget_bytes
+                )
+                return dataset.view()
+            
+            self._datasets[key] = dataset
+            self._evict(self.budget_bytes)
+            return dataset.view()
+    
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Optional[Tuple[pd.DataFrame, Dict[str, Any]]]]
+    ) -> Optional[Dataset]:
+        """
+        Look up a dataset, loading and registering it on a miss.
+        
+        Sessions asking for the same key at the same time wait for a
+        single load instead of parsing the export in parallel.
+        
+        Args:
+            key: Registry key
+            loader: Returns the DataFrame and its metadata, or None if
+                nothing could be loaded (which is not registered)
+        
+        Returns:
+            A session view of the dataset, or None
+        """
+        dataset = self.get(key)
+        if dataset is not None:
+            return dataset
+        
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            try:
+                # Another session may have finished loading while we waited
+                if key in self._datasets:
+                    return self.get(key)
+                loaded = loader()
+                if loaded is None:
+                    return None
+                df, metadata = loaded
+                return self.put(key, df, metadata)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+    
+    def _evict(self, budget_bytes: int) -> None:
+        """Drop least recently used datasets until the budget is met (lock held)."""
+        resident = self.resident_bytes
+        while resident > budget_bytes and self._datasets:
+            key, dataset = self._datasets.popitem(last=False)
+            resident -= dataset.nbytes
+            self.evictions += 1
+            logger.info("Evicted dataset %s (%d bytes)", key, dataset.nbytes)
+    
+    def evict(self, key: str) -> None:
+        """Remove a dataset from the registry."""
+        with self._lock:
+            self._datasets.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove every dataset."""
+        with self._lock:
+            self._datasets.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Usage counters of the registry.
+        
+        Returns:
+            Dictionary with 'datasets', 'resident_bytes', 'budget_bytes',
+            'hits', 'misses' and 'evictions'
+        """
+        with self._lock:
+            return {
+                'datasets': len(self._datasets),
+                'resident_bytes': self.resident_bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def registry_budget() -> int:
+    """
+    Memory budget of the shared registry in bytes.
+    
+    Read from the CHAT_ANALYTICS_REGISTRY_BUDGET_MB environment variable.
+    
+    Returns:
+        Budget in bytes
+    """
+    value = os.environ.get('CHAT_ANALYTICS_REGISTRY_BUDGET_MB')
+    return int(float(value) * 1024 * 1024) if value else DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+@st.cache_resource(show_spinner=False)
+def get_registry() -> DatasetRegistry:
+    """The registry shared by every session of this server process."""
+    return DatasetRegistry(registry_budget())
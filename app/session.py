@@ -0,0 +1,183 @@
+"""
+Loading datasets into the Streamlit session.
+
+Uploads and archive ranges are parsed or read once, shared between
+sessions through the dataset registry, and kept in the session state for
+later reruns.
+"""
+
+from typing import List, Optional
+import pandas as pd
+import streamlit as st
+from models.message import Message
+from analytics.sketches import ChatSketch
+from parsers.aggregators import ChatSummary
+from parsers.registry import get_parser_class
+from storage.partitioned import PartitionedArchive
+from app.components import StreamlitProgress
+from app.registry import Dataset, content_hash, get_registry
+from app.utils import archive_dataset_key, create_dataframe
+
+
+# Seconds between two updates of the parse progress bar
+PROGRESS_INTERVAL = 0.25
+
+
+def parse_file(uploaded_file, platform: str) -> List[Message]:
+    """
+    Parse the uploaded file based on the platform.
+    
+    A progress bar shows the bytes read, messages parsed and time left
+    while the file is parsed. The overview statistics and the approximate
+    summary are accumulated while the messages are emitted and kept in the
+    session as ``chat_summary`` and ``chat_sketch``.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        platform: Chat platform ('whatsapp', 'telegram', 'telegram_html', 'instagram')
+    
+    Returns:
+        List of parsed messages
+    """
+    try:
+        parser_class = get_parser_class(platform)
+        if parser_class is None:
+            st.error(f"Unsupported platform: {platform}")
+            return []
+        
+        summary = ChatSummary()
+        sketch = ChatSketch(seed=0)
+        parser = parser_class(uploaded_file)
+        parser.set_progress(StreamlitProgress(), interval=PROGRESS_INTERVAL)
+        parser.add_aggregator(summary).add_aggregator(sketch)
+        messages = parser.parse()
+        # Buffered messages enter the sketch before sessions share it
+        sketch.flush()
+        
+        st.session_state.media_manifest = parser.media_manifest
+        st.session_state.parse_report = parser.report
+        st.session_state.chat_summary = summary
+        st.session_state.chat_sketch = sketch
+        
+        return messages
+    
+    except Exception as e:
+        st.error(f"❌ Error parsing file: {str(e)}")
+        return []
+
+
+def upload_dataset_key(uploaded_file, platform: str) -> str:
+    """
+    Dataset key of an upload, derived from its content.
+    
+    Sessions uploading the same export get the same key and therefore share
+    the registered dataset and cached results. The hash is computed once
+    per upload and session.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        platform: Chat platform
+    
+    Returns:
+        Key made of the content hash and the platform
+    """
+    hashes = st.session_state.setdefault('upload_hashes', {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = content_hash(uploaded_file)
+    return f"{hashes[uploaded_file.file_id]}:{platform}"
+
+
+def use_dataset(dataset_key: str, shared: Optional[Dataset]) -> Optional[pd.DataFrame]:
+    """Make a registered dataset the session's current dataset."""
+    st.session_state.dataset = {'key': dataset_key, 'df': shared.df if shared is not None else None}
+    if shared is not None:
+        st.session_state.media_manifest = shared.metadata.get('media_manifest', [])
+        st.session_state.parse_report = shared.metadata.get('parse_report')
+        st.session_state.chat_summary = shared.metadata.get('summary')
+        st.session_state.chat_sketch = shared.metadata.get('sketch')
+    return st.session_state.dataset['df']
+
+
+def find_dataframe(dataset_key: str) -> Optional[pd.DataFrame]:
+    """
+    DataFrame of a dataset already loaded in this session or shared by another one.
+    
+    Args:
+        dataset_key: Identifies the dataset
+    
+    Returns:
+        DataFrame with message data, or None if the dataset is not loaded
+    """
+    dataset = st.session_state.get('dataset')
+    if dataset is not None and dataset['key'] == dataset_key:
+        return dataset['df']
+    
+    shared = get_registry().get(dataset_key)
+    return use_dataset(dataset_key, shared) if shared is not None else None
+
+
+def load_dataframe(uploaded_file, platform: str, dataset_key: str) -> Optional[pd.DataFrame]:
+    """
+    Parse the uploaded file once and keep its DataFrame for later reruns.
+    
+    Widget interactions rerun the script; the parsed data is reused from
+    the session as long as the same upload is selected. Parsed datasets
+    are shared with other sessions through the dataset registry, so an
+    export already opened elsewhere is not parsed again.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        platform: Chat platform
+        dataset_key: Identifies the upload (content hash and platform)
+    
+    Returns:
+        DataFrame with message data, or None if nothing was parsed
+    """
+    dataset = st.session_state.get('dataset')
+    if dataset is not None and dataset['key'] == dataset_key:
+        return dataset['df']
+    
+    def parse():
+        messages = parse_file(uploaded_file, platform)
+        if not messages:
+            return None
+        metadata = {
+            'media_manifest': st.session_state.get('media_manifest', []),
+            'parse_report': st.session_state.get('parse_report'),
+            'summary': st.session_state.get('chat_summary'),
+            'sketch': st.session_state.get('chat_sketch'),
+        }
+        return create_dataframe(messages), metadata
+    
+    return use_dataset(dataset_key, get_registry().get_or_load(dataset_key, parse))
+
+
+def load_archive_dataframe(path: str, first_month: str, last_month: str) -> Optional[pd.DataFrame]:
+    """
+    Read a range of months from a partitioned archive, once per selection.
+    
+    Only the partitions of the selected months are opened; the DataFrame is
+    kept in the session and shared through the registry like a parsed
+    upload.
+    
+    Args:
+        path: Archive directory
+        first_month: First included month ('YYYY-MM')
+        last_month: Last included month ('YYYY-MM')
+    
+    Returns:
+        DataFrame with message data, or None if the range is empty
+    """
+    dataset_key = archive_dataset_key(path, first_month, last_month)
+    dataset = st.session_state.get('dataset')
+    if dataset is not None and dataset['key'] == dataset_key:
+        return dataset['df']
+    
+    def read():
+        start = pd.Timestamp(first_month)
+        end = pd.Timestamp(last_month) + pd.offsets.MonthBegin(1)
+        with st.spinner("📂 Reading archive partitions..."):
+            df = PartitionedArchive(path).to_dataframe(start, end)
+        return (df, {'media_manifest': [], 'parse_report': None}) if not df.empty else None
+    
+    return use_dataset(dataset_key, get_registry().get_or_load(dataset_key, read))
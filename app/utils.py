@@ -1,77 +1,52 @@
 """
 Utility functions for the Streamlit app.
+
+This module does not import Streamlit, so headless tools (CLI workers,
+the parse service, benchmarks) can reuse the detection and DataFrame
+helpers cheaply; session and UI helpers live in ``app.session``.
 """
 
-import pandas as pd
-from typing import List, Optional
+import os
+import zipfile
+from typing import List, Optional, TYPE_CHECKING
 from models.message import Message
-from parsers.whatsapp import WhatsAppParser
-from parsers.telegram import TelegramParser
-from parsers.instagram import InstagramParser
-import streamlit as st
+from parsers.archive import is_zip, read_member_names
+from parsers.detection import SNIFF_BYTES, detect_platform
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Chats with more messages than this default to approximate statistics
+DEFAULT_APPROXIMATE_THRESHOLD = 500_000
 
 
-def detect_file_type(file_name: str, file_content: bytes) -> Optional[str]:
+def detect_file_type(file_name: str, file_content: bytes, uploaded_file=None) -> Optional[str]:
     """
     Detect the chat platform based on file name and content.
     
+    Only the first ``SNIFF_BYTES`` bytes of the content are inspected, so
+    callers should pass a bounded prefix rather than the whole upload.
+    
     Args:
         file_name: Name of the uploaded file
-        file_content: File content as bytes
+        file_content: Leading bytes of the file
+        uploaded_file: Optional file object, used to list zip members
         
     Returns:
-        Detected platform ('whatsapp', 'telegram', 'instagram') or None
+        Detected platform ('whatsapp', 'telegram', 'telegram_html', 'instagram') or None
     """
-    # Check by file extension
-    if file_name.endswith('.json'):
-        return 'telegram'
-    elif file_name.endswith('.html'):
-        return 'instagram'
-    elif file_name.endswith('.txt'):
-        # Check content for WhatsApp patterns
+    member_names = None
+    if uploaded_file is not None and is_zip(file_content):
         try:
-            content_str = file_content.decode('utf-8')
-            if ' - ' in content_str[:200] and ': ' in content_str[:200]:
-                return 'whatsapp'
-        except:
-            pass
-    
-    return None
-
-
-def parse_file(uploaded_file, platform: str) -> List[Message]:
-    """
-    Parse the uploaded file based on the platform.
-    
-    Args:
-        uploaded_file: Streamlit uploaded file object
-        platform: Chat platform ('whatsapp', 'telegram', 'instagram')
-        
-    Returns:
-        List of parsed messages
-    """
-    try:
-        if platform == 'whatsapp':
-            parser = WhatsAppParser(uploaded_file)
-        elif platform == 'telegram':
-            parser = TelegramParser(uploaded_file)
-        elif platform == 'instagram':
-            parser = InstagramParser(uploaded_file)
-        else:
-            st.error(f"Unknown platform: {platform}")
-            return []
-        
-        with st.spinner("🔄 Parsing messages..."):
-            messages = parser.parse(verbose=True)
-        
-        return messages
+            member_names = read_member_names(uploaded_file)
+        except zipfile.BadZipFile:
+            return None
     
-    except Exception as e:
-        st.error(f"❌ Error parsing file: {str(e)}")
-        return []
+    return detect_platform(file_name, file_content[:SNIFF_BYTES], member_names)
 
 
-def create_dataframe(messages: List[Message]) -> pd.DataFrame:
+def create_dataframe(messages: List[Message]) -> 'pd.DataFrame':
     """
     Convert messages to pandas DataFrame.
     
@@ -81,6 +56,8 @@ def create_dataframe(messages: List[Message]) -> pd.DataFrame:
     Returns:
         DataFrame with message data
     """
+    import pandas as pd
+    
     data = [msg.to_dict() for msg in messages]
     df = pd.DataFrame(data)
     
@@ -88,4 +65,22 @@ def create_dataframe(messages: List[Message]) -> pd.DataFrame:
     if 'datetime' in df.columns:
         df['datetime'] = pd.to_datetime(df['datetime'])
     
-    return df
\ No newline at end of file
+    return df
+
+
+def archive_dataset_key(path: str, first_month: str, last_month: str) -> str:
+    """Dataset key of a month range of an archive."""
+    return f"archive:{os.path.abspath(path)}:{first_month}:{last_month}"
+
+
+def approximate_threshold() -> int:
+    """
+    Message count above which the dashboard defaults to approximate mode.
+    
+    Read from the CHAT_ANALYTICS_APPROX_THRESHOLD environment variable.
+    
+    Returns:
+        Threshold in messages
+    """
+    value = os.environ.get('CHAT_ANALYTICS_APPROX_THRESHOLD')
+    return int(value) if value else DEFAULT_APPROXIMATE_THRESHOLD
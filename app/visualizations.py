@@ -6,17 +6,54 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from typing import List, Optional
 
+from analytics import (
+    ContentFeatures,
+    ConversationStats,
+    TermCounts,
+    build_term_counts,
+    conversation_stats,
+    extract_content_features,
+    log_odds_terms,
+    tfidf_terms
+)
+from analytics.conversation import DEFAULT_SESSION_GAP_MINUTES
+from analytics.sketches import ChatSketch, sketch_dataframe
+from parsers.aggregators import ChatSummary
+from parsers.archive import MediaFile
 
-def display_statistics(df: pd.DataFrame):
+
+def _matching_summary(df: pd.DataFrame, summary: Optional[ChatSummary]) -> Optional[ChatSummary]:
+    """The summary if it was accumulated over exactly the messages of the DataFrame."""
+    return summary if summary is not None and summary.messages == len(df) else None
+
+
+def display_statistics(df: pd.DataFrame, summary: Optional[ChatSummary] = None):
     """
     Display basic statistics about the chat with modern styling.
     
     Args:
         df: DataFrame with message data
+        summary: Statistics accumulated while parsing the same messages;
+            when given, the DataFrame is not scanned
     """
     st.markdown('<h2 class="section-header">📊 Overview</h2>', unsafe_allow_html=True)
     
+    summary = _matching_summary(df, summary)
+    if summary is not None:
+        participants = summary.senders.participants
+        first, last = summary.time_range.first, summary.time_range.last
+        days = summary.time_range.duration.days if first is not None else None
+        avg_msg_length = summary.lengths.mean if summary.lengths.messages else float('nan')
+    else:
+        participants = df['sender'].nunique()
+        has_dates = 'datetime' in df.columns and len(df) > 0
+        first = df['datetime'].min() if has_dates else None
+        last = df['datetime'].max() if has_dates else None
+        days = (last - first).days if has_dates else None
+        avg_msg_length = df['text'].str.len().mean()
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -29,23 +66,21 @@ def display_statistics(df: pd.DataFrame):
     with col2:
         st.metric(
             label="👥 Participants", 
-            value=df['sender'].nunique(),
-            delta=f"{df['sender'].nunique()} unique"
+            value=participants,
+            delta=f"{participants} unique"
         )
     
     with col3:
-        if 'datetime' in df.columns and len(df) > 0:
-            days = (df['datetime'].max() - df['datetime'].min()).days
+        if days is not None:
             st.metric(
                 label="📅 Duration", 
                 value=f"{days} days",
-                delta=f"{df['datetime'].min().strftime('%b %Y')} - {df['datetime'].max().strftime('%b %Y')}"
+                delta=f"{first.strftime('%b %Y')} - {last.strftime('%b %Y')}"
             )
         else:
             st.metric("📅 Duration", "N/A")
     
     with col4:
-        avg_msg_length = df['text'].str.len().mean()
         st.metric(
             label="📝 Avg Length", 
             value=f"{avg_msg_length:.0f}",
@@ -53,18 +88,24 @@ def display_statistics(df: pd.DataFrame):
         )
 
 
-def display_sender_stats(df: pd.DataFrame):
+def display_sender_stats(df: pd.DataFrame, summary: Optional[ChatSummary] = None):
     """
     Display statistics by sender with modern visualizations.
     
     Args:
         df: DataFrame with message data
+        summary: Statistics accumulated while parsing the same messages;
+            when given, the DataFrame is not scanned
     """
     st.markdown('<h2 class="section-header">👥 Participant Analysis</h2>', unsafe_allow_html=True)
     
     # Calculate messages per sender
-    sender_stats = df['sender'].value_counts().reset_index()
-    sender_stats.columns = ['Sender', 'Messages']
+    summary = _matching_summary(df, summary)
+    if summary is not None:
+        sender_stats = pd.DataFrame(summary.senders.most_common(), columns=['Sender', 'Messages'])
+    else:
+        sender_stats = df['sender'].value_counts().reset_index()
+        sender_stats.columns = ['Sender', 'Messages']
     sender_stats['Percentage'] = (sender_stats['Messages'] / len(df) * 100).round(1)
     
     col1, col2 = st.columns([2, 3])
@@ -110,12 +151,66 @@ def display_sender_stats(df: pd.DataFrame):
         st.plotly_chart(fig, use_container_width=True)
 
 
-def display_time_analysis(df: pd.DataFrame):
+def display_media_stats(media_manifest: List[MediaFile]):
+    """
+    Display statistics about the media files shipped with a zip export.
+    
+    Args:
+        media_manifest: Media files listed in the export archive
+    """
+    if not media_manifest:
+        return
+    
+    st.markdown('<h2 class="section-header">📎 Media Files</h2>', unsafe_allow_html=True)
+    
+    media_df = pd.DataFrame([
+        {'Type': media.media_type, 'Size': media.size} for media in media_manifest
+    ])
+    media_stats = media_df.groupby('Type')['Size'].agg(['count', 'sum']).reset_index()
+    media_stats.columns = ['Type', 'Files', 'Bytes']
+    media_stats = media_stats.sort_values('Files', ascending=False)
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        st.metric(
+            label="📁 Media Files",
+            value=f"{len(media_df):,}",
+            delta=f"{media_df['Size'].sum() / 1024 / 1024:.1f} MB"
+        )
+    
+    with col2:
+        fig = go.Figure(data=[go.Bar(
+            x=media_stats['Type'],
+            y=media_stats['Files'],
+            customdata=media_stats['Bytes'] / 1024 / 1024,
+            marker_color='lightblue',
+            hovertemplate='<b>%{x}</b><br>Files: %{y}<br>Size: %{customdata:.1f} MB<extra></extra>'
+        )])
+        
+        fig.update_layout(
+            title={
+                'text': 'Media Files by Type',
+                'x': 0.5,
+                'xanchor': 'center'
+            },
+            xaxis_title='Media Type',
+            yaxis_title='Files',
+            height=300,
+            template='plotly_white'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def display_time_analysis(df: pd.DataFrame, summary: Optional[ChatSummary] = None):
     """
     Display time-based analysis with modern charts.
     
     Args:
         df: DataFrame with message data
+        summary: Statistics accumulated while parsing the same messages;
+            its hour histogram feeds the 24-hour chart
     """
     if 'datetime' not in df.columns or len(df) == 0:
         st.warning("⚠️ No datetime information available for time analysis")
@@ -123,14 +218,60 @@ def display_time_analysis(df: pd.DataFrame):
     
     st.markdown('<h2 class="section-header">📅 Temporal Patterns</h2>', unsafe_allow_html=True)
     
-    # Add time grouping columns
-    df['date'] = df['datetime'].dt.date
-    df['week'] = df['datetime'].dt.to_period('W').dt.start_time
-    df['month'] = df['datetime'].dt.to_period('M').dt.start_time
-    df['year'] = df['datetime'].dt.year
-    df['hour'] = df['datetime'].dt.hour
-    df['weekday'] = df['datetime'].dt.day_name()
+    # Time grouping columns go into a separate frame; the dataset itself
+    # may be shared with other sessions and is never modified
+    time_df = _time_grouping_columns(df)
+    summary = _matching_summary(df, summary)
+    
+    _display_timeline(time_df)
+    _display_activity_patterns(time_df, summary.hours.counts if summary is not None else None)
+
+
+def display_timeline(df: pd.DataFrame):
+    """
+    Display only the message timeline (e.g. while a file is still being parsed).
+    
+    Args:
+        df: DataFrame with message data
+    """
+    if 'datetime' not in df.columns or len(df) == 0:
+        return
     
+    _display_timeline(_time_grouping_columns(df))
+
+
+def _time_grouping_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the sender and time grouping columns used by the time charts.
+    
+    Args:
+        df: DataFrame with message data
+        
+    Returns:
+        New DataFrame with 'datetime', 'sender', 'date', 'week', 'month',
+        'year', 'hour' and 'weekday'
+    """
+    timestamps = df['datetime']
+    return pd.DataFrame({
+        'datetime': timestamps,
+        'sender': df['sender'],
+        'date': timestamps.dt.date,
+        'week': timestamps.dt.to_period('W').dt.start_time,
+        'month': timestamps.dt.to_period('M').dt.start_time,
+        'year': timestamps.dt.year,
+        'hour': timestamps.dt.hour,
+        'weekday': timestamps.dt.day_name(),
+    }, index=df.index)
+
+
+@st.fragment
+def _display_timeline(df: pd.DataFrame):
+    """
+    Display the message timeline; its controls rerun only this chart.
+    
+    Args:
+        df: DataFrame with message data and time grouping columns
+    """
     # Timeline controls
     st.markdown("### 📈 Message Timeline")
     col1, col2, col3 = st.columns([2, 2, 8])
@@ -229,7 +370,18 @@ def display_time_analysis(df: pd.DataFrame):
     )
     
     st.plotly_chart(fig_timeline, use_container_width=True)
+
+
+@st.fragment
+def _display_activity_patterns(df: pd.DataFrame, hour_counts: Optional[List[int]] = None):
+    """
+    Display the weekday/hour heatmap and the hourly radial chart; the
+    normalization control reruns only these charts.
     
+    Args:
+        df: DataFrame with message data and time grouping columns
+        hour_counts: Messages per hour of the day, if already counted
+    """
     # Heatmap and radial chart with normalization
     st.markdown("### 🔥 Activity Patterns")
     
@@ -292,7 +444,11 @@ def display_time_analysis(df: pd.DataFrame):
     
     with col2:
         # Radial chart for hours
-        hourly_dist = df['hour'].value_counts().sort_index()
+        if hour_counts is not None:
+            hourly_dist = pd.Series(hour_counts)
+            hourly_dist = hourly_dist[hourly_dist > 0]
+        else:
+            hourly_dist = df['hour'].value_counts().sort_index()
         
         # Apply normalization for radial chart
         if normalization != "None":
@@ -339,30 +495,19 @@ def display_time_analysis(df: pd.DataFrame):
         st.plotly_chart(fig_radial, use_container_width=True)
 
 
-def display_word_stats(df: pd.DataFrame):
+def display_word_stats(df: pd.DataFrame, dataset_key: str):
     """
-    Display word frequency analysis.
+    Display word frequency analysis and each participant's signature words.
     
     Args:
         df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
     """
     st.markdown('<h2 class="section-header">📝 Content Analysis</h2>', unsafe_allow_html=True)
     
-    # Get all words
-    all_text = ' '.join(df['text'].dropna().astype(str))
-    words = all_text.lower().split()
-    
-    # Filter common words
-    common_words = ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                    'of', 'with', 'by', 'from', 'is', 'was', 'are', 'were', 'been', 'be',
-                    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-                    'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these',
-                    'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'them', 'their']
-    
-    filtered_words = [word for word in words if len(word) > 3 and word not in common_words]
-    
-    # Count word frequency
-    word_freq = pd.Series(filtered_words).value_counts().head(20)
+    # Count word frequency from the sender × term matrix
+    term_counts = _cached_term_counts(dataset_key, df, 'sender')
+    word_freq = term_counts.top_terms(20)
     
     # Create bar chart
     fig = go.Figure(data=[
@@ -393,4 +538,471 @@ def display_word_stats(df: pd.DataFrame):
         template='plotly_white'
     )
     
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(fig, use_container_width=True)
+    
+    display_signature_words(df, dataset_key)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_term_counts(dataset_key: str, _df: pd.DataFrame, by: str) -> TermCounts:
+    """
+    Build the term count matrix once per dataset and grouping.
+    
+    Shared rather than copied per rerun: the matrix grows with vocabulary
+    times senders and is only ever read.
+    """
+    return build_term_counts(_df, by=by)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_signature_terms(dataset_key: str, _df: pd.DataFrame, by: str, method: str) -> pd.DataFrame:
+    """Score distinctive terms once per dataset, grouping and method."""
+    term_counts = _cached_term_counts(dataset_key, _df, by)
+    if method == "Log-odds":
+        return log_odds_terms(term_counts, top_n=15)
+    return tfidf_terms(term_counts, top_n=15)
+
+
+@st.fragment
+def display_signature_words(df: pd.DataFrame, dataset_key: str):
+    """
+    Display the words that set a participant or a month apart.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
+    """
+    st.markdown("### ✍️ Signature Words")
+    
+    col1, col2, col3 = st.columns([2, 2, 4])
+    
+    with col1:
+        group_by = st.radio("Signature words by", ["Participant", "Month"], horizontal=True)
+    
+    with col2:
+        method = st.radio(
+            "Scoring",
+            ["TF-IDF", "Log-odds"],
+            horizontal=True,
+            help="TF-IDF favours words only this group uses; log-odds compares against everyone else"
+        )
+    
+    by = 'sender' if group_by == "Participant" else 'period'
+    if by == 'period' and 'datetime' not in df.columns:
+        st.warning("⚠️ No datetime information available")
+        return
+    
+    signature = _cached_signature_terms(dataset_key, df, by, method)
+    if signature.empty:
+        st.info("Not enough repeated words to find signature words")
+        return
+    
+    if by == 'sender':
+        # Most active participants first
+        scored = set(signature['row'])
+        options = [sender for sender in df['sender'].value_counts().index if sender in scored]
+        format_func = str
+    else:
+        options = sorted(signature['row'].unique(), reverse=True)
+        format_func = lambda period: period.strftime('%b %Y')
+    
+    with col3:
+        selected = st.selectbox(group_by, options, format_func=format_func)
+    
+    terms = signature[signature['row'] == selected]
+    fig = go.Figure(data=[go.Bar(
+        x=terms['score'],
+        y=terms['term'],
+        orientation='h',
+        customdata=terms['count'],
+        marker=dict(
+            color=terms['score'],
+            colorscale='Viridis',
+            showscale=False
+        ),
+        hovertemplate='<b>%{y}</b><br>Score: %{x:.3f}<br>Count: %{customdata}<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title={
+            'text': f'Signature Words of {format_func(selected)} ({method})',
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title='Score',
+        yaxis_title='Words',
+        height=450,
+        yaxis={'categoryorder': 'total ascending'},
+        template='plotly_white'
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_content_features(dataset_key: str, _df: pd.DataFrame) -> ContentFeatures:
+    """Extract content features once per dataset."""
+    return extract_content_features(_df)
+
+
+def _top_counts_chart(counts: pd.Series, title: str, color: str) -> go.Figure:
+    """Horizontal bar chart of the most frequent tokens."""
+    top = counts.head(15)
+    fig = go.Figure(data=[go.Bar(
+        x=top.values,
+        y=top.index,
+        orientation='h',
+        marker_color=color,
+        hovertemplate='<b>%{y}</b><br>Count: %{x}<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title={
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title='Count',
+        height=400,
+        yaxis={'categoryorder': 'total ascending'},
+        template='plotly_white'
+    )
+    return fig
+
+
+def display_content_features(df: pd.DataFrame, dataset_key: str):
+    """
+    Display emoji, link, mention, hashtag and message length statistics.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
+    """
+    if len(df) == 0:
+        return
+    
+    st.markdown('<h2 class="section-header">🔗 Content Features</h2>', unsafe_allow_html=True)
+    
+    features = _cached_content_features(dataset_key, df)
+    messages = features.messages
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("😀 Emoji", f"{int(messages['emoji'].sum()):,}", f"{(messages['emoji'] > 0).mean() * 100:.1f}% of messages")
+    
+    with col2:
+        st.metric("🔗 Links", f"{int(messages['url'].sum()):,}", f"{len(features.domain_counts):,} domains")
+    
+    with col3:
+        st.metric("🙋 Mentions", f"{int(messages['mention'].sum()):,}", f"{len(features.mention_counts):,} distinct")
+    
+    with col4:
+        st.metric("#️⃣ Hashtags", f"{int(messages['hashtag'].sum()):,}", f"{len(features.hashtag_counts):,} distinct")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if len(features.emoji_counts):
+            st.plotly_chart(_top_counts_chart(features.emoji_counts, 'Top Emoji', 'gold'), use_container_width=True)
+        else:
+            st.info("No emoji found")
+    
+    with col2:
+        if len(features.domain_counts):
+            st.plotly_chart(_top_counts_chart(features.domain_counts, 'Top Linked Domains', 'lightblue'), use_container_width=True)
+        else:
+            st.info("No links found")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        histogram = features.length_histogram
+        fig = go.Figure(data=[go.Bar(
+            x=histogram.index.astype(str),
+            y=histogram.values,
+            marker_color='mediumpurple',
+            hovertemplate='<b>%{x} characters</b><br>Messages: %{y}<extra></extra>'
+        )])
+        
+        fig.update_layout(
+            title={
+                'text': 'Message Length',
+                'x': 0.5,
+                'xanchor': 'center'
+            },
+            xaxis_title='Characters',
+            yaxis_title='Messages',
+            height=400,
+            template='plotly_white'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        if len(features.mention_counts):
+            st.plotly_chart(_top_counts_chart(features.mention_counts, 'Top Mentions', 'lightgreen'), use_container_width=True)
+        elif len(features.hashtag_counts):
+            st.plotly_chart(_top_counts_chart(features.hashtag_counts, 'Top Hashtags', 'lightgreen'), use_container_width=True)
+    
+    st.markdown("### 👥 Content by Participant")
+    sender_df = features.by_sender.head(50).reset_index()
+    sender_df['mean_length'] = sender_df['mean_length'].round(1)
+    sender_df.columns = ['Sender', 'Messages', 'Avg Length', 'Links', 'Mentions', 'Hashtags', 'Emoji']
+    st.dataframe(sender_df, use_container_width=True, hide_index=True)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_conversation_stats(dataset_key: str, _df: pd.DataFrame, session_gap_minutes: float) -> ConversationStats:
+    """Compute conversation stats once per dataset and session gap."""
+    return conversation_stats(_df, session_gap_minutes)
+
+
+def _format_seconds(seconds: float) -> str:
+    """Format a duration in seconds for display."""
+    if pd.isna(seconds):
+        return "N/A"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+
+@st.fragment
+def display_conversation_analysis(df: pd.DataFrame, dataset_key: str):
+    """
+    Display reply latency, sender transitions and conversation sessions.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
+    """
+    if 'datetime' not in df.columns or len(df) < 2:
+        st.warning("⚠️ Not enough messages for conversation analysis")
+        return
+    
+    st.markdown('<h2 class="section-header">🔁 Conversation Dynamics</h2>', unsafe_allow_html=True)
+    
+    session_gap = st.number_input(
+        "Session gap (minutes)",
+        min_value=1,
+        max_value=24 * 60,
+        value=DEFAULT_SESSION_GAP_MINUTES,
+        step=5,
+        help="A silence longer than this starts a new conversation session"
+    )
+    
+    stats = _cached_conversation_stats(dataset_key, df, float(session_gap))
+    sessions = stats.sessions
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("🧵 Sessions", f"{len(sessions):,}")
+    
+    with col2:
+        st.metric("💬 Median Session", f"{sessions['messages'].median():.0f} messages")
+    
+    with col3:
+        st.metric("⏱️ Median Session Length", _format_seconds(sessions['duration_minutes'].median() * 60))
+    
+    with col4:
+        all_latencies = stats.latency_histogram
+        if stats.replies:
+            # Median from the histogram: upper edge of the bin holding the middle reply
+            middle = all_latencies['replies'].cumsum().searchsorted(stats.replies / 2)
+            st.metric("↩️ Median Reply", f"≤ {_format_seconds(all_latencies['upper'].iloc[middle])}")
+        else:
+            st.metric("↩️ Median Reply", "N/A")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Transitions between the most active senders
+        top_senders = df['sender'].value_counts().head(15).index.tolist()
+        transitions = stats.transitions.loc[top_senders, top_senders]
+        
+        fig = go.Figure(data=go.Heatmap(
+            z=transitions.values,
+            x=transitions.columns,
+            y=transitions.index,
+            colorscale='Viridis',
+            hovertemplate='<b>%{y} → %{x}</b><br>Messages: %{z}<extra></extra>'
+        ))
+        
+        fig.update_layout(
+            title={
+                'text': 'Who Follows Whom',
+                'x': 0.5,
+                'xanchor': 'center'
+            },
+            xaxis_title='Next Sender',
+            yaxis_title='Previous Sender',
+            height=450,
+            template='plotly_white'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        histogram = stats.latency_histogram[stats.latency_histogram['replies'] > 0]
+        labels = [
+            f"{_format_seconds(lower)} – {_format_seconds(upper)}"
+            for lower, upper in zip(histogram['lower'], histogram['upper'])
+        ]
+        
+        fig = go.Figure(data=[go.Bar(
+            x=labels,
+            y=histogram['replies'],
+            marker_color='lightblue',
+            hovertemplate='<b>%{x}</b><br>Replies: %{y}<extra></extra>'
+        )])
+        
+        fig.update_layout(
+            title={
+                'text': 'Reply Latency Distribution',
+                'x': 0.5,
+                'xanchor': 'center'
+            },
+            xaxis_title='Reply Latency',
+            yaxis_title='Replies',
+            height=450,
+            template='plotly_white'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("### ↩️ Reply Latency by Pair")
+    latency_df = stats.reply_latency.head(50).copy()
+    for column in ['mean', 'median', 'p25', 'p75', 'p90']:
+        latency_df[column] = latency_df[column].apply(_format_seconds)
+    latency_df.columns = ['From', 'Replier', 'Replies', 'Mean', 'Median', 'P25', 'P75', 'P90']
+    st.dataframe(latency_df, use_container_width=True, hide_index=True)
+    
+    st.markdown("### 🧵 Session Lengths")
+    fig = go.Figure(data=[go.Histogram(
+        x=sessions['messages'],
+        nbinsx=50,
+        marker_color='mediumpurple',
+        hovertemplate='Messages: %{x}<br>Sessions: %{y}<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title={
+            'text': 'Messages per Session',
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title='Messages',
+        yaxis_title='Sessions',
+        height=350,
+        template='plotly_white'
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_chat_sketch(dataset_key: str, _df: pd.DataFrame) -> ChatSketch:
+    """Build the approximate summary once per dataset; shared, not copied, on reruns."""
+    return sketch_dataframe(_df, seed=0)
+
+
+def get_chat_sketch(df: pd.DataFrame, dataset_key: str, sketch: Optional[ChatSketch] = None) -> ChatSketch:
+    """
+    Get the approximate summary of a dataset.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the uploaded dataset for caching
+        sketch: Summary accumulated while parsing the same messages;
+            when given, the DataFrame is not scanned
+        
+    Returns:
+        ChatSketch of the dataset
+    """
+    if sketch is not None and sketch.messages == len(df):
+        return sketch
+    with st.spinner("⚡ Building approximate summary..."):
+        return _cached_chat_sketch(dataset_key, df)
+
+
+def _approximate_bar_chart(counts: pd.Series, error_bound: float, title: str, color: str) -> go.Figure:
+    """Horizontal bar chart of Count-Min estimates with their overcount bound."""
+    fig = go.Figure(data=[go.Bar(
+        x=counts.values,
+        y=counts.index,
+        orientation='h',
+        marker_color=color,
+        # Estimates never undercount, so the error bar only points down
+        error_x=dict(type='constant', symmetric=False, value=0, valueminus=error_bound),
+        hovertemplate='<b>%{y}</b><br>≈ %{x:,}<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title={
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title='Estimated Count',
+        height=450,
+        yaxis={'categoryorder': 'total ascending'},
+        template='plotly_white'
+    )
+    return fig
+
+
+def display_approximate_overview(sketch: ChatSketch):
+    """
+    Display sketch-based overview statistics with their error bounds.
+    
+    Args:
+        sketch: Approximate summary of the chat
+    """
+    st.markdown('<h2 class="section-header">📊 Overview (approximate)</h2>', unsafe_allow_html=True)
+    st.caption(
+        f"⚡ Approximate mode: distinct counts are HyperLogLog estimates "
+        f"(±{sketch.senders.relative_error * 100:.1f}% standard error); top counts are "
+        f"Count-Min estimates that may overcount by up to {sketch.top_senders.error_bound:,.0f} "
+        f"with {(1 - sketch.top_senders.sketch.delta) * 100:.1f}% probability."
+    )
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("💬 Total Messages", f"{sketch.messages:,}", delta="exact")
+    
+    with col2:
+        st.metric("👥 Participants", f"≈ {sketch.senders.count():,.0f}", delta=f"±{sketch.senders.relative_error * 100:.1f}%")
+    
+    with col3:
+        if sketch.first_message is not None:
+            days = (sketch.last_message - sketch.first_message).days
+            st.metric(
+                "📅 Duration",
+                f"{days} days",
+                delta=f"{sketch.first_message.strftime('%b %Y')} - {sketch.last_message.strftime('%b %Y')}"
+            )
+        else:
+            st.metric("📅 Duration", "N/A")
+    
+    with col4:
+        st.metric("📚 Distinct Words", f"≈ {sketch.words.count():,.0f}", delta=f"±{sketch.words.relative_error * 100:.1f}%")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(
+            _approximate_bar_chart(sketch.top_senders.top(15), sketch.top_senders.error_bound, 'Most Active Participants (approximate)', 'lightblue'),
+            use_container_width=True
+        )
+    
+    with col2:
+        st.plotly_chart(
+            _approximate_bar_chart(sketch.top_words.top(20), sketch.top_words.error_bound, 'Top 20 Words (approximate)', 'mediumpurple'),
+            use_container_width=True
+        )
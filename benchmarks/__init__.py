@@ -0,0 +1,7 @@
+"""
+Benchmarks and load tests for the chat parsers and the app.
+
+Run them from the repository root, e.g.::
+
+    python -m benchmarks.bench_json_backends --messages 200000
+"""
@@ -0,0 +1,318 @@
+"""
+Measure end-to-end dashboard latency on synthetic uploads of growing size.
+
+Drives ``streamlit_app.py`` (and so ``main``) headlessly with Streamlit's
+``AppTest``: a synthetic export of each size is uploaded, then a fixed
+script of interactions is replayed (tabs, Time Grouping, View By,
+Normalize By, typing in the message search). Each interaction records
+the wall time of the script run, the bytes of the Plotly figures sent to
+the browser and, in a second replay under ``tracemalloc`` so tracing does
+not slow the timed one, the peak Python heap. Both replays start with
+empty Streamlit caches and dataset registry. Uploads are parsed in the
+foreground, so the upload step includes the parse.
+
+The report compares sizes: the growth exponent of an interaction is
+log(time ratio) / log(size ratio) between the two largest sizes, so 1 is
+linear and anything well above it is a scaling cliff. AppTest reruns the
+whole script for every interaction, also for widgets inside fragments,
+so their times are an upper bound.
+
+Usage::
+
+    python -m benchmarks.bench_dashboard --sizes 5000,50000,200000
+    python -m benchmarks.bench_dashboard --platform telegram --output dashboard.json
+    python -m benchmarks.bench_dashboard --no-memory --check --max-exponent 1.3
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import telegram_export, whatsapp_export
+
+# Repository root, where the app script lives
+ROOT = Path(__file__).resolve().parent.parent
+
+APP_SCRIPT = ROOT / 'streamlit_app.py'
+
+# Synthetic uploads by platform: file name, MIME type and generator
+PAYLOADS: Dict[str, Tuple[str, str, Callable[[int], bytes]]] = {
+    'whatsapp': ('chat.txt', 'text/plain', lambda messages: whatsapp_export(messages).encode('utf-8')),
+    'telegram': ('result.json', 'application/json', telegram_export),
+}
+
+SEARCH_LABEL = "🔍 Search Messages"
+
+# Interactions whose times are compared across sizes are skipped below this
+MIN_SCALING_SECONDS = 0.01
+
+# Messages of the unrecorded replay that loads the app's modules
+WARM_UP_MESSAGES = 500
+
+
+@dataclass
+class Step:
+    """
+    Measurement of one interaction.
+
+    Attributes:
+        messages: Messages in the upload
+        interaction: Name of the interaction
+        seconds: Wall time of the script run
+        plotly_charts: Plotly charts on the page afterwards
+        plotly_bytes: Size of their figure specs and configs
+        peak_bytes: Peak traced Python heap during the run, if measured
+        error: First exception or error message shown, if any
+    """
+    messages: int
+    interaction: str
+    seconds: float
+    plotly_charts: int
+    plotly_bytes: int
+    peak_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+def _widget(widgets, label: str):
+    """The widget with a label, failing clearly if the page does not show it."""
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r} on the page")
+
+
+def _tab(label: str) -> Callable:
+    def apply(app) -> None:
+        app.session_state['dashboard_tab'] = label
+    return apply
+
+
+def _select(label: str, value: str) -> Callable:
+    def apply(app) -> None:
+        _widget(app.selectbox, label).set_value(value)
+    return apply
+
+
+def _search(term: str) -> Callable:
+    def apply(app) -> None:
+        _widget(app.text_input, SEARCH_LABEL).input(term)
+    return apply
+
+
+# The replayed session after the upload, in order
+INTERACTIONS: List[Tuple[str, Callable]] = [
+    ("rerun overview", lambda app: None),
+    ("tab: Time Analysis", _tab("📅 Time Analysis")),
+    ("Time Grouping: Weekly", _select("Time Grouping", "Weekly")),
+    ("Time Grouping: Monthly", _select("Time Grouping", "Monthly")),
+    ("Time Grouping: Yearly", _select("Time Grouping", "Yearly")),
+    ("View By: By Participant", _select("View By", "By Participant")),
+    ("Normalize By: By Day", _select("Normalize By", "By Day")),
+    ("Normalize By: By Hour", _select("Normalize By", "By Hour")),
+    ("tab: Conversations", _tab("🔁 Conversations")),
+    ("tab: Messages", _tab("💬 Messages")),
+    ("search: 'pizza'", _search("pizza")),
+    ("search: 'see you'", _search("see you")),
+    ("search: cleared", _search("")),
+    ("tab: Word Analysis", _tab("📝 Word Analysis")),
+    ("tab: Query", _tab("🧮 Query")),
+    ("tab: Export", _tab("💾 Export")),
+    ("tab: Overview", _tab("📊 Overview")),
+]
+
+
+def _plotly_payload(app) -> Tuple[int, int]:
+    """Number of Plotly charts on the page and the bytes of their specs."""
+    charts = app.get('plotly_chart')
+    return len(charts), sum(len(chart.proto.spec) + len(chart.proto.config) for chart in charts)
+
+
+def _error(app) -> Optional[str]:
+    """First exception or error message of the last run."""
+    if len(app.exception):
+        return app.exception[0].message
+    if len(app.error):
+        return app.error[0].value
+    return None
+
+
+def _reset_app_state() -> None:
+    """Forget cached results and shared datasets of earlier replays."""
+    import streamlit as st
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def replay(upload: Tuple[str, bytes, str], messages: int, trace_memory: bool, timeout: float) -> List[Step]:
+    """
+    Upload an export and replay the interactions in a fresh app session.
+
+    Args:
+        upload: File name, content and MIME type of the upload
+        messages: Messages in the upload, for the report
+        trace_memory: Whether to record the peak heap of each step
+        timeout: Seconds a single script run may take
+
+    Returns:
+        One Step per interaction, starting with the upload
+    """
+    from streamlit.testing.v1 import AppTest
+
+    _reset_app_state()
+    app = AppTest.from_file(str(APP_SCRIPT), default_timeout=timeout)
+    app.run()
+
+    steps = [("upload", lambda app: _widget(app.file_uploader, "Choose a file").upload(*upload))]
+    steps += INTERACTIONS
+
+    results = []
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for interaction, apply in steps:
+            apply(app)
+            if trace_memory:
+                tracemalloc.reset_peak()
+            started = time.perf_counter()
+            app.run()
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+
+            charts, plotly_bytes = _plotly_payload(app)
+            results.append(Step(messages, interaction, seconds, charts, plotly_bytes, peak, _error(app)))
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return results
+
+
+def measure(platform_name: str, sizes: List[int], trace_memory: bool, timeout: float) -> List[Step]:
+    """
+    Replay the session for every size and print each size's table.
+
+    Returns:
+        Steps of all sizes, with peak memory merged in from the traced replay
+    """
+    name, mime_type, generate = PAYLOADS[platform_name]
+
+    # Modules the app imports on first use would otherwise be charged to the first size
+    replay((name, generate(WARM_UP_MESSAGES), mime_type), WARM_UP_MESSAGES, False, timeout)
+
+    steps = []
+    for messages in sizes:
+        payload = generate(messages)
+        print(f"\n{messages:,} messages, {name} {len(payload) / 1024 / 1024:.1f} MB")
+
+        upload = (name, payload, mime_type)
+        timed = replay(upload, messages, False, timeout)
+        if trace_memory:
+            for step, traced in zip(timed, replay(upload, messages, True, timeout)):
+                step.peak_bytes = traced.peak_bytes
+
+        print(f"  {'interaction':<26} {'seconds':>8} {'peak MB':>8} {'charts':>7} {'plotly KB':>10}")
+        for step in timed:
+            peak = f"{step.peak_bytes / 1024 / 1024:.0f}" if step.peak_bytes is not None else '-'
+            print(f"  {step.interaction:<26} {step.seconds:>8.2f} {peak:>8} {step.plotly_charts:>7} "
+                  f"{step.plotly_bytes / 1024:>10.0f}{'  ERROR: ' + step.error if step.error else ''}")
+        steps.extend(timed)
+    return steps
+
+
+def growth_exponents(steps: List[Step]) -> Dict[str, Optional[float]]:
+    """
+    Growth exponent of each interaction's time between the two largest sizes.
+
+    Returns:
+        Interaction → exponent, or None when too fast to compare
+    """
+    sizes = sorted({step.messages for step in steps})
+    if len(sizes) < 2:
+        return {}
+    small, large = sizes[-2], sizes[-1]
+    seconds = {(step.interaction, step.messages): step.seconds for step in steps}
+
+    exponents = {}
+    for interaction in dict.fromkeys(step.interaction for step in steps):
+        before, after = seconds.get((interaction, small)), seconds.get((interaction, large))
+        if before is None or after is None or max(before, after) < MIN_SCALING_SECONDS:
+            exponents[interaction] = None
+        else:
+            exponents[interaction] = math.log(after / before) / math.log(large / small)
+    return exponents
+
+
+def print_scaling(steps: List[Step], exponents: Dict[str, Optional[float]], max_exponent: float) -> List[str]:
+    """Print seconds per size and growth exponents; return the interactions above the limit."""
+    sizes = sorted({step.messages for step in steps})
+    seconds = {(step.interaction, step.messages): step.seconds for step in steps}
+
+    print(f"\nSeconds by size{'; exponent between the two largest sizes' if len(sizes) > 1 else ''}")
+    print(f"  {'interaction':<26}" + ''.join(f" {size:>9,}" for size in sizes) + f" {'exponent':>9}")
+    cliffs = []
+    for interaction in dict.fromkeys(step.interaction for step in steps):
+        exponent = exponents.get(interaction)
+        cells = ''.join(f" {seconds.get((interaction, size), float('nan')):>9.2f}" for size in sizes)
+        flag = ''
+        if exponent is not None and exponent > max_exponent:
+            flag = '  <- superlinear'
+            cliffs.append(interaction)
+        print(f"  {interaction:<26}{cells} {exponent if exponent is not None else float('nan'):>9.2f}{flag}")
+    return cliffs
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sizes', default='2000,20000,100000', help="Comma-separated message counts")
+    arg_parser.add_argument('--platform', choices=sorted(PAYLOADS), default='whatsapp', help="Synthetic export format")
+    arg_parser.add_argument('--no-memory', dest='memory', action='store_false', help="Skip the traced replay")
+    arg_parser.add_argument('--timeout', type=float, default=600, help="Seconds a single script run may take")
+    arg_parser.add_argument('--output', help="Write the steps and exponents as JSON to this file")
+    arg_parser.add_argument('--max-exponent', type=float, default=1.3, help="Growth exponent flagged as a cliff")
+    arg_parser.add_argument('--check', action='store_true', help="Exit with an error on cliffs or app errors")
+    args = arg_parser.parse_args()
+
+    # Foreground parsing makes the upload step cover the whole parse
+    os.environ['CHAT_ANALYTICS_BACKGROUND_PARSE_MB'] = str(1024 * 1024)
+    # AppTest logs every deprecation warning of every run, and Streamlit resets
+    # its loggers' levels from its config whenever the config is reparsed
+    logging.disable(logging.WARNING)
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    steps = measure(args.platform, sizes, args.memory, args.timeout)
+    exponents = growth_exponents(steps)
+    cliffs = print_scaling(steps, exponents, args.max_exponent)
+    errors = [step for step in steps if step.error]
+
+    if args.output:
+        import streamlit
+
+        report = {
+            'platform': args.platform,
+            'sizes': sizes,
+            'python': platform.python_version(),
+            'streamlit': streamlit.__version__,
+            'steps': [asdict(step) for step in steps],
+            'exponents': exponents,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"\nReport written to {args.output}")
+
+    for step in errors:
+        print(f"FAIL: {step.interaction} at {step.messages:,} messages: {step.error}")
+    for interaction in cliffs:
+        print(f"FAIL: {interaction} grows with exponent {exponents[interaction]:.2f} (limit {args.max_exponent})")
+    sys.exit(1 if args.check and (cliffs or errors) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure cold-start import latency of the headless entry points.
+
+Every statement runs in a fresh interpreter, so nothing is cached between
+runs; the median import time, the whole process wall time and the heavy
+third-party modules that got loaded are reported. With ``--check`` the
+run fails when a headless entry point exceeds its budget or loads a heavy
+module, which keeps CLI workers and short-lived jobs fast.
+
+Usage::
+
+    python -m benchmarks.bench_import_time --repeat 5
+    python -m benchmarks.bench_import_time --check --budget-ms 100
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Repository root, the working directory of the child interpreters
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that headless entry points must not load at import time
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'streamlit', 'plotly', 'tqdm', 'duckdb')
+
+# (label, statement, headless); headless entry points are checked against the budget
+TARGETS: List[Tuple[str, str, bool]] = [
+    ('parsers', 'import parsers', True),
+    ('parsers.registry', 'from parsers.registry import open_parser', True),
+    ('detection', 'from parsers.detection import detect_platform', True),
+    ('whatsapp', 'from parsers.whatsapp import WhatsAppParser', True),
+    ('telegram', 'from parsers.telegram import TelegramParser', True),
+    ('app.utils', 'from app.utils import create_dataframe, detect_file_type', True),
+    ('storage', 'import storage', True),
+    ('cli', 'import cli', True),
+    ('service', 'import service', True),
+    ('app.session', 'import app.session', False),
+    ('analytics', 'import analytics', False),
+]
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': len(sys.modules), 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement: str) -> Dict:
+    """Run an import statement in a fresh interpreter."""
+    code = _CHILD.format(statement=statement, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - started
+    return result
+
+
+def run(repeat: int, budget_ms: float, check: bool) -> int:
+    """Measure every target, print a table and return the exit code."""
+    baseline = statistics.median(measure('pass')['process'] for _ in range(repeat))
+    print(f"Interpreter startup: {baseline * 1000:.0f} ms")
+    print(f"{'target':<18} {'import ms':>10} {'process ms':>11} {'modules':>8}  heavy modules")
+
+    failures = []
+    for label, statement, headless in TARGETS:
+        runs = [measure(statement) for _ in range(repeat)]
+        seconds = statistics.median(r['seconds'] for r in runs)
+        process = statistics.median(r['process'] for r in runs)
+        heavy = runs[-1]['heavy']
+        print(f"{label:<18} {seconds * 1000:>10.1f} {process * 1000:>11.0f} {runs[-1]['modules']:>8}  {', '.join(heavy) or '-'}")
+
+        if headless and seconds * 1000 > budget_ms:
+            failures.append(f"{label} takes {seconds * 1000:.0f} ms (budget {budget_ms:.0f} ms)")
+        if headless and heavy:
+            failures.append(f"{label} loads {', '.join(heavy)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if check and failures else 0
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per target (median is reported)")
+    arg_parser.add_argument('--budget-ms', type=float, default=100, help="Import budget of headless entry points")
+    arg_parser.add_argument('--check', action='store_true', help="Exit with an error when a budget is exceeded")
+    args = arg_parser.parse_args()
+
+    sys.exit(run(args.repeat, args.budget_ms, args.check))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare JSON decoder backends of TelegramParser on a synthetic result.json.
+
+Usage::
+
+    python -m benchmarks.bench_json_backends --messages 200000 --repeat 3
+"""
+
+import argparse
+import io
+import statistics
+
+from benchmarks.synthetic import telegram_export
+from parsers.json_backends import available_backends
+from parsers.telegram import TelegramParser
+
+
+def run(messages: int, repeat: int) -> None:
+    """Parse the same payload with each installed backend and print timings."""
+    payload = telegram_export(messages)
+    print(f"Payload: {messages:,} messages, {len(payload) / 1024 / 1024:.1f} MB")
+    print(f"{'backend':<10} {'decode ms':>10} {'total ms':>10} {'msg/s':>12}")
+
+    for backend in available_backends():
+        decode_times = []
+        total_times = []
+        for _ in range(repeat):
+            parser = TelegramParser(io.BytesIO(payload), json_backend=backend)
+            parsed = parser.parse()
+            decode_times.append(parser.report.timings['decode'])
+            total_times.append(sum(parser.report.timings.values()))
+
+        decode = statistics.median(decode_times)
+        total = statistics.median(total_times)
+        print(f"{backend:<10} {decode * 1000:>10.0f} {total * 1000:>10.0f} {len(parsed) / total:>12,.0f}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--messages', type=int, default=200_000, help="Messages in the synthetic export")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="Runs per backend (median is reported)")
+    args = arg_parser.parse_args()
+
+    run(args.messages, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
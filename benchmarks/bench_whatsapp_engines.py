@@ -0,0 +1,81 @@
+"""
+Compare the object and vectorized engines of WhatsAppParser.
+
+Both engines parse the same synthetic export, extended with lines that
+exercise the edge cases of the header grammar (surrounding whitespace,
+whitespace-only texts, continuations, media, 12-hour and iOS headers).
+The vectorized DataFrame must equal ``create_dataframe`` applied to the
+object engine's messages, dtypes included.
+
+Usage::
+
+    python -m benchmarks.bench_whatsapp_engines --messages 200000
+    python -m benchmarks.bench_whatsapp_engines --messages 1000 --check
+"""
+
+import argparse
+import io
+import sys
+import time
+
+import pandas as pd
+
+from app.utils import create_dataframe
+from benchmarks.synthetic import whatsapp_export
+from parsers.whatsapp import WhatsAppParser
+
+EDGE_CASES = '\n'.join([
+    "01/02/23, 10:00 - Alice:    leading spaces",
+    "01/02/23, 10:01 - Bob: trailing spaces   ",
+    "01/02/23, 10:02 - Carol:    ",
+    "01/02/23, 10:03 - Carol:   ",
+    "  continued after a whitespace-only header  ",
+    "01/02/23, 10:04 - Dave : <Media omitted>",
+    "01/02/23, 10:05 - Alice: first line",
+    "   indented continuation",
+    "",
+    "after an empty line",
+    "1/2/2023, 9:05 PM - Bob:  twelve-hour clock ",
+    "\u200e[01/02/2023, 21:06:07] Carol:  IMG-0001.jpg image omitted",
+    "[01/02/2023, 21:07:00] Dave: no-break space\u00a0",
+    "01/02/23, 10:09 - Bob: \u00a0",
+    "01/02/23, 10:08 - Alice: \t",
+])
+
+
+def compare(payload: bytes) -> None:
+    """Parse the payload with both engines, print timings and raise if they differ."""
+    started = time.perf_counter()
+    expected = create_dataframe(WhatsAppParser(io.BytesIO(payload)).parse())
+    object_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = WhatsAppParser(io.BytesIO(payload)).parse(engine='vectorized')
+    vectorized_seconds = time.perf_counter() - started
+
+    print(f"{'engine':<12} {'seconds':>8} {'messages':>10}")
+    print(f"{'object':<12} {object_seconds:>8.2f} {len(expected):>10,}")
+    print(f"{'vectorized':<12} {vectorized_seconds:>8.2f} {len(actual):>10,}")
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--messages', type=int, default=200_000, help="Messages in the synthetic export")
+    arg_parser.add_argument('--check', action='store_true', help="Exit with an error if the engines differ")
+    args = arg_parser.parse_args()
+
+    payload = (whatsapp_export(args.messages) + '\n' + EDGE_CASES + '\n').encode('utf-8')
+    print(f"Payload: {args.messages:,} messages and {EDGE_CASES.count(chr(10)) + 1} edge-case lines, "
+          f"{len(payload) / 1024 / 1024:.1f} MB")
+    try:
+        compare(payload)
+    except AssertionError as e:
+        print(f"FAIL: the engines differ\n{e}")
+        sys.exit(1 if args.check else 0)
+    print("The engines agree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Drive the parse service with concurrent uploads of synthetic exports.
+
+Starts a local service (or targets a running one with --url), submits
+WhatsApp and Telegram exports from several client threads, retries on
+429, polls job status and downloads the Parquet results.
+
+Usage::
+
+    python -m benchmarks.load_test_service --jobs 40 --clients 8 --messages 20000 --workers 4 --queue 6
+"""
+
+import argparse
+import io
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import telegram_export, whatsapp_export
+
+
+def _request(method: str, url: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+    """Send a request and return the status and body, also for error statuses."""
+    request = urllib.request.Request(url, data=body, method=method)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _run_job(base_url: str, name: str, payload: bytes, expected: int, poll_interval: float) -> Dict[str, float]:
+    """Submit one export, wait for it and validate the result."""
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    rejected = 0
+    while True:
+        status, body = _request('POST', f'{base_url}/jobs?name={name}', payload)
+        if status != 429:
+            break
+        rejected += 1
+        time.sleep(poll_interval)
+    if status != 202:
+        raise RuntimeError(f"Upload failed with {status}: {body[:200]!r}")
+    accepted = time.perf_counter()
+
+    job = json.loads(body)
+    while job['state'] not in ('done', 'failed', 'cancelled'):
+        time.sleep(poll_interval)
+        job = json.loads(_request('GET', f"{base_url}/jobs/{job['id']}")[1])
+    if job['state'] != 'done':
+        raise RuntimeError(f"Job {job['id']} {job['state']}: {job['error']}")
+
+    status, result = _request('GET', f"{base_url}{job['result']}")
+    rows = pq.read_metadata(io.BytesIO(result)).num_rows
+    if rows != expected:
+        raise RuntimeError(f"Job {job['id']} returned {rows} rows, expected {expected}")
+    _request('DELETE', f"{base_url}/jobs/{job['id']}")
+
+    return {
+        'latency': time.perf_counter() - started,
+        'queue_wait': accepted - started,
+        'rejected': rejected,
+        'parse': job['summary']['timings']['total'],
+    }
+
+
+def run(base_url: str, jobs: int, clients: int, messages: int, poll_interval: float) -> None:
+    """Run the load test against a service and print a summary."""
+    payloads = [
+        ('chat.txt', whatsapp_export(messages).encode('utf-8')),
+        ('result.json', telegram_export(messages)),
+    ]
+    print(f"Payloads: {', '.join(f'{name} {len(data) / 1024 / 1024:.1f} MB' for name, data in payloads)}")
+
+    results: List[Dict[str, float]] = []
+    errors: List[str] = []
+    next_job = iter(range(jobs))
+    lock = threading.Lock()
+
+    def client() -> None:
+        while True:
+            with lock:
+                index = next(next_job, None)
+            if index is None:
+                return
+            name, payload = payloads[index % len(payloads)]
+            try:
+                outcome = _run_job(base_url, name, payload, messages, poll_interval)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                results.append(outcome)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(result['latency'] for result in results)
+    print(f"Jobs: {len(results)} ok, {len(errors)} failed in {elapsed:.1f} s "
+          f"({len(results) / elapsed:.2f} jobs/s, {len(results) * messages / elapsed:,.0f} msg/s)")
+    if latencies:
+        print(f"Latency: p50 {statistics.median(latencies):.2f} s, "
+              f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.2f} s, max {latencies[-1]:.2f} s")
+        print(f"Parse time per job: median {statistics.median(r['parse'] for r in results):.2f} s")
+        print(f"429 responses: {sum(r['rejected'] for r in results)}, "
+              f"median wait for a slot {statistics.median(r['queue_wait'] for r in results):.2f} s")
+    for error in errors[:5]:
+        print(f"Error: {error}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--url', help="Base URL of a running service (default: start one locally)")
+    arg_parser.add_argument('--jobs', type=int, default=40, help="Exports uploaded in total")
+    arg_parser.add_argument('--clients', type=int, default=8, help="Concurrent client threads")
+    arg_parser.add_argument('--messages', type=int, default=20_000, help="Messages per synthetic export")
+    arg_parser.add_argument('--workers', type=int, default=4, help="Worker processes of the local service")
+    arg_parser.add_argument('--queue', type=int, default=6, help="Queue bound of the local service")
+    arg_parser.add_argument('--poll-interval', type=float, default=0.1, help="Seconds between status polls and retries")
+    args = arg_parser.parse_args()
+
+    if args.url:
+        run(args.url.rstrip('/'), args.jobs, args.clients, args.messages, args.poll_interval)
+        return
+
+    from service import ParseService, make_server
+
+    service = ParseService(max_workers=args.workers, max_queued=args.queue)
+    server = make_server('127.0.0.1', 0, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        run(f'http://127.0.0.1:{server.server_address[1]}', args.jobs, args.clients, args.messages, args.poll_interval)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
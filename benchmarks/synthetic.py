@@ -0,0 +1,109 @@
+"""
+Synthetic chat exports for benchmarks.
+
+The generators are deterministic for a given seed so runs are comparable.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+
+SENDERS = ['Alice', 'Bob', 'Carla Rossi', 'Dan', 'Eve Martin', 'Frank', 'Grace', 'Heidi']
+
+WORDS = (
+    'hello there how are you doing today see you later tonight dinner '
+    'pizza meeting project deadline tomorrow morning great thanks ok yes '
+    'no maybe sure lol 😀 👍 https://example.com/page @bob #weekend'
+).split()
+
+START = datetime(2020, 1, 1, 8, 0)
+
+
+def _text(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 18)))
+
+
+def _timestamps(rng: random.Random, count: int) -> List[datetime]:
+    timestamps = []
+    current = START
+    for _ in range(count):
+        current += timedelta(seconds=rng.randint(0, 3600))
+        timestamps.append(current)
+    return timestamps
+
+
+def whatsapp_export(messages: int, seed: int = 0) -> str:
+    """
+    Generate an Android WhatsApp export.
+
+    Args:
+        messages: Number of messages
+        seed: Random seed
+
+    Returns:
+        Export text
+    """
+    rng = random.Random(seed)
+    lines = []
+    for index, timestamp in enumerate(_timestamps(rng, messages)):
+        text = '<Media omitted>' if index % 40 == 0 else _text(rng)
+        lines.append(f"{timestamp:%d/%m/%y}, {timestamp:%H:%M} - {rng.choice(SENDERS)}: {text}")
+        if index % 25 == 0:
+            lines.append(_text(rng))
+    return '\n'.join(lines) + '\n'
+
+
+def telegram_messages(messages: int, seed: int = 0, first_id: int = 1) -> List[Dict[str, Any]]:
+    """
+    Generate the message list of a Telegram JSON export.
+
+    Args:
+        messages: Number of messages
+        seed: Random seed
+        first_id: Id of the first message
+
+    Returns:
+        List of raw Telegram message dictionaries
+    """
+    rng = random.Random(seed)
+    raw_messages = []
+    for index, timestamp in enumerate(_timestamps(rng, messages)):
+        sender = rng.choice(SENDERS)
+        raw = {
+            'id': first_id + index,
+            'type': 'message',
+            'date': timestamp.isoformat(),
+            'date_unixtime': str(int(timestamp.timestamp())),
+            'from': sender,
+            'from_id': f'user{SENDERS.index(sender)}',
+            'text': _text(rng),
+        }
+        if index % 10 == 0:
+            raw['text'] = [{'type': 'bold', 'text': rng.choice(WORDS)}, ' ' + _text(rng)]
+        if index % 30 == 0:
+            raw['photo'] = f'photos/photo_{index}.jpg'
+            raw['text'] = ''
+        raw_messages.append(raw)
+    return raw_messages
+
+
+def telegram_export(messages: int, seed: int = 0) -> bytes:
+    """
+    Generate a single-chat Telegram ``result.json``.
+
+    Args:
+        messages: Number of messages
+        seed: Random seed
+
+    Returns:
+        Export as UTF-8 encoded JSON
+    """
+    data = {
+        'name': 'Benchmark Group',
+        'type': 'private_group',
+        'id': 1,
+        'messages': telegram_messages(messages, seed),
+    }
+    return json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8')
@@ -0,0 +1,149 @@
+"""
+Command line interface for ingesting exports into archives.
+
+Usage:
+    python cli.py ingest EXPORT ARCHIVE_DIR [--platform whatsapp] [--memory-budget 256]
+    python cli.py stats ARCHIVE_DIR [--start 2023-01-01] [--end 2023-07-01]
+    python cli.py pack EXPORT STORE_DIR [--block-size 4096] [--compression lzma]
+    python cli.py search STORE_DIR PATTERN [--sender Alice] [--start 2023-01-01]
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from parsers.progress import TqdmProgress
+from storage.blockstore import CODECS, DEFAULT_BLOCK_SIZE, BlockStore, pack
+from storage.partitioned import DEFAULT_MEMORY_BUDGET, PartitionedArchive, ingest
+
+
+def _ingest(args: argparse.Namespace) -> int:
+    """Parse an export into an archive and print what was written."""
+    stats = ingest(
+        args.source,
+        args.archive,
+        platform=args.platform,
+        memory_budget=int(args.memory_budget * 1024 * 1024),
+        progress=TqdmProgress("Ingesting") if args.progress else None
+    )
+    print(f"Ingested {stats.messages:,} messages into {args.archive}")
+    if stats.partitions:
+        print(f"  Partitions: {len(stats.partitions)} ({stats.partitions[0]} to {stats.partitions[-1]})")
+    print(f"  Part files: {stats.files} from {stats.spills} spills, {stats.bytes_written / 1024 / 1024:.1f} MB")
+    print(f"  Peak buffered: {stats.peak_buffered_bytes / 1024 / 1024:.1f} MB")
+    return 0
+
+
+def _stats(args: argparse.Namespace) -> int:
+    """Print statistics of an archive, reading only the selected partitions."""
+    archive = PartitionedArchive(args.archive)
+    summary = archive.summary()
+    print(f"Archive {args.archive}: {summary['messages'].sum():,} messages in {len(summary)} partitions")
+
+    if args.start is None and args.end is None:
+        print(summary.to_string(index=False))
+
+    senders = archive.to_dataframe(args.start, args.end, columns=['sender'])['sender']
+    if senders.empty:
+        print("No messages in the selected range.")
+        return 0
+
+    print(f"\nSelected range: {len(senders):,} messages from {len(archive.files(args.start, args.end))} files")
+    print(f"Unique participants: {senders.nunique()}")
+    print(f"\nTop {args.top} participants:")
+    for sender, count in senders.value_counts().head(args.top).items():
+        print(f"  {sender}: {count:,} ({count / len(senders) * 100:.1f}%)")
+    return 0
+
+
+def _pack(args: argparse.Namespace) -> int:
+    """Parse an export into a block store and print its sizes."""
+    stats = pack(args.source, args.store, args.platform, args.block_size, args.compression)
+    print(f"Packed {stats.messages:,} messages into {args.store} ({stats.blocks} text blocks)")
+    print(f"  Text: {stats.text_bytes / 1024 / 1024:.1f} MB -> {stats.compressed_bytes / 1024 / 1024:.1f} MB "
+          f"({stats.compression_ratio:.1f}x)")
+    print(f"  Columns: {stats.column_bytes / 1024 / 1024:.1f} MB")
+    return 0
+
+
+def _search(args: argparse.Namespace) -> int:
+    """Print the messages of a block store matching a pattern."""
+    store = BlockStore(args.store)
+    matches = store.search(
+        args.pattern, args.start, args.end, sender=args.sender,
+        regex=args.regex, case=not args.ignore_case, limit=args.limit
+    )
+    for message in matches.itertuples(index=False):
+        print(f"{message.datetime:%Y-%m-%d %H:%M} {message.sender}: {message.text}")
+    print(f"{len(matches):,} matches, {store.blocks_read} of {len(store.blocks)} blocks decompressed", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(description="Chat export archives")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log debug messages")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help="Parse an export into a month-partitioned archive")
+    ingest_parser.add_argument('source', help="Chat export (.txt, .zip, .json, .html)")
+    ingest_parser.add_argument('archive', help="Archive directory")
+    ingest_parser.add_argument('--platform', help="Platform key; detected when omitted")
+    ingest_parser.add_argument(
+        '--memory-budget', type=float, default=DEFAULT_MEMORY_BUDGET / 1024 / 1024,
+        help="Buffered megabytes before spilling to disk (default: %(default).0f)"
+    )
+    ingest_parser.add_argument(
+        '--no-progress', dest='progress', action='store_false',
+        help="Hide the progress bar (shown by default on a terminal)"
+    )
+    ingest_parser.set_defaults(handler=_ingest, progress=sys.stderr.isatty())
+
+    stats_parser = commands.add_parser('stats', help="Show statistics of an archive")
+    stats_parser.add_argument('archive', help="Archive directory")
+    stats_parser.add_argument('--start', help="First included date (e.g. 2023-01-01)")
+    stats_parser.add_argument('--end', help="First excluded date (e.g. 2023-07-01)")
+    stats_parser.add_argument('--top', type=int, default=5, help="Participants listed (default: %(default)s)")
+    stats_parser.set_defaults(handler=_stats)
+
+    pack_parser = commands.add_parser('pack', help="Parse an export into a block-compressed store")
+    pack_parser.add_argument('source', help="Chat export (.txt, .zip, .json, .html)")
+    pack_parser.add_argument('store', help="Store directory")
+    pack_parser.add_argument('--platform', help="Platform key; detected when omitted")
+    pack_parser.add_argument(
+        '--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+        help="Messages per compressed text block (default: %(default)s)"
+    )
+    pack_parser.add_argument(
+        '--compression', choices=sorted(CODECS), default='zlib', help="Text codec (default: %(default)s)"
+    )
+    pack_parser.set_defaults(handler=_pack)
+
+    search_parser = commands.add_parser('search', help="Search the messages of a block store")
+    search_parser.add_argument('store', help="Store directory")
+    search_parser.add_argument('pattern', help="Text to find")
+    search_parser.add_argument('--sender', help="Only messages of this participant")
+    search_parser.add_argument('--start', help="First included date (e.g. 2023-01-01)")
+    search_parser.add_argument('--end', help="First excluded date (e.g. 2023-07-01)")
+    search_parser.add_argument('--regex', action='store_true', help="Treat the pattern as a regular expression")
+    search_parser.add_argument('-i', '--ignore-case', action='store_true', help="Match case-insensitively")
+    search_parser.add_argument('--limit', type=int, default=50, help="Matches printed at most (default: %(default)s)")
+    search_parser.set_defaults(handler=_search)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    try:
+        return args.handler(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
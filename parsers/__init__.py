@@ -1,10 +1,38 @@
 """
 Chat message parsers for different messaging platforms.
+
+Parser classes and helpers are imported on first access, so importing the
+package (or one parser module) does not load every parser.
 """
 
-from .base import BaseParser
-from .whatsapp import WhatsAppParser
-from .telegram import TelegramParser
-from .instagram import InstagramParser
+import importlib
+from typing import Any, Dict, List
+
+# Public names and the submodules defining them
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    'BaseParser': '.base',
+    'Aggregator': '.aggregators',
+    'ChatSummary': '.aggregators',
+    'WhatsAppParser': '.whatsapp',
+    'TelegramParser': '.telegram',
+    'TelegramHTMLParser': '.telegram_html',
+    'InstagramParser': '.instagram',
+    'detect_platform': '.detection',
+    'get_parser_class': '.registry',
+    'open_parser': '.registry',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['BaseParser', 'WhatsAppParser', 'TelegramParser', 'InstagramParser']
\ No newline at end of file
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
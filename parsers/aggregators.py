@@ -0,0 +1,239 @@
+"""
+Accumulators updated while a parser emits messages.
+
+Aggregators registered with ``BaseParser.add_aggregator`` see every valid
+message as it is emitted, so summary statistics are complete the moment
+parsing ends and nothing has to scan the parsed data again. Parsers that
+build a DataFrame in bulk update them once with the whole frame instead.
+
+Every aggregator can be merged with another one of the same kind:
+parsers fanning work out to processes (e.g. full-account Telegram
+exports) give each worker an empty copy from ``spawn`` and merge the
+results in export order.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from models.message import Message
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Aggregator(ABC):
+    """
+    Summary of a stream of messages.
+
+    Subclasses implement ``update`` and ``merge``; ``update_frame`` should
+    be overridden with a column-wise version when the default row loop is
+    too slow.
+    """
+
+    @abstractmethod
+    def update(self, message: Message) -> None:
+        """Add one valid message."""
+
+    @abstractmethod
+    def merge(self, other: 'Aggregator') -> 'Aggregator':
+        """Combine with an aggregator of the same kind, in place."""
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        """
+        Add every message of a parsed DataFrame.
+
+        Args:
+            df: DataFrame with datetime, sender, text and media_type columns
+        """
+        for row in df[['datetime', 'sender', 'text', 'media_type']].itertuples(index=False):
+            self.update(Message(row.datetime.to_pydatetime(), row.sender, row.text, row.media_type))
+
+    def spawn(self) -> 'Aggregator':
+        """Empty aggregator of the same configuration, e.g. for a worker process."""
+        return type(self)()
+
+
+class SenderCounts(Aggregator):
+    """Messages per sender, in order of first appearance."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def messages(self) -> int:
+        """Number of messages counted."""
+        return sum(self.counts.values())
+
+    @property
+    def participants(self) -> int:
+        """Number of distinct senders."""
+        return len(self.counts)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Senders by decreasing message count; ties keep their first appearance.
+
+        Args:
+            n: Number of senders returned (all by default)
+
+        Returns:
+            List of (sender, count) pairs
+        """
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def update(self, message: Message) -> None:
+        counts = self.counts
+        counts[message.sender] = counts.get(message.sender, 0) + 1
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        counts = self.counts
+        for sender, count in df['sender'].value_counts(sort=False).items():
+            counts[sender] = counts.get(sender, 0) + int(count)
+
+    def merge(self, other: 'SenderCounts') -> 'SenderCounts':
+        counts = self.counts
+        for sender, count in other.counts.items():
+            counts[sender] = counts.get(sender, 0) + count
+        return self
+
+
+class HourHistogram(Aggregator):
+    """Messages per hour of the day (0-23), in the timestamps' own time zone."""
+
+    def __init__(self):
+        self.counts: List[int] = [0] * 24
+
+    def update(self, message: Message) -> None:
+        self.counts[message.datetime.hour] += 1
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        for hour, count in df['datetime'].dt.hour.value_counts().items():
+            self.counts[int(hour)] += int(count)
+
+    def merge(self, other: 'HourHistogram') -> 'HourHistogram':
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        return self
+
+
+class TimeRange(Aggregator):
+    """Earliest and latest timestamp."""
+
+    def __init__(self):
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    @property
+    def duration(self) -> Optional[timedelta]:
+        """Time between the first and the last message, or None if empty."""
+        if self.first is None:
+            return None
+        if self.first.tzinfo is not None:
+            # Elapsed time, also across daylight saving changes
+            return self.last.astimezone(timezone.utc) - self.first.astimezone(timezone.utc)
+        return self.last - self.first
+
+    def update(self, message: Message) -> None:
+        timestamp = message.datetime
+        if self.first is None:
+            self.first = self.last = timestamp
+        elif timestamp < self.first:
+            self.first = timestamp
+        elif timestamp > self.last:
+            self.last = timestamp
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        timestamps = df['datetime'].dropna()
+        if not timestamps.empty:
+            self._extend(timestamps.min().to_pydatetime(), timestamps.max().to_pydatetime())
+
+    def merge(self, other: 'TimeRange') -> 'TimeRange':
+        if other.first is not None:
+            self._extend(other.first, other.last)
+        return self
+
+    def _extend(self, first: datetime, last: datetime) -> None:
+        """Widen the range to include another range."""
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+
+class TextLength(Aggregator):
+    """Characters of message text, for the average message length."""
+
+    def __init__(self):
+        self.messages = 0
+        self.characters = 0
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Average characters per message with text, or None if there is none."""
+        return self.characters / self.messages if self.messages else None
+
+    def update(self, message: Message) -> None:
+        if message.text is not None:
+            self.messages += 1
+            self.characters += len(message.text)
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        lengths = df['text'].str.len().dropna()
+        self.messages += len(lengths)
+        self.characters += int(lengths.sum())
+
+    def merge(self, other: 'TextLength') -> 'TextLength':
+        self.messages += other.messages
+        self.characters += other.characters
+        return self
+
+
+class ChatSummary(Aggregator):
+    """
+    The statistics of the dashboard overview, as one aggregator.
+
+    Attributes:
+        senders: Messages per sender
+        hours: Messages per hour of the day
+        time_range: First and last timestamp
+        lengths: Text length totals
+    """
+
+    def __init__(self):
+        self.senders = SenderCounts()
+        self.hours = HourHistogram()
+        self.time_range = TimeRange()
+        self.lengths = TextLength()
+        self._parts = (self.senders, self.hours, self.time_range, self.lengths)
+
+    @property
+    def messages(self) -> int:
+        """Number of messages summarized."""
+        return self.senders.messages
+
+    def update(self, message: Message) -> None:
+        # The parts' updates inlined: this runs once per parsed message
+        counts = self.senders.counts
+        counts[message.sender] = counts.get(message.sender, 0) + 1
+
+        timestamp = message.datetime
+        self.hours.counts[timestamp.hour] += 1
+        time_range = self.time_range
+        if time_range.first is None:
+            time_range.first = time_range.last = timestamp
+        elif timestamp < time_range.first:
+            time_range.first = timestamp
+        elif timestamp > time_range.last:
+            time_range.last = timestamp
+
+        if message.text is not None:
+            self.lengths.messages += 1
+            self.lengths.characters += len(message.text)
+
+    def update_frame(self, df: 'pd.DataFrame') -> None:
+        for part in self._parts:
+            part.update_frame(df)
+
+    def merge(self, other: 'ChatSummary') -> 'ChatSummary':
+        for part, other_part in zip(self._parts, other._parts):
+            part.merge(other_part)
+        return self
@@ -0,0 +1,175 @@
+"""
+Support for chat exports packaged as zip archives.
+
+WhatsApp's "Export chat" with media produces a zip holding the chat text
+plus every attachment. ``ZipExport`` streams the chat member straight out
+of the archive and describes the media from the zip directory alone, so
+neither the archive nor the attachments are ever extracted or read.
+"""
+
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import IO, Iterable, List, Optional, Union
+
+
+# Local file header signature that starts every zip archive
+ZIP_MAGIC = b'PK\x03\x04'
+
+MEDIA_EXTENSIONS = {
+    'image': ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic'),
+    'video': ('.mp4', '.avi', '.mov', '.webm', '.3gp', '.mkv'),
+    'audio': ('.mp3', '.ogg', '.opus', '.wav', '.m4a', '.aac'),
+    'document': ('.pdf', '.doc', '.docx', '.txt'),
+}
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    """
+    A media attachment listed in an export archive.
+
+    Attributes:
+        filename: Path of the file inside the archive
+        size: Uncompressed size in bytes
+        compressed_size: Size of the file inside the archive in bytes
+        media_type: Media type derived from the file extension
+    """
+    filename: str
+    size: int
+    compressed_size: int
+    media_type: str
+
+
+def is_zip(prefix: bytes) -> bool:
+    """Check whether leading bytes belong to a zip archive."""
+    return prefix[:4] == ZIP_MAGIC
+
+
+def read_member_names(file_obj: IO[bytes]) -> List[str]:
+    """
+    List the members of a zip archive by reading only its directory.
+
+    Args:
+        file_obj: Seekable binary file object holding the archive
+
+    Returns:
+        Member names in archive order
+    """
+    position = file_obj.tell()
+    try:
+        with ZipExport(file_obj) as archive:
+            return archive.names()
+    finally:
+        file_obj.seek(position)
+
+
+def media_type_from_filename(filename: str) -> str:
+    """
+    Determine media type from filename extension.
+
+    Args:
+        filename: File name
+
+    Returns:
+        Media type based on extension
+    """
+    filename_lower = filename.lower()
+
+    for media_type, extensions in MEDIA_EXTENSIONS.items():
+        if filename_lower.endswith(extensions):
+            return media_type
+
+    return 'file'
+
+
+class ZipExport:
+    """
+    Read-only view of a chat export zip archive.
+
+    Only the zip central directory is read up front; member contents are
+    decompressed on demand as they are streamed.
+    """
+
+    def __init__(self, source: Union[str, Path, IO[bytes]]):
+        """
+        Open the archive.
+
+        Args:
+            source: Path to the archive or a seekable binary file object
+        """
+        self.zip_file = zipfile.ZipFile(source)
+
+    def __enter__(self) -> 'ZipExport':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the archive (a caller-supplied file object stays open)."""
+        self.zip_file.close()
+
+    def names(self) -> List[str]:
+        """List the names of all members in the archive."""
+        return self.zip_file.namelist()
+
+    def find_member(
+        self,
+        names: Iterable[str] = (),
+        suffixes: Iterable[str] = ()
+    ) -> Optional[zipfile.ZipInfo]:
+        """
+        Find the member holding the chat itself.
+
+        Members whose base name is listed in ``names`` win over members
+        that merely end with one of ``suffixes``.
+
+        Args:
+            names: Preferred member base names (e.g. '_chat.txt')
+            suffixes: Acceptable member suffixes (e.g. '.txt')
+
+        Returns:
+            ZipInfo of the chat member or None
+        """
+        names = tuple(names)
+        suffixes = tuple(suffixes)
+        fallback = None
+
+        for info in self.zip_file.infolist():
+            if info.is_dir():
+                continue
+            base_name = PurePosixPath(info.filename).name
+            if base_name in names:
+                return info
+            if fallback is None and suffixes and base_name.lower().endswith(suffixes):
+                fallback = info
+
+        return fallback
+
+    def open(self, member: zipfile.ZipInfo) -> IO[bytes]:
+        """Open a member as a stream that decompresses while it is read."""
+        return self.zip_file.open(member)
+
+    def media_manifest(self, exclude: Optional[zipfile.ZipInfo] = None) -> List[MediaFile]:
+        """
+        Describe the media files of the archive from its directory.
+
+        Args:
+            exclude: Member to leave out (usually the chat member)
+
+        Returns:
+            List of MediaFile entries
+        """
+        manifest = []
+        for info in self.zip_file.infolist():
+            if info.is_dir() or (exclude is not None and info.filename == exclude.filename):
+                continue
+            manifest.append(MediaFile(
+                filename=info.filename,
+                size=info.file_size,
+                compressed_size=info.compress_size,
+                media_type=media_type_from_filename(info.filename)
+            ))
+
+        return manifest
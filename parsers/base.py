@@ -3,15 +3,45 @@ Base parser class for all chat parsers.
 """
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Union, IO
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union, IO, TYPE_CHECKING
+import io
 import logging
+import time
 
 from models.message import Message
+from .aggregators import Aggregator
+from .archive import MediaFile, ZipExport, is_zip
+from .encoding import iter_lines, normalize_marks
+from .progress import DEFAULT_INTERVAL, CountingReader, ObserverLike, ProgressTracker, TqdmProgress, as_observer
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+
+@dataclass
+class ParseReport:
+    """
+    Summary of a parse run.
+    
+    Attributes:
+        parser: Name of the parser class
+        messages: Number of messages produced
+        timings: Wall time in seconds per parse stage
+        details: Parser-specific facts (e.g. the JSON backend used)
+    """
+    parser: str
+    messages: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    details: Dict[str, Any] = field(default_factory=dict)
+
 
 class BaseParser(ABC):
     """
@@ -19,8 +49,25 @@ class BaseParser(ABC):
     
     All platform-specific parsers should inherit from this class
     and implement the parse method.
+    
+    Zip archives are accepted transparently: the chat member is located by
+    ``ARCHIVE_MEMBER_NAMES`` / ``ARCHIVE_MEMBER_SUFFIXES`` and streamed out
+    of the archive, and ``media_manifest`` lists the other members.
+    
+    Progress is reported to an observer attached with ``set_progress``;
+    ``verbose=True`` shows a console bar when no observer is attached.
+    
+    Aggregators attached with ``add_aggregator`` are updated with every
+    valid message as it is emitted, or with the whole DataFrame by the
+    bulk parse paths.
     """
     
+    # Preferred base names of the chat member inside a zip export
+    ARCHIVE_MEMBER_NAMES: Tuple[str, ...] = ()
+    
+    # Fallback suffixes for the chat member inside a zip export
+    ARCHIVE_MEMBER_SUFFIXES: Tuple[str, ...] = ()
+    
     def __init__(self, file_path: Union[str, Path, IO]):
         """
         Initialize the parser with a file path or file object.
@@ -28,6 +75,13 @@ class BaseParser(ABC):
         Args:
             file_path: Path to the chat file or file-like object
         """
+        self.media_manifest: List[MediaFile] = []
+        self.report = ParseReport(parser=type(self).__name__)
+        self.progress_observer = None
+        self.progress_interval = DEFAULT_INTERVAL
+        self.aggregators: List[Aggregator] = []
+        self._tracker: Optional[ProgressTracker] = None
+        
         if hasattr(file_path, 'read'):
             # It's a file-like object (e.g., from Streamlit)
             self.file_obj = file_path
@@ -53,21 +107,182 @@ class BaseParser(ABC):
         """
         pass
     
-    def _get_file_content(self) -> str:
+    def iter_messages(self, verbose: bool = False) -> Iterator[Message]:
+        """
+        Iterate over parsed messages in file order.
+        
+        Parsers that can emit messages while reading should override this;
+        the default simply walks the result of ``parse``.
+        
+        Args:
+            verbose: Whether to show progress during parsing
+            
+        Returns:
+            Iterator over valid Message objects
+        """
+        yield from self.parse(verbose=verbose)
+    
+    def set_progress(self, observer: Optional[ObserverLike], interval: float = DEFAULT_INTERVAL) -> 'BaseParser':
+        """
+        Report progress of later parse runs to an observer.
+        
+        Args:
+            observer: ProgressObserver, or a function called with each
+                Progress snapshot; None detaches the current observer
+            interval: Minimum seconds between two updates
+        
+        Returns:
+            The parser itself
+        """
+        self.progress_observer = as_observer(observer) if observer is not None else None
+        self.progress_interval = interval
+        return self
+    
+    def add_aggregator(self, aggregator: Aggregator) -> 'BaseParser':
+        """
+        Update an aggregator with the messages of later parse runs.
+        
+        Args:
+            aggregator: Aggregator (e.g. ChatSummary) receiving each valid
+                message as it is emitted
+        
+        Returns:
+            The parser itself
+        """
+        self.aggregators.append(aggregator)
+        return self
+    
+    def _aggregate_frame(self, df: 'pd.DataFrame') -> None:
+        """Update the aggregators with a DataFrame built in bulk."""
+        if self.aggregators:
+            with self._timed('aggregate'):
+                for aggregator in self.aggregators:
+                    aggregator.update_frame(df)
+    
+    @contextmanager
+    def _tracking(self, verbose: bool = False, desc: str = "Parsing messages") -> Iterator[Optional[ProgressTracker]]:
+        """
+        Track progress for the duration of a parse run.
+        
+        Nested runs (e.g. ``parse`` consuming ``iter_messages``) share the
+        outer tracker. Without an observer nothing is tracked.
+        """
+        if self._tracker is not None:
+            yield self._tracker
+            return
+        
+        observer = self.progress_observer or (TqdmProgress(desc) if verbose else None)
+        if observer is None:
+            yield None
+            return
+        
+        self._tracker = ProgressTracker(observer, self.progress_interval)
+        try:
+            yield self._tracker
+        finally:
+            self._tracker.close()
+            self._tracker = None
+    
+    def _track(self, items: Iterable[T], total: Optional[int] = None) -> Iterable[T]:
+        """
+        Count emitted messages while tracking; returns the items untouched otherwise.
+        
+        Args:
+            items: Messages, or raw records with one message each
+            total: Number of items, if known in advance
+        """
+        if self._tracker is None:
+            return items
+        self._tracker.set_totals(total_messages=total)
+        return self._tracker.track(items)
+    
+    def _finish_progress(self, messages: int) -> None:
+        """Report the final message count of a run that built its result in bulk."""
+        if self._tracker is not None:
+            self._tracker.close(messages)
+    
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """Record the wall time of a parse stage in the report."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.report.timings[stage] = self.report.timings.get(stage, 0.0) + time.perf_counter() - start
+    
+    def _get_file_content(self) -> Union[str, bytes]:
         """Get file content from either file path or file object."""
+        with self._open_binary() as stream:
+            # BytesIO-backed uploads hand out their buffer without copying
+            if stream is self.file_obj and hasattr(stream, 'getvalue'):
+                content = stream.getvalue()
+            else:
+                content = stream.read()
+        
+        if self._tracker is not None:
+            self._tracker.add_bytes(len(content))
+        return content
+    
+    @contextmanager
+    def _open_source(self) -> Iterator[IO]:
+        """Open the raw source as a stream positioned at its first byte."""
         if self.file_obj:
             # Reset file pointer to beginning
             self.file_obj.seek(0)
-            return self.file_obj.read()
+            yield self.file_obj
         else:
-            return self.file_path.read_text(encoding='utf-8')
+            with self.file_path.open('rb') as stream:
+                yield stream
+    
+    @contextmanager
+    def _open_binary(self) -> Iterator[IO]:
+        """
+        Open the chat content as a stream positioned at its first byte.
+        
+        For zip archives this is the chat member, decompressed on the fly,
+        and ``media_manifest`` is filled from the archive directory.
+        """
+        with self._open_source() as source:
+            if isinstance(source, io.TextIOBase) or not is_zip(source.read(4)):
+                source.seek(0)
+                if self._tracker is not None and not isinstance(source, io.TextIOBase):
+                    self._tracker.set_totals(total_bytes=_remaining_size(source))
+                yield source
+                return
+            
+            with ZipExport(source) as archive:
+                member = archive.find_member(self.ARCHIVE_MEMBER_NAMES, self.ARCHIVE_MEMBER_SUFFIXES)
+                if member is None:
+                    raise ValueError("No chat file found in the zip archive")
+                
+                self.media_manifest = archive.media_manifest(exclude=member)
+                if self._tracker is not None:
+                    self._tracker.set_totals(total_bytes=member.file_size)
+                with archive.open(member) as stream:
+                    yield stream
+    
+    def _iter_file_lines(self) -> Iterator[str]:
+        """
+        Lazily yield file lines without reading the whole file into memory.
+        
+        The source is decoded chunk by chunk in its sniffed encoding (UTF-8,
+        with or without a byte order mark, or UTF-16), and invisible
+        directional marks are removed while decoding, so no intermediate
+        copy of the content is made.
+        """
+        with self._open_binary() as stream:
+            if isinstance(stream, io.TextIOBase):
+                for line in stream:
+                    yield normalize_marks(line.rstrip('\r\n'))
+                return
+            
+            if self._tracker is not None:
+                stream = CountingReader(stream, self._tracker)
+            yield from iter_lines(stream)
     
     def _get_file_lines(self) -> List[str]:
         """Get file lines from either file path or file object."""
-        content = self._get_file_content()
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        return content.splitlines()
+        return list(self._iter_file_lines())
     
     def validate_messages(self, messages: List[Message]) -> List[Message]:
         """
@@ -79,14 +294,18 @@ class BaseParser(ABC):
         Returns:
             List of valid messages
         """
-        valid_messages = []
+        return list(self._iter_valid_messages(messages))
+    
+    def _iter_valid_messages(self, messages: Iterable[Message]) -> Iterator[Message]:
+        """Lazily filter out invalid messages, logging each one dropped; aggregators see the rest."""
+        aggregators = self.aggregators
         for msg in messages:
             if self._is_valid_message(msg):
-                valid_messages.append(msg)
+                for aggregator in aggregators:
+                    aggregator.update(msg)
+                yield msg
             else:
                 logger.warning(f"Invalid message filtered out: {msg}")
-        
-        return valid_messages
     
     def _is_valid_message(self, message: Message) -> bool:
         """
@@ -103,4 +322,12 @@ class BaseParser(ABC):
             message.datetime is not None and
             message.sender and
             (message.text or message.media_type)
-        )
\ No newline at end of file
+        )
+
+
+def _remaining_size(stream: IO[bytes]) -> int:
+    """Bytes between the current position and the end of a seekable stream."""
+    position = stream.tell()
+    end = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return end - position
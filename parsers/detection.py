@@ -0,0 +1,264 @@
+"""
+Platform detection for chat exports.
+
+Detection is driven by a registry of sniffers. Each sniffer only ever sees
+the first ``SNIFF_BYTES`` bytes of an upload, so identifying the platform
+never requires reading or decoding the whole file.
+"""
+
+import re
+import struct
+from dataclasses import dataclass
+from pathlib import PurePath, PurePosixPath
+from typing import Callable, IO, List, Optional, Sequence, Tuple
+
+from .archive import is_zip
+from .encoding import decode_prefix
+
+
+# Number of leading bytes handed to the sniffers
+SNIFF_BYTES = 4096
+
+# Extension-based fallbacks used when no content signature matches
+EXTENSION_FALLBACKS = {
+    '.json': 'telegram',
+    '.html': 'telegram_html',
+    '.zip': 'whatsapp',
+}
+
+
+@dataclass(frozen=True)
+class Sniffer:
+    """
+    A registered format signature.
+
+    Attributes:
+        name: Name of the export format (e.g. 'whatsapp_ios')
+        platform: Platform key used to pick a parser
+        extensions: File extensions this format usually comes with
+        match: Predicate over the decoded file prefix
+    """
+    name: str
+    platform: str
+    extensions: Tuple[str, ...]
+    match: Callable[[str], bool]
+
+
+_SNIFFERS: List[Sniffer] = []
+
+
+_ARCHIVE_SNIFFERS: List[Tuple[str, Callable[[Sequence[str]], bool]]] = []
+
+
+def register_sniffer(name: str, platform: str, extensions: Tuple[str, ...] = ()):
+    """
+    Register a sniffer function for an export format.
+
+    The decorated function receives the decoded file prefix and returns
+    True if the prefix carries the format's signature.
+
+    Args:
+        name: Name of the export format
+        platform: Platform key used to pick a parser
+        extensions: File extensions checked first for this format
+    """
+    def decorator(func: Callable[[str], bool]) -> Callable[[str], bool]:
+        _SNIFFERS.append(Sniffer(name, platform, tuple(extensions), func))
+        return func
+    return decorator
+
+
+def register_archive_sniffer(platform: str):
+    """
+    Register a sniffer function for zip-packaged exports.
+
+    The decorated function receives the member names of the archive and
+    returns True if they match the platform's export layout.
+
+    Args:
+        platform: Platform key used to pick a parser
+    """
+    def decorator(func: Callable[[Sequence[str]], bool]) -> Callable[[Sequence[str]], bool]:
+        _ARCHIVE_SNIFFERS.append((platform, func))
+        return func
+    return decorator
+
+
+def read_prefix(file_obj: IO[bytes], limit: int = SNIFF_BYTES) -> bytes:
+    """
+    Read at most ``limit`` leading bytes without moving the file pointer.
+
+    Args:
+        file_obj: Seekable binary file object
+        limit: Maximum number of bytes to read
+
+    Returns:
+        The leading bytes of the file
+    """
+    position = file_obj.tell()
+    try:
+        file_obj.seek(0)
+        return file_obj.read(limit)
+    finally:
+        file_obj.seek(position)
+
+
+def _decode_prefix(prefix: bytes) -> str:
+    """Decode a byte prefix in its sniffed encoding, tolerating a character cut at the end."""
+    return decode_prefix(prefix[:SNIFF_BYTES])
+
+
+def sniff_format(file_name: str, prefix: bytes) -> Optional[Sniffer]:
+    """
+    Find the sniffer whose signature matches the file prefix.
+
+    Sniffers registered for the file's extension are tried first.
+
+    Args:
+        file_name: Name of the file
+        prefix: Leading bytes of the file
+
+    Returns:
+        Matching sniffer or None
+    """
+    text = _decode_prefix(prefix)
+    extension = PurePath(file_name).suffix.lower()
+
+    ordered = sorted(_SNIFFERS, key=lambda sniffer: extension not in sniffer.extensions)
+    for sniffer in ordered:
+        if sniffer.match(text):
+            return sniffer
+
+    return None
+
+
+def _first_member_name(prefix: bytes) -> Optional[str]:
+    """Read the name of the first archive member from its local file header."""
+    if len(prefix) < 30:
+        return None
+    name_length = struct.unpack('<H', prefix[26:28])[0]
+    return prefix[30:30 + name_length].decode('utf-8', errors='replace')
+
+
+def detect_platform(
+    file_name: str,
+    prefix: bytes,
+    member_names: Optional[Sequence[str]] = None
+) -> Optional[str]:
+    """
+    Detect the chat platform of an export from its name and leading bytes.
+
+    Args:
+        file_name: Name of the file
+        prefix: Leading bytes of the file (only ``SNIFF_BYTES`` are inspected)
+        member_names: Member names if the file is a zip archive; without
+            them only the first member, visible in the prefix, is considered
+
+    Returns:
+        Platform key or None if the format is not recognised
+    """
+    if is_zip(prefix):
+        if member_names is None:
+            first_member = _first_member_name(prefix)
+            member_names = [first_member] if first_member else []
+        platform = detect_archive_platform(member_names)
+        if platform:
+            return platform
+    else:
+        sniffer = sniff_format(file_name, prefix)
+        if sniffer:
+            return sniffer.platform
+
+    return EXTENSION_FALLBACKS.get(PurePath(file_name).suffix.lower())
+
+
+def detect_archive_platform(member_names: Sequence[str]) -> Optional[str]:
+    """
+    Detect the chat platform of a zip archive or folder from its file names.
+
+    Args:
+        member_names: Paths of the files, '/'-separated
+
+    Returns:
+        Platform key or None if no layout matches
+    """
+    for platform, match in _ARCHIVE_SNIFFERS:
+        if match(member_names):
+            return platform
+    return None
+
+
+# Android: "15/01/23, 10:30 - Alice: Hello"
+_WHATSAPP_ANDROID = re.compile(
+    r'^\u200e?\d{1,2}/\d{1,2}/\d{2,4},? \d{1,2}:\d{2}(?:\s*[AaPp]\.?[Mm]\.?)? - ',
+    re.MULTILINE
+)
+
+# iOS: "[15/01/23, 10:30:45] Alice: Hello"
+_WHATSAPP_IOS = re.compile(
+    r'^\u200e?\[\d{1,2}/\d{1,2}/\d{2,4},? \d{1,2}:\d{2}(?::\d{2})?(?:\s*[AaPp]\.?[Mm]\.?)?\] ',
+    re.MULTILINE
+)
+
+_TELEGRAM_CHAT_TYPE = re.compile(
+    r'"type"\s*:\s*"(?:personal_chat|bot_chat|saved_messages|private_group|'
+    r'private_supergroup|public_supergroup|private_channel|public_channel)"'
+)
+
+_TELEGRAM_ACCOUNT = re.compile(r'"(?:personal_information|chats)"\s*:\s*\{')
+
+_INSTAGRAM_JSON = re.compile(r'^\s*\{\s*"participants"\s*:\s*\[')
+
+_INSTAGRAM_PAGE = re.compile(r'(?:^|/)messages/inbox/[^/]+/message_\d+\.json$')
+
+_TELEGRAM_HTML_PAGE = re.compile(r'(?:^|/)messages\.html$')
+
+
+@register_sniffer('whatsapp_android', 'whatsapp', ('.txt',))
+def _sniff_whatsapp_android(text: str) -> bool:
+    return bool(_WHATSAPP_ANDROID.search(text))
+
+
+@register_sniffer('whatsapp_ios', 'whatsapp', ('.txt',))
+def _sniff_whatsapp_ios(text: str) -> bool:
+    return bool(_WHATSAPP_IOS.search(text))
+
+
+@register_sniffer('telegram_json', 'telegram', ('.json',))
+def _sniff_telegram_json(text: str) -> bool:
+    if not text.lstrip().startswith('{'):
+        return False
+    return bool(_TELEGRAM_CHAT_TYPE.search(text) or _TELEGRAM_ACCOUNT.search(text))
+
+
+@register_sniffer('telegram_html', 'telegram_html', ('.html',))
+def _sniff_telegram_html(text: str) -> bool:
+    return '<title>Exported Data</title>' in text or 'class="page_wrap"' in text
+
+
+@register_sniffer('instagram_json', 'instagram', ('.json',))
+def _sniff_instagram_json(text: str) -> bool:
+    return bool(_INSTAGRAM_JSON.match(text))
+
+
+@register_archive_sniffer('whatsapp')
+def _sniff_whatsapp_zip(names: Sequence[str]) -> bool:
+    return any(
+        base == '_chat.txt' or (base.startswith('WhatsApp Chat') and base.endswith('.txt'))
+        for base in (PurePosixPath(name).name for name in names)
+    )
+
+
+@register_archive_sniffer('telegram')
+def _sniff_telegram_zip(names: Sequence[str]) -> bool:
+    return any(PurePosixPath(name).name == 'result.json' for name in names)
+
+
+@register_archive_sniffer('instagram')
+def _sniff_instagram_zip(names: Sequence[str]) -> bool:
+    return any(_INSTAGRAM_PAGE.search(name) for name in names)
+
+
+@register_archive_sniffer('telegram_html')
+def _sniff_telegram_html_zip(names: Sequence[str]) -> bool:
+    return any(_TELEGRAM_HTML_PAGE.search(name) for name in names)
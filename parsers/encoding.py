@@ -0,0 +1,206 @@
+"""
+Encoding detection and incremental decoding of chat exports.
+
+Real-world exports are not always plain UTF-8: iOS WhatsApp exports start
+with a byte order mark and put left-to-right marks (U+200E) before
+timestamps and narrow no-break spaces (U+202F) before AM/PM, and some
+Windows Telegram exports are UTF-16. The encoding is sniffed from the
+first bytes, the content is decoded chunk by chunk with an incremental
+decoder, and invisible marks are normalized on each decoded chunk, so
+streaming parsers see clean text without a separate pass over the file.
+"""
+
+import codecs
+import re
+from typing import IO, Dict, Iterator, Optional, Tuple
+
+
+# Bytes decoded at once
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Bytes inspected to guess the encoding of files without a byte order mark
+SNIFF_SIZE = 4096
+
+# Byte order marks, longest first (the UTF-32 LE mark starts with the UTF-16 LE one)
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# Directional marks, embeddings, isolates and stray byte order marks are
+# removed; no-break spaces become ordinary spaces
+INVISIBLE_MARKS: Dict[str, str] = {
+    **{chr(code): '' for code in (0x200E, 0x200F, *range(0x202A, 0x202F), *range(0x2066, 0x206A), 0xFEFF)},
+    chr(0x202F): ' ',
+    chr(0x00A0): ' ',
+}
+
+# A character class over the marks; much faster than str.translate, which
+# looks up every character of the text
+_MARKS_RE = re.compile('[' + ''.join(INVISIBLE_MARKS) + ']')
+
+
+def sniff_encoding(prefix: bytes) -> Tuple[str, int]:
+    """
+    Guess the encoding of a file from its first bytes.
+
+    A byte order mark decides; without one, text with a NUL byte in every
+    other position is taken as UTF-16, and anything else as UTF-8.
+
+    Args:
+        prefix: Leading bytes of the file
+
+    Returns:
+        Codec name and length of the byte order mark to skip
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, len(bom)
+
+    sample = prefix[:SNIFF_SIZE]
+    if len(sample) >= 4:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) // 2
+        # ASCII-heavy UTF-16 has a NUL in nearly every high byte
+        if odd_nuls > half * 0.4 and even_nuls < half * 0.1:
+            return 'utf-16-le', 0
+        if even_nuls > half * 0.4 and odd_nuls < half * 0.1:
+            return 'utf-16-be', 0
+    return 'utf-8', 0
+
+
+def normalize_marks(text: str) -> str:
+    """
+    Remove invisible directional marks and normalize no-break spaces.
+
+    Args:
+        text: Decoded text
+
+    Returns:
+        Text without the characters in ``INVISIBLE_MARKS``
+    """
+    if _MARKS_RE.search(text) is None:
+        return text
+    return _MARKS_RE.sub(lambda match: INVISIBLE_MARKS[match.group()], text)
+
+
+def iter_decoded(
+    stream: IO[bytes],
+    encoding: Optional[str] = None,
+    normalize: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Decode a binary stream chunk by chunk.
+
+    Multi-byte characters split between chunks are completed by the
+    incremental decoder; undecodable bytes become U+FFFD.
+
+    Args:
+        stream: Binary stream positioned at the first byte of the content
+        encoding: Codec name; sniffed from the first chunk when omitted
+        normalize: Whether to apply ``normalize_marks`` to each chunk
+        chunk_size: Bytes read at once
+
+    Returns:
+        Iterator over decoded text chunks
+    """
+    # The first read is large enough for the encoding heuristics
+    raw = stream.read(max(chunk_size, SNIFF_SIZE))
+    sniffed, bom_length = sniff_encoding(raw)
+    if encoding is None:
+        encoding = sniffed
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    chunk = raw[bom_length:] if encoding == sniffed else raw
+    while raw:
+        text = decoder.decode(chunk)
+        if text:
+            yield normalize_marks(text) if normalize else text
+        raw = chunk = stream.read(chunk_size)
+
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield normalize_marks(text) if normalize else text
+
+
+def iter_lines(
+    stream: IO[bytes],
+    encoding: Optional[str] = None,
+    normalize: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Decode a binary stream into lines without line endings.
+
+    '\\n', '\\r\\n' and '\\r' end lines, as with universal newlines; other
+    Unicode separators (e.g. U+2028 inside a message) do not.
+
+    Args:
+        stream: Binary stream positioned at the first byte of the content
+        encoding: Codec name; sniffed from the first chunk when omitted
+        normalize: Whether to remove invisible marks
+        chunk_size: Bytes read at once
+
+    Returns:
+        Iterator over lines
+    """
+    pending = ''
+    for text in iter_decoded(stream, encoding, normalize, chunk_size):
+        text = pending + text
+        # A trailing '\r' may be the first half of '\r\n'
+        if text.endswith('\r'):
+            text, pending = text[:-1], '\r'
+        else:
+            pending = ''
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines = text.split('\n')
+        pending = lines.pop() + pending
+        yield from lines
+
+    if pending.endswith('\r'):
+        yield pending[:-1]
+    elif pending:
+        yield pending
+
+
+def to_utf8(data: bytes) -> bytes:
+    """
+    Transcode content to UTF-8 without a byte order mark.
+
+    UTF-8 content is returned as is (minus its mark), so decoders that only
+    accept UTF-8 (e.g. orjson) can read any export without a copy in the
+    common case.
+
+    Args:
+        data: Raw file content
+
+    Returns:
+        UTF-8 encoded content
+    """
+    encoding, bom_length = sniff_encoding(data[:SNIFF_SIZE])
+    if encoding == 'utf-8':
+        return data[bom_length:] if bom_length else data
+    return codecs.decode(data[bom_length:], encoding, errors='replace').encode('utf-8')
+
+
+def decode_prefix(prefix: bytes) -> str:
+    """
+    Decode a file prefix for format sniffing.
+
+    A character cut at the end of the prefix is dropped, and invisible
+    marks are removed.
+
+    Args:
+        prefix: Leading bytes of the file
+
+    Returns:
+        Decoded, normalized text
+    """
+    encoding, bom_length = sniff_encoding(prefix)
+    return normalize_marks(codecs.decode(prefix[bom_length:], encoding, errors='ignore'))
@@ -1,42 +1,393 @@
 """
-Instagram chat parser implementation (DEPRECATED).
+Instagram chat parser implementation.
+
+Instagram's "Download your information" JSON export keeps each direct
+message thread in ``messages/inbox/<thread>/message_N.json`` pages, newest
+message first, and writes non-ASCII text as UTF-8 bytes escaped one by one
+as ``\\u00XX`` (so "é" reads as "Ã©"). The export may be a folder, a zip
+or a single page. Pages are decoded independently, in worker processes
+for large exports; the strings of each page are repaired in one pass,
+and the pages are merged by timestamp.
 """
 
-import warnings
-from typing import List
+import logging
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union, IO, TYPE_CHECKING
+from zoneinfo import ZoneInfo
 
 from models.message import Message
+from .archive import ZipExport, is_zip
 from .base import BaseParser
+from .json_backends import get_json_backend
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Page files of a thread: message_1.json holds the newest messages
+PAGE_PATTERN = re.compile(r'(?:^|/)message_(\d+)\.json$')
+
+# Folder holding the threads of the account's inbox
+INBOX_DIR = 'inbox'
+
+# Exports smaller than this are parsed in-process; a pool costs more than it saves
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Message fields marking an attachment, with the media type they map to
+MEDIA_FIELDS = {
+    'photos': 'photo',
+    'videos': 'video',
+    'audio_files': 'audio',
+    'gifs': 'animation',
+    'sticker': 'sticker',
+    'files': 'document',
+    'share': 'link',
+}
+
+COLUMNS = ('timestamp_ms', 'sender', 'text', 'media_type')
+
+# Joins the strings of a page for one bulk repair; a string containing it
+# changes the number of parts, which sends the page to the slow path
+_SEPARATOR = '\x00'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def fix_mojibake(values: List[str]) -> List[str]:
+    """
+    Repair text whose UTF-8 bytes were exported as Latin-1 characters.
+    
+    All strings are joined and repaired with one encode/decode round trip;
+    if that fails because some string is not mojibake (genuine Latin-1
+    or non-Latin-1 characters), the strings are repaired one by one and
+    those that cannot be repaired are kept as they are.
+    
+    Args:
+        values: Strings of a page, e.g. every message text
+    
+    Returns:
+        Repaired strings, in the same order
+    """
+    joined = _SEPARATOR.join(values)
+    if joined.isascii():
+        return values
+    try:
+        repaired = joined.encode('latin-1').decode('utf-8').split(_SEPARATOR)
+    except UnicodeError:
+        repaired = None
+    if repaired is not None and len(repaired) == len(values):
+        return repaired
+    return [_fix_string(value) for value in values]
+
+
+def _fix_string(value: str) -> str:
+    """Repair one mojibake string, or return it unchanged."""
+    try:
+        return value.encode('latin-1').decode('utf-8')
+    except UnicodeError:
+        return value
+
+
+def find_pages(names: Sequence[str]) -> List[Tuple[str, int, str]]:
+    """
+    Pick the message pages out of the files of an export.
+    
+    Threads under an ``inbox`` folder win over other folders (message
+    requests, archived threads) when both are present.
+    
+    Args:
+        names: File paths relative to the export root, '/'-separated
+    
+    Returns:
+        (path, page number, thread) tuples sorted by thread and page
+    """
+    pages = []
+    for name in names:
+        match = PAGE_PATTERN.search(name)
+        if match:
+            parts = PurePosixPath(name).parts
+            thread = parts[-2] if len(parts) > 1 else ''
+            pages.append((name, int(match.group(1)), thread, INBOX_DIR in parts[:-1]))
+    
+    if any(in_inbox for *_, in_inbox in pages):
+        pages = [page for page in pages if page[3]]
+    return sorted((name, number, thread) for name, number, thread, _ in pages)
+
+
+def _media_type(raw_msg: Dict[str, Any]) -> Optional[str]:
+    """Media type of the first attachment field of a message."""
+    for field, media_type in MEDIA_FIELDS.items():
+        if raw_msg.get(field):
+            return media_type
+    return None
+
+
+def _parse_page(task: Tuple[str, Union[str, bytes], Optional[str], str]) -> Tuple[Dict[str, list], Dict[str, Any]]:
+    """
+    Worker: decode one page into columns in chronological order.
+    
+    Args:
+        task: (kind, path or page bytes, zip member, JSON backend name);
+            kind is 'file', 'zip' or 'bytes'
+    
+    Returns:
+        Page columns and the thread's title and participants
+    """
+    kind, source, member, json_backend = task
+    if kind == 'file':
+        with open(source, 'rb') as stream:
+            content = stream.read()
+    elif kind == 'zip':
+        with zipfile.ZipFile(source) as archive:
+            content = archive.read(member)
+    else:
+        content = source
+    
+    backend = get_json_backend(json_backend)
+    try:
+        data = backend.loads(content)
+    except backend.errors as e:
+        label = member or (source if kind == 'file' else 'page')
+        raise ValueError(f"Invalid Instagram JSON format in {label}: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('messages'), list):
+        raise ValueError("Invalid Instagram JSON format: no 'messages' list")
+    
+    columns: Dict[str, list] = {name: [] for name in COLUMNS}
+    media_fields = MEDIA_FIELDS.keys()
+    # Pages list the newest message first
+    for raw_msg in reversed(data['messages']):
+        timestamp = raw_msg.get('timestamp_ms')
+        if timestamp is None:
+            continue
+        columns['timestamp_ms'].append(timestamp)
+        columns['sender'].append(raw_msg.get('sender_name') or '')
+        columns['text'].append(raw_msg.get('content') or '')
+        columns['media_type'].append(_media_type(raw_msg) if media_fields & raw_msg.keys() else None)
+    
+    columns['sender'] = fix_mojibake(columns['sender'])
+    columns['text'] = fix_mojibake(columns['text'])
+    thread = {
+        'title': _fix_string(data['title']) if data.get('title') else None,
+        'participants': fix_mojibake([participant.get('name') or '' for participant in data.get('participants', [])]),
+    }
+    return columns, thread
 
 
 class InstagramParser(BaseParser):
     """
-    DEPRECATED: Instagram parser is no longer supported.
+    Parser for Instagram direct message exports in JSON format.
     
-    Instagram has changed their export format and this parser is outdated.
+    Accepts the export folder or zip (every thread is read, and messages
+    of all threads are merged by time), a single thread folder, or a
+    single ``message_N.json`` page.
     """
     
-    def __init__(self, *args, **kwargs):
-        """Initialize with deprecation warning."""
-        warnings.warn(
-            "InstagramParser is deprecated and no longer supported. "
-            "Instagram has changed their export format.",
-            DeprecationWarning,
-            stacklevel=2
-        )
-        super().__init__(*args, **kwargs)
+    def __init__(
+        self,
+        file_path: Union[str, Path, IO],
+        json_backend: Optional[str] = None,
+        tz: Optional[str] = None,
+        threads: Optional[Sequence[str]] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Initialize the parser with a path (folder, zip or page) or file object.
+        
+        Args:
+            file_path: Path to the export or file-like object
+            json_backend: Name of the JSON backend to use (e.g. 'orjson');
+                the fastest installed one is picked when omitted
+            tz: IANA timezone (e.g. 'Europe/Rome') for timezone-aware
+                timestamps; by default timestamps are naive UTC
+            threads: Thread folder names to read (e.g. 'alice_1234');
+                all threads when omitted
+            max_workers: Size of the process pool for large exports
+                (defaults to the CPU count; 1 parses in-process)
+        """
+        super().__init__(file_path)
+        self.json_backend = get_json_backend(json_backend)
+        self.tz = tz
+        self._zone = ZoneInfo(tz) if tz else None
+        self.threads = set(threads) if threads else None
+        self.max_workers = max_workers
     
     def parse(self, verbose: bool = False) -> List[Message]:
         """
-        This method is deprecated and will return an empty list.
+        Parse every selected thread of the export.
+        
+        Args:
+            verbose: Whether to show a progress bar when no observer is attached
+        
+        Returns:
+            List of parsed Message objects in time order
+        """
+        messages = list(self.iter_messages(verbose=verbose))
+        self.report.messages = len(messages)
+        return messages
+    
+    def iter_messages(self, verbose: bool = False) -> Iterator[Message]:
+        """
+        Iterate over parsed messages in time order.
+        
+        All pages are decoded first, since a thread's oldest messages are
+        on its last page; messages are then built as they are consumed.
         
         Args:
-            verbose: Ignored
+            verbose: Whether to show a progress bar when no observer is attached
+        
+        Returns:
+            Iterator over valid Message objects
+        """
+        with self._tracking(verbose, "Parsing Instagram messages"):
+            columns = self._load_columns()
+            with self._timed('messages'):
+                rows = zip(columns['timestamp_ms'], columns['sender'], columns['text'], columns['media_type'])
+                parsed = (
+                    Message(datetime=self._to_datetime(timestamp), sender=sender, text=text, media_type=media_type)
+                    for timestamp, sender, text, media_type in self._track(rows, total=len(columns['timestamp_ms']))
+                )
+                yield from self._iter_valid_messages(parsed)
+    
+    def parse_dataframe(self) -> 'pd.DataFrame':
+        """
+        Parse the export into a DataFrame with column-wise timestamp handling.
+        
+        Returns:
+            DataFrame with datetime, sender, text and media_type columns
+        """
+        import pandas as pd
+        
+        with self._tracking(desc="Parsing Instagram messages"):
+            columns = self._load_columns()
+            with self._timed('datetimes'):
+                datetimes = pd.to_datetime(
+                    pd.Series(columns.pop('timestamp_ms'), dtype='int64'), unit='ms', utc=True
+                ).dt.as_unit('us')
+                datetimes = datetimes.dt.tz_convert(self.tz) if self.tz else datetimes.dt.tz_localize(None)
+            df = pd.DataFrame({'datetime': datetimes, **columns})
             
+            # Same validation as the object path
+            valid = df['sender'].notna() & (df['sender'] != '') & ((df['text'] != '') | df['media_type'].notna())
+            df = df[valid].reset_index(drop=True)
+            self._aggregate_frame(df)
+            self._finish_progress(len(df))
+        
+        self.report.messages = len(df)
+        return df
+    
+    def _to_datetime(self, timestamp_ms: int) -> datetime:
+        """Convert a millisecond epoch timestamp without float rounding."""
+        moment = _EPOCH + timedelta(milliseconds=timestamp_ms)
+        if self._zone is None:
+            return moment
+        return moment.replace(tzinfo=timezone.utc).astimezone(self._zone)
+    
+    def _load_columns(self) -> Dict[str, list]:
+        """
+        Decode every page and merge them into columns sorted by time.
+        
+        Returns:
+            Column name → values, including raw 'timestamp_ms'
+        """
+        self.report.details['json_backend'] = self.json_backend.name
+        with self._timed('read'):
+            tasks, sizes, threads = self._page_tasks()
+        if not tasks:
+            raise ValueError("No Instagram message files (message_N.json) found in the export")
+        if self._tracker is not None:
+            self._tracker.set_totals(total_bytes=sum(sizes))
+        
+        workers = self.max_workers or os.cpu_count() or 1
+        if sum(sizes) < PARALLEL_MIN_BYTES or len(tasks) == 1:
+            workers = 1
+        
+        with self._timed('decode'):
+            if workers == 1:
+                pages, titles = self._collect(map(_parse_page, tasks), sizes, threads)
+            else:
+                # Spawned rather than forked: the app parses large uploads from threads
+                pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context('spawn'))
+                with pool as executor:
+                    pages, titles = self._collect(executor.map(_parse_page, tasks), sizes, threads)
+        
+        with self._timed('merge'):
+            columns = {name: [value for page in pages for value in page[name]] for name in COLUMNS}
+            timestamps = columns['timestamp_ms']
+            # Pages are sorted runs, which the sort merges in near-linear time
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            columns = {name: [values[i] for i in order] for name, values in columns.items()}
+        
+        self.report.details.update(
+            pages=len(tasks), threads=len(titles), thread_titles=sorted(filter(None, titles.values())), workers=workers
+        )
+        return columns
+    
+    def _collect(
+        self,
+        results: Iterator[Tuple[Dict[str, list], Dict[str, Any]]],
+        sizes: List[int],
+        threads: List[str]
+    ) -> Tuple[List[Dict[str, list]], Dict[str, Optional[str]]]:
+        """Gather page results in task order, counting their bytes as progress."""
+        pages = []
+        titles = {}
+        for index, (columns, thread) in enumerate(results):
+            pages.append(columns)
+            titles[threads[index]] = thread['title']
+            if self._tracker is not None:
+                self._tracker.add_bytes(sizes[index])
+        return pages, titles
+    
+    def _page_tasks(self) -> Tuple[List[Tuple[str, Union[str, bytes], Optional[str], str]], List[int], List[str]]:
+        """
+        Locate the pages of the export as worker tasks.
+        
+        Files on disk are read by the workers themselves; pages of an
+        uploaded file object are read here and shipped to them.
+        
         Returns:
-            Empty list of messages
+            Worker tasks, the size in bytes and the thread of each page
         """
-        raise NotImplementedError(
-            "Instagram parser is deprecated and no longer functional. "
-            "Please use WhatsApp or Telegram parsers instead."
-        )
\ No newline at end of file
+        backend = self.json_backend.name
+        
+        if self.file_path is not None and self.file_path.is_dir():
+            files = {path.relative_to(self.file_path).as_posix(): path for path in self.file_path.rglob('message_*.json')}
+            pages = self._select(find_pages(list(files)))
+            return (
+                [('file', str(files[name]), None, backend) for name, _, _ in pages],
+                [files[name].stat().st_size for name, _, _ in pages],
+                [thread for _, _, thread in pages]
+            )
+        
+        with self._open_source() as source:
+            if not is_zip(source.read(4)):
+                source.seek(0)
+                content = source.read()
+                return [('bytes', content, None, backend)], [len(content)], ['']
+            
+            with ZipExport(source) as archive:
+                infos = {info.filename: info for info in archive.zip_file.infolist() if not info.is_dir()}
+                pages = self._select(find_pages(list(infos)))
+                self.media_manifest = [
+                    entry for entry in archive.media_manifest() if not PAGE_PATTERN.search(entry.filename)
+                ]
+                sizes = [infos[name].file_size for name, _, _ in pages]
+                threads = [thread for _, _, thread in pages]
+                if self.file_path is not None:
+                    return [('zip', str(self.file_path), name, backend) for name, _, _ in pages], sizes, threads
+                return [('bytes', archive.zip_file.read(name), name, backend) for name, _, _ in pages], sizes, threads
+    
+    def _select(self, pages: List[Tuple[str, int, str]]) -> List[Tuple[str, int, str]]:
+        """Keep the pages of the requested threads, newest page last."""
+        if self.threads is not None:
+            pages = [page for page in pages if page[2] in self.threads]
+        # Within a thread the highest page number holds the oldest messages
+        return sorted(pages, key=lambda page: (page[2], -page[1]))
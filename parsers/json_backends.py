@@ -0,0 +1,95 @@
+"""
+Pluggable JSON decoder backends.
+
+Fast third-party decoders are used when installed and decode straight from
+bytes; the standard library ``json`` module is always available as the
+fallback.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    """
+    A JSON decoder.
+
+    Attributes:
+        name: Backend name (the module providing it)
+        loads: Function decoding a bytes payload into Python objects
+        errors: Exception types raised on malformed input
+    """
+    name: str
+    loads: Callable[[bytes], Any]
+    errors: Tuple[Type[Exception], ...] = (ValueError,)
+
+
+def _orjson() -> JsonBackend:
+    import orjson
+    return JsonBackend('orjson', orjson.loads)
+
+
+def _msgspec() -> JsonBackend:
+    import msgspec
+    return JsonBackend('msgspec', msgspec.json.decode, (msgspec.DecodeError,))
+
+
+def _ujson() -> JsonBackend:
+    import ujson
+    return JsonBackend('ujson', ujson.loads)
+
+
+def _stdlib() -> JsonBackend:
+    # json.loads detects UTF-8/16/32 on bytes input by itself
+    return JsonBackend('json', json.loads)
+
+
+# Backend factories in order of preference
+BACKENDS: Dict[str, Callable[[], JsonBackend]] = {
+    'orjson': _orjson,
+    'msgspec': _msgspec,
+    'ujson': _ujson,
+    'json': _stdlib,
+}
+
+
+def available_backends() -> List[str]:
+    """List the names of the backends that can be imported here."""
+    names = []
+    for name, factory in BACKENDS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_json_backend(name: Optional[str] = None) -> JsonBackend:
+    """
+    Get a JSON backend by name, or the fastest one installed.
+
+    Args:
+        name: Backend name; None picks the first importable backend
+
+    Returns:
+        The selected JsonBackend
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the requested backend is not installed
+    """
+    if name is not None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {name}. Expected one of {list(BACKENDS)}")
+        return BACKENDS[name]()
+
+    for factory in BACKENDS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+
+    return _stdlib()
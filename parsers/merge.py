@@ -0,0 +1,194 @@
+"""
+Merging of overlapping exports of the same chat.
+
+Exports from different phones, date ranges or platforms are k-way merged
+by timestamp while they are parsed, and messages present in more than one
+export are dropped using a content hash. Only the hashes of the current
+timestamp bucket are kept, so memory grows with the overlap between
+exports rather than with their total size.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from models.message import Message
+from .base import BaseParser
+from .registry import open_parser
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class MergeStats:
+    """
+    Counters collected while merging exports.
+
+    Attributes:
+        sources: Number of merged exports
+        messages_in: Messages read from all exports
+        duplicates: Messages dropped as duplicates
+        out_of_order: Messages that broke their export's time order
+        peak_window: Largest number of hashes held at once
+    """
+    sources: int = 0
+    messages_in: int = 0
+    duplicates: int = 0
+    out_of_order: int = 0
+    peak_window: int = 0
+
+    @property
+    def messages_out(self) -> int:
+        """Number of messages emitted after deduplication."""
+        return self.messages_in - self.duplicates
+
+
+class ExportMerger:
+    """
+    K-way merge of several chat exports with hash-based deduplication.
+
+    Each export must be in chronological order, as chat exports are. Two
+    messages are duplicates when their timestamps fall in the same bucket
+    of ``resolution`` and their normalized sender and text are equal.
+    Repeated messages within one export (e.g. two "ok" in the same minute)
+    are preserved; only copies coming from other exports are dropped.
+    """
+
+    def __init__(
+        self,
+        parsers: Sequence[BaseParser],
+        resolution: timedelta = timedelta(minutes=1),
+        sender_aliases: Optional[Dict[str, str]] = None,
+        max_window: int = 100_000
+    ):
+        """
+        Initialize the merger.
+
+        Args:
+            parsers: Parsers of the exports to merge
+            resolution: Timestamp bucket used for comparison; one minute
+                matches WhatsApp's precision
+            sender_aliases: Maps sender names to a canonical name, for
+                exports that name the same person differently
+            max_window: Upper bound on the number of hashes held at once
+        """
+        self.parsers = list(parsers)
+        self.resolution = resolution
+        self.sender_aliases = {
+            self._normalize_sender(name): self._normalize_sender(alias)
+            for name, alias in (sender_aliases or {}).items()
+        }
+        self.max_window = max_window
+        self.stats = MergeStats(sources=len(self.parsers))
+
+    def __iter__(self) -> Iterator[Message]:
+        """Iterate over the merged, deduplicated messages in time order."""
+        streams = [
+            self._tag_source(parser.iter_messages(), index)
+            for index, parser in enumerate(self.parsers)
+        ]
+        merged = heapq.merge(*streams, key=lambda item: item[0])
+
+        current_bucket = None
+        emitted: Counter = Counter()
+        seen: Counter = Counter()
+
+        for timestamp, source, message in merged:
+            self.stats.messages_in += 1
+            bucket = self._bucket(timestamp)
+
+            # Hashes only collide within a bucket, so older ones can go
+            if bucket != current_bucket or len(seen) >= self.max_window:
+                current_bucket = bucket
+                emitted.clear()
+                seen.clear()
+
+            digest = self._fingerprint(bucket, message)
+            seen[(digest, source)] += 1
+            self.stats.peak_window = max(self.stats.peak_window, len(seen))
+
+            # Emit the n-th copy from an export only if no export emitted it yet
+            if seen[(digest, source)] > emitted[digest]:
+                emitted[digest] += 1
+                yield message
+            else:
+                self.stats.duplicates += 1
+
+    def merge(self) -> List[Message]:
+        """Merge all exports into a list of messages."""
+        return list(self)
+
+    def _tag_source(self, messages: Iterator[Message], source: int) -> Iterator[Tuple[datetime, int, Message]]:
+        """Attach the sort key and export index to each message."""
+        previous = None
+        for message in messages:
+            timestamp = self._normalize_datetime(message.datetime)
+            if previous is not None and timestamp < previous:
+                self.stats.out_of_order += 1
+                logger.warning(f"Export {source} is out of time order at {timestamp}")
+            previous = timestamp
+            yield timestamp, source, message
+
+    def _bucket(self, timestamp: datetime) -> datetime:
+        """Floor a timestamp to the comparison resolution."""
+        offset = (timestamp - datetime.min) % self.resolution
+        return timestamp - offset
+
+    def _fingerprint(self, bucket: datetime, message: Message) -> bytes:
+        """Content hash of (normalized timestamp, sender, text)."""
+        sender = self._normalize_sender(message.sender)
+        sender = self.sender_aliases.get(sender, sender)
+        text = _WHITESPACE.sub(' ', message.text or '').strip()
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(bucket.isoformat().encode())
+        digest.update(b'\x00')
+        digest.update(sender.encode())
+        digest.update(b'\x00')
+        digest.update(text.encode())
+        return digest.digest()
+
+    @staticmethod
+    def _normalize_datetime(value: datetime) -> datetime:
+        """Convert timezone-aware timestamps to naive local time."""
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _normalize_sender(sender: str) -> str:
+        """Normalize a sender name for comparison."""
+        return _WHITESPACE.sub(' ', sender).strip().casefold()
+
+
+def merge_exports(
+    sources: Iterable[Union[BaseParser, str, Path, IO]],
+    resolution: timedelta = timedelta(minutes=1),
+    sender_aliases: Optional[Dict[str, str]] = None
+) -> ExportMerger:
+    """
+    Merge overlapping exports of the same chat.
+
+    Args:
+        sources: Parsers, paths or file objects of the exports; the platform
+            of paths and file objects is detected automatically
+        resolution: Timestamp bucket used for duplicate detection
+        sender_aliases: Maps sender names to a canonical name
+
+    Returns:
+        ExportMerger to iterate over; its ``stats`` are filled as it runs
+    """
+    parsers = [
+        source if isinstance(source, BaseParser) else open_parser(source)
+        for source in sources
+    ]
+    return ExportMerger(parsers, resolution=resolution, sender_aliases=sender_aliases)
@@ -0,0 +1,247 @@
+"""
+Progress reporting for parsers.
+
+A parser with an observer attached reports bytes consumed from the source,
+messages emitted and an estimate of the time left. Observers are throttled:
+the clock is only read every ``POLL_EVERY`` messages or per read chunk, and
+an update is sent at most once per interval, so tracking adds next to
+nothing to the parse loop. Parsers without an observer skip tracking
+entirely.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import IO, Callable, Iterable, Iterator, Optional, TypeVar, Union
+
+
+# Seconds between two updates sent to an observer
+DEFAULT_INTERVAL = 0.1
+
+# Messages counted between two reads of the clock
+POLL_EVERY = 512
+
+T = TypeVar('T')
+
+
+@dataclass
+class Progress:
+    """
+    Snapshot of a parse run.
+
+    Attributes:
+        bytes_read: Bytes consumed from the source so far
+        total_bytes: Size of the source content, if known
+        messages: Messages emitted so far
+        total_messages: Messages expected in total, if known (e.g. once a
+            JSON export has been decoded)
+        elapsed: Seconds since the run started
+        done: Whether the run has finished
+    """
+    bytes_read: int = 0
+    total_bytes: Optional[int] = None
+    messages: int = 0
+    total_messages: Optional[int] = None
+    elapsed: float = 0.0
+    done: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Completed share of the run between 0 and 1, or None if unknown."""
+        if self.done:
+            return 1.0
+        if self.total_messages:
+            return min(self.messages / self.total_messages, 1.0)
+        if self.total_bytes:
+            return min(self.bytes_read / self.total_bytes, 1.0)
+        return None
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds left at the average rate so far, or None."""
+        fraction = self.fraction
+        if not fraction:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+
+class ProgressObserver:
+    """
+    Receives progress updates of a parse run.
+
+    Subclasses override ``update`` and, if they hold resources such as a
+    progress bar, ``close``.
+    """
+
+    def update(self, progress: Progress) -> None:
+        """Handle a throttled progress update."""
+
+    def close(self, progress: Progress) -> None:
+        """Handle the final state of the run; called once, also on errors."""
+
+
+class CallbackObserver(ProgressObserver):
+    """Adapter for a plain function called with every update."""
+
+    def __init__(self, callback: Callable[[Progress], None]):
+        self.callback = callback
+
+    def update(self, progress: Progress) -> None:
+        self.callback(progress)
+
+    def close(self, progress: Progress) -> None:
+        self.callback(progress)
+
+
+ObserverLike = Union[ProgressObserver, Callable[[Progress], None]]
+
+
+def as_observer(observer: ObserverLike) -> ProgressObserver:
+    """Wrap a plain callback into an observer."""
+    return observer if isinstance(observer, ProgressObserver) else CallbackObserver(observer)
+
+
+class TqdmProgress(ProgressObserver):
+    """
+    Console progress bar.
+
+    The bar counts messages when their total is known and bytes otherwise,
+    so line-based exports show a byte bar with a rate and ETA from the
+    start.
+    """
+
+    def __init__(self, desc: str = "Parsing messages", **tqdm_kwargs):
+        """
+        Create the observer; the bar itself is created on the first update.
+
+        Args:
+            desc: Label of the bar
+            **tqdm_kwargs: Extra arguments for ``tqdm`` (e.g. ``file``)
+        """
+        self.desc = desc
+        self.tqdm_kwargs = tqdm_kwargs
+        self._bar = None
+        self._unit: Optional[str] = None
+
+    def update(self, progress: Progress) -> None:
+        from tqdm import tqdm
+
+        if progress.total_messages is not None:
+            unit, total, position = 'msg', progress.total_messages, progress.messages
+        else:
+            unit, total, position = 'B', progress.total_bytes, progress.bytes_read
+
+        if self._bar is None:
+            self._bar = tqdm(
+                desc=self.desc, total=total, unit=unit, unit_scale=unit == 'B',
+                unit_divisor=1024, **self.tqdm_kwargs
+            )
+        elif unit != self._unit:
+            # A JSON export switches from bytes to messages once it is decoded
+            self._bar.unit, self._bar.unit_scale = unit, unit == 'B'
+            self._bar.reset(total=total)
+        self._unit = unit
+
+        self._bar.update(position - self._bar.n)
+        self._bar.set_postfix(messages=f'{progress.messages:,}', refresh=False)
+
+    def close(self, progress: Progress) -> None:
+        self.update(progress)
+        self._bar.close()
+
+
+class ProgressTracker:
+    """
+    Counts bytes and messages of one parse run and throttles updates.
+    """
+
+    def __init__(self, observer: ProgressObserver, interval: float = DEFAULT_INTERVAL):
+        """
+        Start tracking a run.
+
+        Args:
+            observer: Receiver of the updates
+            interval: Minimum seconds between two updates
+        """
+        self.observer = observer
+        self.interval = interval
+        self.progress = Progress()
+        self._started = time.perf_counter()
+        self._last_update = self._started
+        self._next_poll = POLL_EVERY
+        self._closed = False
+
+    def set_totals(self, total_bytes: Optional[int] = None, total_messages: Optional[int] = None) -> None:
+        """Record the size of the source or the number of expected messages."""
+        if total_bytes is not None:
+            self.progress.total_bytes = total_bytes
+        if total_messages is not None:
+            self.progress.total_messages = total_messages
+
+    def add_bytes(self, count: int) -> None:
+        """Count bytes consumed from the source."""
+        self.progress.bytes_read += count
+        self._poll()
+
+    def track(self, items: Iterable[T]) -> Iterator[T]:
+        """
+        Count the items of an iterable as emitted messages.
+
+        Args:
+            items: Messages (or raw records, one per message)
+
+        Returns:
+            Iterator over the same items
+        """
+        progress = self.progress
+        for item in items:
+            progress.messages += 1
+            if progress.messages >= self._next_poll:
+                self._next_poll = progress.messages + POLL_EVERY
+                self._poll()
+            yield item
+
+    def _poll(self) -> None:
+        """Send an update if the interval has passed."""
+        now = time.perf_counter()
+        if now - self._last_update >= self.interval:
+            self._last_update = now
+            self.progress.elapsed = now - self._started
+            self.observer.update(self.progress)
+
+    def close(self, messages: Optional[int] = None) -> None:
+        """
+        Send the final state of the run.
+
+        Args:
+            messages: Final message count, for parsers that build their
+                result without emitting messages one by one
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if messages is not None:
+            self.progress.messages = messages
+        self.progress.elapsed = time.perf_counter() - self._started
+        self.progress.done = True
+        self.observer.close(self.progress)
+
+
+class CountingReader:
+    """
+    Binary stream wrapper that reports the bytes read to a tracker.
+
+    Readers consume the source in large chunks, so the bookkeeping happens
+    once per chunk rather than per line.
+    """
+
+    def __init__(self, stream: IO[bytes], tracker: ProgressTracker):
+        self.stream = stream
+        self.tracker = tracker
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.tracker.add_bytes(len(data))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
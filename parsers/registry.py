@@ -0,0 +1,88 @@
+"""
+Registry mapping platform keys to parser classes.
+
+Parser modules are imported when their platform is first looked up, so a
+process handling one platform never loads the others.
+"""
+
+import importlib
+from pathlib import Path
+from typing import Dict, IO, Optional, Type, Union, TYPE_CHECKING
+
+from .detection import detect_archive_platform, detect_platform, read_prefix
+from .archive import is_zip, read_member_names
+
+if TYPE_CHECKING:
+    from .base import BaseParser
+
+
+# Parser classes by platform key, as 'module:ClassName' paths
+PARSERS: Dict[str, str] = {
+    'whatsapp': 'parsers.whatsapp:WhatsAppParser',
+    'telegram': 'parsers.telegram:TelegramParser',
+    'telegram_html': 'parsers.telegram_html:TelegramHTMLParser',
+    'instagram': 'parsers.instagram:InstagramParser',
+}
+
+
+def get_parser_class(platform: str) -> Optional[Type['BaseParser']]:
+    """
+    Look up the parser class for a platform, importing its module.
+    
+    Args:
+        platform: Platform key (e.g. 'whatsapp')
+        
+    Returns:
+        Parser class or None if the platform has no parser
+    """
+    path = PARSERS.get(platform)
+    if path is None:
+        return None
+    module_name, class_name = path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def open_parser(
+    source: Union[str, Path, IO],
+    platform: Optional[str] = None,
+    file_name: Optional[str] = None
+) -> 'BaseParser':
+    """
+    Create a parser for an export, detecting its platform if needed.
+    
+    Args:
+        source: Path to the export (a file, or a folder such as an
+            extracted Instagram or Telegram HTML export) or a seekable binary file object
+        platform: Platform key; detected from the file prefix, or from the
+            file names of a folder, when omitted
+        file_name: Name the platform is detected from, if the source's own
+            name is not the export's (e.g. a spooled upload)
+        
+    Returns:
+        Parser instance for the export
+        
+    Raises:
+        ValueError: If the platform cannot be detected or has no parser
+    """
+    if platform is None and not hasattr(source, 'read') and Path(source).is_dir():
+        # A folder is detected from its layout, like a zip archive
+        path = Path(source)
+        platform = detect_archive_platform([file.relative_to(path).as_posix() for file in path.rglob('*')])
+    elif platform is None:
+        if hasattr(source, 'read'):
+            file_name = file_name or getattr(source, 'name', '')
+            prefix = read_prefix(source)
+            member_names = read_member_names(source) if is_zip(prefix) else None
+        else:
+            path = Path(source)
+            file_name = file_name or path.name
+            with path.open('rb') as stream:
+                prefix = read_prefix(stream)
+                member_names = read_member_names(stream) if is_zip(prefix) else None
+        platform = detect_platform(file_name, prefix, member_names)
+    
+    parser_class = get_parser_class(platform) if platform else None
+    if parser_class is None:
+        raise ValueError(f"Unsupported or undetected platform for {source}: {platform}")
+    
+    return parser_class(source)
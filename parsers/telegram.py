@@ -2,15 +2,21 @@
 Telegram chat parser implementation.
 """
 
-import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from zoneinfo import ZoneInfo
+from typing import Iterator, List, Dict, Any, Optional, Union, IO, TYPE_CHECKING
 import logging
 
-from tqdm import tqdm
-
 from models.message import Message
+from .archive import media_type_from_filename
 from .base import BaseParser
+from .encoding import SNIFF_SIZE, sniff_encoding, to_utf8
+from .json_backends import get_json_backend
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .telegram_account import AccountParseResult
 
 
 logger = logging.getLogger(__name__)
@@ -20,49 +26,257 @@ class TelegramParser(BaseParser):
     """
     Parser for Telegram chat exports in JSON format.
     
-    Handles the standard Telegram JSON export format.
+    Handles the standard Telegram JSON export format. The payload is
+    decoded straight from bytes by the fastest installed JSON backend.
     """
     
+    ARCHIVE_MEMBER_NAMES = ('result.json',)
+    ARCHIVE_MEMBER_SUFFIXES = ('.json',)
+    
+    def __init__(
+        self,
+        file_path: Union[str, Path, IO],
+        json_backend: Optional[str] = None,
+        tz: Optional[str] = None
+    ):
+        """
+        Initialize the parser with a file path or file object.
+        
+        Args:
+            file_path: Path to the chat file or file-like object
+            json_backend: Name of the JSON backend to use (e.g. 'orjson');
+                the fastest installed one is picked when omitted
+            tz: IANA timezone (e.g. 'Europe/Rome') for timezone-aware
+                timestamps taken from ``date_unixtime``; by default the
+                naive wall-clock ``date`` of the export is kept
+        """
+        super().__init__(file_path)
+        self.json_backend = get_json_backend(json_backend)
+        self.tz = tz
+        self._zone = ZoneInfo(tz) if tz else None
+    
     def parse(self, verbose: bool = False) -> List[Message]:
         """
         Parse Telegram chat file in JSON format.
         
         Args:
-            verbose: Whether to show progress bar during parsing
+            verbose: Whether to show a progress bar when no observer is attached
             
         Returns:
             List of parsed Message objects
         """
         messages = []
         
-        try:
-            # Get file content and parse JSON
-            content = self._get_file_content()
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-            
-            data = json.loads(content)
+        with self._tracking(verbose, "Parsing Telegram messages"):
+            try:
+                # Extract messages from JSON structure
+                raw_messages = self._get_raw_messages(self._load_data())
             
-            # Extract messages from JSON structure
-            raw_messages = data.get('messages', [])
+                with self._timed('messages'):
+                    for raw_msg in self._track(raw_messages, total=len(raw_messages)):
+                        message = self._parse_message(raw_msg)
+                        if message:
+                            messages.append(message)
             
-            # Use tqdm for progress if verbose
-            iterator = tqdm(raw_messages, desc="Parsing Telegram messages") if verbose else raw_messages
+            except Exception as e:
+                logger.error(f"Error parsing Telegram file: {e}")
+                raise
             
-            for raw_msg in iterator:
-                message = self._parse_message(raw_msg)
-                if message:
-                    messages.append(message)
+            # Validate messages before returning
+            messages = self.validate_messages(messages)
+            self._finish_progress(len(messages))
+        
+        self.report.messages = len(messages)
+        return messages
+    
+    def iter_messages(self, verbose: bool = False) -> Iterator[Message]:
+        """
+        Iterate over parsed messages in export order.
+        
+        The JSON document is decoded as a whole; messages are then built
+        one at a time as they are consumed.
+        
+        Args:
+            verbose: Whether to show a progress bar when no observer is attached
             
-        except json.JSONDecodeError as e:
+        Returns:
+            Iterator over valid Message objects
+        """
+        with self._tracking(verbose, "Parsing Telegram messages"):
+            raw_messages = self._get_raw_messages(self._load_data())
+            parsed = (self._parse_message(raw_msg) for raw_msg in self._track(raw_messages, total=len(raw_messages)))
+            yield from self._iter_valid_messages(message for message in parsed if message)
+    
+    def parse_dataframe(self) -> 'pd.DataFrame':
+        """
+        Parse the export into a DataFrame with column-wise timestamp handling.
+        
+        Timestamps are converted for the whole column at once: integer
+        ``date_unixtime`` values when a timezone is set, ISO ``date``
+        strings otherwise. Messages whose timestamp cannot be parsed are
+        dropped with a warning.
+        
+        Returns:
+            DataFrame with datetime, sender, text and media_type columns
+        """
+        with self._tracking(desc="Parsing Telegram messages"):
+            return self._parse_dataframe()
+    
+    def _parse_dataframe(self) -> 'pd.DataFrame':
+        """Build the DataFrame of ``parse_dataframe`` while progress is tracked."""
+        import pandas as pd
+        
+        raw_messages = self._get_raw_messages(self._load_data())
+        
+        columns = {'date': [], 'date_unixtime': [], 'sender': [], 'text': [], 'media_type': []}
+        with self._timed('messages'):
+            for raw_msg in self._track(raw_messages, total=len(raw_messages)):
+                text = self._extract_text(raw_msg)
+                media_type = self._detect_media_type(raw_msg)
+                if not text and not media_type:
+                    continue
+                columns['date'].append(raw_msg.get('date'))
+                columns['date_unixtime'].append(raw_msg.get('date_unixtime'))
+                columns['sender'].append(raw_msg.get('from', 'Unknown'))
+                columns['text'].append(text)
+                columns['media_type'].append(media_type)
+        
+        with self._timed('datetimes'):
+            parsed_datetime = self._parse_datetime_column(
+                pd.Series(columns.pop('date'), dtype=object),
+                pd.Series(columns.pop('date_unixtime'), dtype=object)
+            )
+        
+        df = pd.DataFrame({'datetime': parsed_datetime, **columns})
+        
+        unparsed = df['datetime'].isna()
+        if unparsed.any():
+            logger.warning(f"Dropped {int(unparsed.sum())} messages with unparseable timestamps")
+        
+        # Same validation as the object path
+        valid = ~unparsed & df['sender'].notna() & (df['sender'] != '')
+        df = df[valid].reset_index(drop=True)
+        self._aggregate_frame(df)
+        
+        self._finish_progress(len(df))
+        self.report.messages = len(df)
+        return df
+    
+    def _load_data(self) -> Any:
+        """Read the export and decode it with the configured JSON backend."""
+        self.report.details['json_backend'] = self.json_backend.name
+        
+        try:
+            # Get file content and decode JSON straight from the bytes
+            with self._timed('read'):
+                content = self._get_file_content()
+                if isinstance(content, bytes):
+                    # UTF-16 exports and byte order marks trip UTF-8-only decoders
+                    content = to_utf8(content)
+            with self._timed('decode'):
+                data = self.json_backend.loads(content)
+        except self.json_backend.errors as e:
             logger.error(f"Failed to parse JSON: {e}")
             raise ValueError(f"Invalid Telegram JSON format: {e}")
-        except Exception as e:
-            logger.error(f"Error parsing Telegram file: {e}")
-            raise
         
-        # Validate messages before returning
-        return self.validate_messages(messages)
+        for key in ('id', 'name', 'type'):
+            if key in data:
+                self.report.details[f'chat_{key}'] = data[key]
+        
+        return data
+    
+    def _parse_datetime_column(self, dates: 'pd.Series', unixtimes: 'pd.Series') -> 'pd.Series':
+        """
+        Convert raw timestamp columns in bulk.
+        
+        Args:
+            dates: ISO ``date`` strings (or None)
+            unixtimes: Integer-string ``date_unixtime`` values (or None)
+            
+        Returns:
+            datetime64 Series, timezone-aware if a timezone is set; NaT where
+            neither field could be parsed
+        """
+        import pandas as pd
+        
+        epochs = pd.to_numeric(unixtimes, errors='coerce').astype('Int64')
+        iso = pd.to_datetime(dates, format='ISO8601', errors='coerce')
+        
+        if self.tz:
+            # Exact instants: one int64 → UTC conversion, then one zone conversion
+            from_epoch = pd.to_datetime(epochs, unit='s', utc=True).dt.tz_convert(self.tz)
+            if iso.dt.tz is None:
+                iso = iso.dt.tz_localize(self.tz, ambiguous='NaT', nonexistent='NaT')
+            else:
+                iso = iso.dt.tz_convert(self.tz)
+            return from_epoch.fillna(iso)
+        
+        # Wall-clock time as exported; epochs only fill rows without a date
+        if iso.dt.tz is not None:
+            iso = iso.dt.tz_localize(None)
+        missing = iso.isna() & epochs.notna()
+        if missing.any():
+            # Rare: local time of this machine, as in the object path
+            iso[missing] = epochs[missing].map(lambda epoch: datetime.fromtimestamp(int(epoch)))
+        return iso
+    
+    def parse_account(self, max_workers: Optional[int] = None) -> 'AccountParseResult':
+        """
+        Parse a full-account export, one chat per worker process.
+        
+        The parent process only locates each chat's byte span; decoding and
+        parsing happen in the workers. Call it from under an
+        ``if __name__ == '__main__':`` guard on platforms that spawn workers.
+        
+        Args:
+            max_workers: Size of the process pool (defaults to the CPU count)
+            
+        Returns:
+            AccountParseResult with chat-id-tagged columns and per-chat statistics
+        """
+        from .telegram_account import parse_account_export
+        
+        source = self.file_path if self.file_path is not None else self._get_file_content()
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        elif isinstance(source, bytes):
+            source = to_utf8(source)
+        else:
+            with source.open('rb') as stream:
+                encoding, _ = sniff_encoding(stream.read(SNIFF_SIZE))
+            if encoding != 'utf-8':
+                # Chat spans are located in UTF-8 bytes
+                source = to_utf8(source.read_bytes())
+        
+        self.report.details['json_backend'] = self.json_backend.name
+        with self._timed('parse'):
+            result = parse_account_export(source, self.json_backend.name, max_workers, self.tz, self.aggregators)
+        
+        self.report.details['chats'] = len(result.chats)
+        self.report.messages = len(result)
+        return result
+    
+    def _get_raw_messages(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the raw message list of an export.
+        
+        Full-account exports have no top-level message list; their chats
+        are flattened in export order.
+        
+        Args:
+            data: Decoded export
+            
+        Returns:
+            List of raw message dictionaries
+        """
+        if 'messages' in data or 'chats' not in data:
+            return data.get('messages', [])
+        
+        raw_messages = []
+        for section in ('chats', 'left_chats'):
+            for chat in data.get(section, {}).get('list', []):
+                raw_messages.extend(chat.get('messages', []))
+        return raw_messages
     
     def _parse_message(self, raw_msg: Dict[str, Any]) -> Optional[Message]:
         """
@@ -76,12 +290,8 @@ class TelegramParser(BaseParser):
         """
         try:
             # Extract basic fields
-            date_str = raw_msg.get('date', '')
             sender = raw_msg.get('from', 'Unknown')
             
-            # Parse datetime
-            parsed_datetime = self._parse_datetime(date_str)
-            
             # Extract text content
             text = self._extract_text(raw_msg)
             
@@ -92,6 +302,9 @@ class TelegramParser(BaseParser):
             if not text and not media_type:
                 return None
             
+            # Parse datetime
+            parsed_datetime = self._parse_datetime(raw_msg)
+            
             return Message(
                 datetime=parsed_datetime,
                 sender=sender,
@@ -103,29 +316,38 @@ class TelegramParser(BaseParser):
             logger.warning(f"Failed to parse message: {e}")
             return None
     
-    def _parse_datetime(self, date_str: str) -> datetime:
+    def _parse_datetime(self, raw_msg: Dict[str, Any]) -> datetime:
         """
         Parse datetime from Telegram format.
         
+        With a timezone set, the integer ``date_unixtime`` is used when
+        present; otherwise the ISO ``date`` (e.g. "2023-01-15T10:30:45") is
+        the exported wall-clock time.
+        
         Args:
-            date_str: Date string from Telegram JSON
+            raw_msg: Raw message dictionary
             
         Returns:
             Parsed datetime object
+            
+        Raises:
+            ValueError: If the message carries no parseable timestamp
         """
+        date_str = raw_msg.get('date')
+        unixtime = raw_msg.get('date_unixtime')
+        
+        if unixtime and (self._zone or not date_str):
+            return datetime.fromtimestamp(int(unixtime), tz=self._zone)
+        
         if not date_str:
-            return datetime.now()
+            raise ValueError("Message has no timestamp")
         
-        # Telegram uses ISO format: "2023-01-15T10:30:45"
-        try:
-            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        except ValueError:
-            # Try alternative format without timezone
-            try:
-                return datetime.strptime(date_str[:19], "%Y-%m-%dT%H:%M:%S")
-            except ValueError:
-                logger.warning(f"Could not parse datetime: {date_str}")
-                return datetime.now()
+        parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        if self._zone:
+            if parsed.tzinfo is None:
+                return parsed.replace(tzinfo=self._zone)
+            return parsed.astimezone(self._zone)
+        return parsed
     
     def _extract_text(self, raw_msg: Dict[str, Any]) -> str:
         """
@@ -203,15 +425,4 @@ class TelegramParser(BaseParser):
         Returns:
             Media type based on extension
         """
-        filename_lower = filename.lower()
-        
-        if any(filename_lower.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-            return 'image'
-        elif any(filename_lower.endswith(ext) for ext in ['.mp4', '.avi', '.mov', '.webm']):
-            return 'video'
-        elif any(filename_lower.endswith(ext) for ext in ['.mp3', '.ogg', '.wav', '.m4a']):
-            return 'audio'
-        elif any(filename_lower.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.txt']):
-            return 'document'
-        else:
-            return 'file'
\ No newline at end of file
+        return media_type_from_filename(filename)
@@ -0,0 +1,329 @@
+"""
+Parallel parsing of Telegram full-account exports.
+
+A full account export keeps every chat in ``chats.list[*]`` (and
+``left_chats.list[*]``) of a single ``result.json``. The parent process
+never decodes that file: it only locates the byte span of each chat, and
+worker processes decode and parse one chat each. Results come back as
+columns tagged with the chat id, so the parent holds the raw bytes and
+the parsed columns but never a JSON tree. Aggregators are updated in the
+workers, one empty copy per chat, and merged back in export order.
+"""
+
+import io
+import mmap
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+from models.message import Message
+from .aggregators import Aggregator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Top-level sections holding chat lists
+CHAT_SECTIONS = (b'chats', b'left_chats')
+
+COLUMNS = ('chat_id', 'datetime', 'sender', 'text', 'media_type')
+
+# Any run of non-bracket bytes and whole strings, followed by one bracket
+# (unrolled so that every byte matches only one way, which keeps failing
+# matches linear without possessive quantifiers)
+_BRACKET = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*([\[\]{}])', re.DOTALL)
+
+# The key of a value that opens right after it
+_TRAILING_KEY = re.compile(rb'"((?:[^"\\]|\\.)*)"\s*:\s*$')
+
+# Indentation of the first key of a pretty-printed document
+_FIRST_INDENT = re.compile(rb'\A\s*\{\r?\n([ \t]+)"')
+
+
+@dataclass
+class ChatStats:
+    """
+    Per-chat statistics of an account export.
+
+    Attributes:
+        chat_id: Telegram chat id
+        name: Chat name
+        chat_type: Telegram chat type (e.g. 'personal_chat')
+        messages: Number of parsed messages
+        participants: Number of distinct senders
+        first_message: Timestamp of the earliest message
+        last_message: Timestamp of the latest message
+        parse_seconds: Time the worker spent on the chat
+    """
+    chat_id: Any
+    name: Optional[str]
+    chat_type: Optional[str]
+    messages: int
+    participants: int
+    first_message: Optional[datetime]
+    last_message: Optional[datetime]
+    parse_seconds: float
+
+
+@dataclass
+class AccountParseResult:
+    """
+    Parsed account export in columnar form.
+
+    Attributes:
+        columns: Column name → values, one row per message, tagged by chat_id
+        chats: Statistics of each chat, in export order
+    """
+    columns: Dict[str, list] = field(default_factory=lambda: {name: [] for name in COLUMNS})
+    chats: List[ChatStats] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.columns['chat_id'])
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Build a DataFrame with one row per message."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.columns)
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        return df
+
+    def chat_dataframe(self) -> 'pd.DataFrame':
+        """Build a DataFrame with one row per chat."""
+        import pandas as pd
+
+        return pd.DataFrame([vars(stats) for stats in self.chats])
+
+    def to_messages(self) -> List[Message]:
+        """Convert the rows back to Message objects."""
+        return [
+            Message(datetime=timestamp, sender=sender, text=text, media_type=media_type)
+            for timestamp, sender, text, media_type in zip(
+                self.columns['datetime'],
+                self.columns['sender'],
+                self.columns['text'],
+                self.columns['media_type']
+            )
+        ]
+
+
+def find_chat_spans(buffer: Union[bytes, mmap.mmap]) -> List[Tuple[int, int]]:
+    """
+    Locate the byte span of every chat object in an account export.
+
+    Pretty-printed exports (as written by Telegram Desktop) are split on
+    their indentation, since raw newlines can only occur between tokens.
+    Other layouts fall back to a bracket scanner that skips strings.
+
+    Args:
+        buffer: The whole export
+
+    Returns:
+        List of (start, end) offsets, one per chat, in export order
+    """
+    spans = _pretty_chat_spans(buffer)
+    if spans is None:
+        spans = _scanned_chat_spans(buffer)
+    return spans
+
+
+def _pretty_chat_spans(buffer: Union[bytes, mmap.mmap]) -> Optional[List[Tuple[int, int]]]:
+    """Split a pretty-printed export on its indentation, or return None."""
+    match = _FIRST_INDENT.match(buffer[:256])
+    if not match:
+        return None
+
+    unit = match.group(1)
+    newline = b'\r\n' if b'\r\n' in match.group(0) else b'\n'
+    spans = []
+
+    for section in CHAT_SECTIONS:
+        section_start = buffer.find(newline + unit + b'"' + section + b'": {')
+        if section_start < 0:
+            continue
+        # Everything is searched within the section, so no span can leak into the next one
+        section_end = buffer.find(newline + unit + b'}', section_start)
+        if section_end < 0:
+            return None
+        list_key = newline + unit * 2 + b'"list": ['
+        list_start = buffer.find(list_key, section_start, section_end)
+        if list_start < 0:
+            continue
+        if buffer[list_start + len(list_key):list_start + len(list_key) + 1] == b']':
+            # An empty list is written on one line
+            continue
+        list_end = buffer.find(newline + unit * 2 + b']', list_start, section_end)
+        if list_end < 0:
+            return None
+
+        chat_open = newline + unit * 3 + b'{'
+        chat_close = newline + unit * 3 + b'}'
+        position = list_start
+        while True:
+            start = buffer.find(chat_open, position, list_end)
+            if start < 0:
+                break
+            end = buffer.find(chat_close, start, list_end)
+            if end < 0:
+                return None
+            spans.append((start + len(newline) + len(unit) * 3, end + len(chat_close)))
+            position = end + len(chat_close)
+
+    return spans
+
+
+def _scanned_chat_spans(buffer: Union[bytes, mmap.mmap]) -> List[Tuple[int, int]]:
+    """Find chat spans by tracking bracket depth, skipping over strings."""
+    spans = []
+    path: List[Optional[bytes]] = []
+    chat_start = None
+    previous_end = 0
+
+    # Each match starts where the previous one ended; after a failed match
+    # (a truncated document) nothing but filler or an open string is left
+    while True:
+        match = _BRACKET.match(buffer, previous_end)
+        if match is None:
+            break
+        bracket = match.group(1)
+        if bracket in (b'{', b'['):
+            filler = buffer[previous_end:match.start(1)]
+            key = _TRAILING_KEY.search(filler)
+            path.append(key.group(1) if key else None)
+            if len(path) == 4 and path[1] in CHAT_SECTIONS and path[2] == b'list':
+                chat_start = match.start(1)
+        else:
+            if len(path) == 4 and chat_start is not None:
+                spans.append((chat_start, match.end(1)))
+                chat_start = None
+            path.pop()
+        previous_end = match.end(1)
+
+    return spans
+
+
+_ChatTask = Tuple[Union[str, bytes], int, int, Optional[str], Optional[str], List[Aggregator]]
+
+
+def _parse_chat(task: _ChatTask) -> Tuple[Dict[str, list], ChatStats, List[Aggregator]]:
+    """
+    Worker: decode and parse one chat.
+
+    Args:
+        task: (path or chat bytes, start, end, JSON backend name, timezone,
+            empty aggregators)
+
+    Returns:
+        Chat columns, chat statistics and the chat's aggregators
+    """
+    from .telegram import TelegramParser
+
+    source, start, end, json_backend, tz, aggregators = task
+    started = time.perf_counter()
+
+    if isinstance(source, str):
+        with open(source, 'rb') as stream:
+            stream.seek(start)
+            source = stream.read(end - start)
+
+    # A chat object has the same layout as a single-chat export
+    parser = TelegramParser(io.BytesIO(source), json_backend=json_backend, tz=tz)
+    for aggregator in aggregators:
+        parser.add_aggregator(aggregator)
+    messages = parser.parse()
+    chat = parser.report.details
+
+    chat_id = chat.get('chat_id')
+    columns = {
+        'chat_id': [chat_id] * len(messages),
+        'datetime': [msg.datetime for msg in messages],
+        'sender': [msg.sender for msg in messages],
+        'text': [msg.text for msg in messages],
+        'media_type': [msg.media_type for msg in messages],
+    }
+    timestamps = columns['datetime']
+    stats = ChatStats(
+        chat_id=chat_id,
+        name=chat.get('chat_name'),
+        chat_type=chat.get('chat_type'),
+        messages=len(messages),
+        participants=len(set(columns['sender'])),
+        first_message=min(timestamps) if timestamps else None,
+        last_message=max(timestamps) if timestamps else None,
+        parse_seconds=time.perf_counter() - started
+    )
+    return columns, stats, aggregators
+
+
+def parse_account_export(
+    source: Union[Path, bytes],
+    json_backend: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    tz: Optional[str] = None,
+    aggregators: Sequence[Aggregator] = ()
+) -> AccountParseResult:
+    """
+    Parse every chat of a full-account export in a process pool.
+
+    With a path, the file is memory-mapped for span detection and each
+    worker reads its own chat from disk. With bytes, each chat's slice is
+    shipped to its worker; at most two chats per worker are in flight.
+
+    Args:
+        source: Path to result.json or its content
+        json_backend: Name of the JSON backend used by the workers
+        max_workers: Size of the process pool (defaults to the CPU count)
+        tz: Timezone passed on to the workers' TelegramParser
+        aggregators: Aggregators updated with every parsed message; each
+            worker fills an empty copy, merged back in export order
+
+    Returns:
+        AccountParseResult with chat-tagged columns and per-chat statistics
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if isinstance(source, Path):
+        with source.open('rb') as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            spans = find_chat_spans(buffer)
+        tasks = [(str(source), start, end) for start, end in spans]
+    else:
+        spans = find_chat_spans(source)
+        tasks = [(source, start, end) for start, end in spans]
+
+    def make_task(index: int) -> _ChatTask:
+        path_or_bytes, start, end = tasks[index]
+        spawned = [aggregator.spawn() for aggregator in aggregators]
+        if isinstance(path_or_bytes, bytes):
+            return path_or_bytes[start:end], 0, end - start, json_backend, tz, spawned
+        return path_or_bytes, start, end, json_backend, tz, spawned
+
+    outputs: Dict[int, Tuple[Dict[str, list], ChatStats, List[Aggregator]]] = {}
+    # Spawned rather than forked, since callers may be threaded
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn')) as executor:
+        pending = {}
+        next_index = 0
+        while next_index < len(tasks) or pending:
+            # Bound the number of chat slices in flight
+            while next_index < len(tasks) and len(pending) < max_workers * 2:
+                pending[executor.submit(_parse_chat, make_task(next_index))] = next_index
+                next_index += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outputs[pending.pop(future)] = future.result()
+
+    result = AccountParseResult()
+    for index in range(len(tasks)):
+        columns, stats, chat_aggregators = outputs.pop(index)
+        for name in COLUMNS:
+            result.columns[name].extend(columns[name])
+        result.chats.append(stats)
+        for aggregator, chat_aggregator in zip(aggregators, chat_aggregators):
+            aggregator.merge(chat_aggregator)
+
+    return result
@@ -0,0 +1,538 @@
+"""
+Telegram chat parser for HTML exports.
+
+Telegram Desktop exports a chat as HTML by default, split into pages of
+about a thousand messages: ``messages.html``, ``messages2.html`` and so on.
+Each page is tokenized while it is read, keeping only the state of the
+message being read instead of a document tree. Telegram writes regular,
+machine-generated markup, so a tag-level regular expression scanner
+replaces ``html.parser``, which is several times slower on these pages.
+Pages are independent, so large exports are parsed in worker processes. A
+message continuing its sender's run carries the ``joined`` class and no
+sender name; its sender is taken from the previous message, also across
+page boundaries.
+
+Output matches ``TelegramParser``: wall-clock timestamps by default, the
+same media type names and the same validation.
+"""
+
+import io
+import logging
+import os
+import re
+import zipfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from html import unescape
+from multiprocessing import get_context
+from pathlib import Path, PurePosixPath
+from typing import Dict, IO, Iterator, List, Optional, Sequence, Set, Tuple, Union, TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from models.message import Message
+from .archive import ZipExport, is_zip, media_type_from_filename
+from .base import BaseParser
+from .encoding import iter_decoded
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Pages of an export: messages.html is the first, messages2.html the second
+PAGE_PATTERN = re.compile(r'(?:^|/)messages(\d*)\.html$')
+
+# Exports smaller than this are parsed in-process; a pool costs more than it saves
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Bytes of a page decoded and fed to the tokenizer at once
+FEED_CHUNK_SIZE = 256 * 1024
+
+# Classes of media elements, with the media type the JSON export reports;
+# None means the type is derived from the file name, as for JSON 'file'
+MEDIA_CLASSES: Dict[str, Optional[str]] = {
+    'photo_wrap': 'photo',
+    'media_photo': 'photo',
+    'video_file_wrap': 'video_file',
+    'animated_wrap': 'animation',
+    'sticker_wrap': 'sticker',
+    'media_voice_message': 'voice_message',
+    'media_video': 'video_message',
+    'media_audio_file': 'audio_file',
+    'media_file': None,
+}
+
+# Export folders that hold the page styling rather than chat media
+ASSET_FOLDERS = ('css', 'js', 'images')
+
+COLUMNS = ('date', 'offset', 'sender', 'text', 'media_type')
+
+_TRACKED_TAGS = ('div', 'span', 'a')
+_CAPTURED_ROLES = ('text', 'from_name')
+
+# A script element, a comment or declaration, a tag, or a run of text
+_TOKEN = re.compile(
+    r'<script\b.*?</script\s*>|<!.*?>|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|([^<]+)',
+    re.DOTALL | re.IGNORECASE
+)
+
+_ATTRIBUTES = {
+    name: re.compile(r'(?:^|\s)' + name + r'\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+    for name in ('class', 'href', 'title')
+}
+
+
+def _attribute(attribute_text: str, name: str) -> Optional[str]:
+    """Return the unescaped value of one attribute of a start tag, if present."""
+    match = _ATTRIBUTES[name].search(attribute_text)
+    if match is None:
+        return None
+    value = match.group(1)
+    if value is None:
+        value = match.group(2)
+    return unescape(value) if '&' in value else value
+
+
+def _parse_title(title: str) -> Tuple[datetime, Optional[int]]:
+    """
+    Parse a date tooltip such as "31.03.2023 16:13:20 UTC+02:00".
+
+    Returns:
+        Wall-clock time and the UTC offset in seconds, if the export has one
+    """
+    date = datetime(
+        int(title[6:10]), int(title[3:5]), int(title[0:2]),
+        int(title[11:13]), int(title[14:16]), int(title[17:19])
+    )
+    offset = None
+    zone = title[20:].strip()
+    if zone.startswith('UTC') and len(zone) > 3:
+        hours, _, minutes = zone[4:].partition(':')
+        offset = (int(hours) * 3600 + int(minutes or 0) * 60) * (-1 if zone[3] == '-' else 1)
+    return date, offset
+
+
+class _PageTokenizer:
+    """
+    Collects the messages of one page into columns.
+
+    Only div, span and a elements are tracked, each with the role it plays
+    for the message being read ('text', 'from_name', 'skip', ...); children
+    inherit their parent's role.
+    """
+
+    def __init__(self):
+        self._pending = ''
+        self.columns: Dict[str, list] = {name: [] for name in COLUMNS}
+        self.chat_name: Optional[str] = None
+        self.links: List[str] = []
+        self.last_sender: Optional[str] = None
+        self._roles: List[Optional[str]] = []
+        self._message_depth: Optional[int] = None
+        self._header: List[str] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._joined = False
+        self._title: Optional[str] = None
+        self._sender: List[str] = []
+        self._text: List[str] = []
+        self._media: Optional[str] = None
+        self._has_media = False
+
+    def feed(self, data: str) -> None:
+        """
+        Tokenize the next piece of the page.
+
+        Input after the last '<' is held back until more arrives, so no tag,
+        and no character reference in the text before it, is ever split.
+        """
+        data = self._pending + data
+        cut = data.rfind('<')
+        if cut <= 0:
+            self._pending = data
+            return
+        self._pending = data[cut:]
+        self._scan(data[:cut])
+
+    def close(self) -> None:
+        """Tokenize whatever input is left."""
+        self._scan(self._pending)
+        self._pending = ''
+
+    def _scan(self, data: str) -> None:
+        for match in _TOKEN.finditer(data):
+            closing, tag, attributes, text = match.groups()
+            if text is not None:
+                # Only text inside a message text or sender name is kept
+                if self._roles and self._roles[-1] in _CAPTURED_ROLES:
+                    self.handle_data(unescape(text) if '&' in text else text)
+            elif tag is None:
+                continue
+            elif closing:
+                self.handle_endtag(tag.lower())
+            else:
+                self.handle_starttag(tag.lower(), attributes)
+
+    def handle_starttag(self, tag: str, attribute_text: str) -> None:
+        if tag == 'br':
+            if self._roles and self._roles[-1] == 'text':
+                self._text.append('\n')
+            return
+        if tag not in _TRACKED_TAGS:
+            return
+
+        classes = (_attribute(attribute_text, 'class') or '').split()
+        parent = self._roles[-1] if self._roles else None
+        role = parent
+
+        if self._message_depth is None:
+            if tag == 'div' and 'message' in classes:
+                if 'default' in classes:
+                    role = 'message'
+                    self._message_depth = len(self._roles) + 1
+                    self._joined = 'joined' in classes
+                else:
+                    # Service messages (date separators, joins, pins)
+                    role = 'skip'
+            elif tag == 'div' and 'page_header' in classes:
+                role = 'header'
+            elif tag == 'div' and 'text' in classes and parent == 'header':
+                role = 'text'
+            elif tag == 'a' and 'pagination' in classes:
+                href = _attribute(attribute_text, 'href')
+                if href:
+                    self.links.append(href)
+        elif parent == 'skip':
+            pass
+        elif tag == 'div' and 'text' in classes:
+            role = 'text'
+        elif 'from_name' in classes:
+            # The original sender of a forwarded message is not the sender
+            role = 'skip' if parent == 'forwarded' else 'from_name'
+        elif 'reply_to' in classes or (parent == 'from_name' and 'details' in classes):
+            role = 'skip'
+        elif 'forwarded' in classes:
+            role = 'forwarded'
+        elif 'date' in classes and self._title is None and parent == 'message':
+            self._title = _attribute(attribute_text, 'title')
+        elif not self._has_media:
+            for name in classes:
+                if name in MEDIA_CLASSES:
+                    media_type = MEDIA_CLASSES[name]
+                    self._media = media_type or media_type_from_filename(_attribute(attribute_text, 'href') or '')
+                    self._has_media = True
+                    break
+
+        self._roles.append(role)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag not in _TRACKED_TAGS or not self._roles:
+            return
+        role = self._roles.pop()
+        if self._message_depth is not None and len(self._roles) < self._message_depth:
+            self._message_depth = None
+            self._finish_message()
+        elif role == 'header' and self.chat_name is None and self._header:
+            self.chat_name = ''.join(self._header).strip()
+
+    def handle_data(self, data: str) -> None:
+        role = self._roles[-1]
+        if role == 'text':
+            if self._message_depth is not None:
+                self._text.append(data)
+            else:
+                self._header.append(data)
+        elif role == 'from_name':
+            self._sender.append(data)
+
+    def _finish_message(self) -> None:
+        """Record the message just closed; a joined message takes the previous sender."""
+        sender = None if self._joined else ''.join(self._sender).strip()
+        if sender is None:
+            sender = self.last_sender
+        else:
+            self.last_sender = sender
+
+        text = ''.join(self._text).strip()
+        if self._title is not None and (text or self._media):
+            date, offset = _parse_title(self._title)
+            columns = self.columns
+            columns['date'].append(date)
+            columns['offset'].append(offset)
+            columns['sender'].append(sender)
+            columns['text'].append(text)
+            columns['media_type'].append(self._media)
+        self._reset()
+
+
+def _parse_page(task: Tuple[str, Union[str, bytes], Optional[str]]) -> Tuple[Dict[str, list], Optional[str], List[str], Optional[str]]:
+    """
+    Worker: tokenize one page into columns.
+
+    Args:
+        task: (kind, path or page bytes, zip member); kind is 'file',
+            'zip' or 'bytes'
+
+    Returns:
+        Page columns (sender None for leading joined messages), the sender
+        of the page's last message, its pagination links and the chat name
+    """
+    kind, source, member = task
+    tokenizer = _PageTokenizer()
+    if kind == 'file':
+        stream = open(source, 'rb')
+    elif kind == 'zip':
+        archive = zipfile.ZipFile(source)
+        stream = archive.open(member)
+    else:
+        stream = io.BytesIO(source)
+
+    try:
+        # Telegram writes UTF-8; the text is kept exactly as exported
+        for chunk in iter_decoded(stream, normalize=False, chunk_size=FEED_CHUNK_SIZE):
+            tokenizer.feed(chunk)
+        tokenizer.close()
+    finally:
+        stream.close()
+        if kind == 'zip':
+            archive.close()
+
+    return tokenizer.columns, tokenizer.last_sender, tokenizer.links, tokenizer.chat_name
+
+
+def find_pages(names: Sequence[str]) -> List[str]:
+    """
+    Pick the pages of one chat export out of a list of files.
+
+    When several exports are present, the one whose ``messages.html`` is
+    the least deeply nested is used.
+
+    Args:
+        names: File paths, '/'-separated
+
+    Returns:
+        Paths of the pages in page order
+    """
+    pages = [(PurePosixPath(name), PAGE_PATTERN.search(name)) for name in names]
+    pages = [(path, int(match.group(1) or 1)) for path, match in pages if match]
+    first = [path for path, number in pages if number == 1]
+    if not first:
+        return []
+
+    folder = min(first, key=lambda path: (len(path.parts), str(path))).parent
+    return [str(path) for path, number in sorted(
+        ((path, number) for path, number in pages if path.parent == folder), key=lambda page: page[1]
+    )]
+
+
+class TelegramHTMLParser(BaseParser):
+    """
+    Parser for Telegram Desktop HTML exports.
+
+    Accepts the export folder or zip, any of its ``messages*.html`` pages
+    (all pages next to it are read), or a single uploaded page.
+    """
+
+    def __init__(
+        self,
+        file_path: Union[str, Path, IO],
+        tz: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Initialize the parser with a path or file object.
+
+        Args:
+            file_path: Path to the export or file-like object
+            tz: IANA timezone (e.g. 'Europe/Rome') for timezone-aware
+                timestamps, converted from the UTC offset of each message
+                when the export has one; by default the naive wall-clock
+                time of the export is kept
+            max_workers: Size of the process pool for large exports
+                (defaults to the CPU count; 1 parses in-process)
+        """
+        super().__init__(file_path)
+        self.tz = tz
+        self._zone = ZoneInfo(tz) if tz else None
+        self.max_workers = max_workers
+
+    def parse(self, verbose: bool = False) -> List[Message]:
+        """
+        Parse every page of the export.
+
+        Args:
+            verbose: Whether to show a progress bar when no observer is attached
+
+        Returns:
+            List of parsed Message objects in export order
+        """
+        messages = list(self.iter_messages(verbose=verbose))
+        self.report.messages = len(messages)
+        return messages
+
+    def iter_messages(self, verbose: bool = False) -> Iterator[Message]:
+        """
+        Iterate over parsed messages in export order.
+
+        Messages of a page are emitted as soon as it and all pages before
+        it have been parsed.
+
+        Args:
+            verbose: Whether to show a progress bar when no observer is attached
+
+        Returns:
+            Iterator over valid Message objects
+        """
+        with self._tracking(verbose, "Parsing Telegram messages"):
+            for columns in self._iter_pages():
+                rows = zip(columns['date'], columns['offset'], columns['sender'], columns['text'], columns['media_type'])
+                parsed = (
+                    Message(datetime=self._to_datetime(date, offset), sender=sender, text=text, media_type=media_type)
+                    for date, offset, sender, text, media_type in self._track(rows)
+                )
+                yield from self._iter_valid_messages(parsed)
+
+    def parse_dataframe(self) -> 'pd.DataFrame':
+        """
+        Parse the export into a DataFrame with column-wise timestamp handling.
+
+        Returns:
+            DataFrame with datetime, sender, text and media_type columns
+        """
+        import pandas as pd
+
+        with self._tracking(desc="Parsing Telegram messages"):
+            pages = list(self._iter_pages())
+            columns = {name: [value for page in pages for value in page[name]] for name in COLUMNS}
+
+            with self._timed('datetimes'):
+                dates = pd.to_datetime(pd.Series(columns.pop('date'), dtype=object))
+                offsets = pd.to_timedelta(pd.Series(columns.pop('offset'), dtype='float64'), unit='s')
+                if self.tz:
+                    # Exact instants where the export gives an offset, wall-clock time otherwise
+                    exact = (dates - offsets).dt.tz_localize('UTC').dt.tz_convert(self.tz)
+                    local = dates.dt.tz_localize(self.tz, ambiguous='NaT', nonexistent='NaT')
+                    # Whole seconds, like TelegramParser's epoch conversion
+                    dates = exact.where(offsets.notna(), local).dt.as_unit('s')
+            df = pd.DataFrame({'datetime': dates, **columns})
+
+            # Same validation as the object path
+            valid = df['datetime'].notna() & df['sender'].notna() & (df['sender'] != '')
+            df = df[valid].reset_index(drop=True)
+            self._aggregate_frame(df)
+            self._finish_progress(len(df))
+
+        self.report.messages = len(df)
+        return df
+
+    def _to_datetime(self, date: datetime, offset: Optional[int]) -> datetime:
+        """Timestamp of a message, as TelegramParser would report it."""
+        if self._zone is None:
+            return date
+        if offset is None:
+            return date.replace(tzinfo=self._zone)
+        return date.replace(tzinfo=timezone(timedelta(seconds=offset))).astimezone(self._zone)
+
+    def _iter_pages(self) -> Iterator[Dict[str, list]]:
+        """
+        Parse the pages in order, resolving joined messages across pages.
+
+        Returns:
+            Iterator over page columns with every sender filled in
+        """
+        with self._timed('read'):
+            tasks, sizes, names = self._page_tasks()
+        if not tasks:
+            raise ValueError("No Telegram HTML pages (messages.html) found in the export")
+        if self._tracker is not None:
+            self._tracker.set_totals(total_bytes=sum(sizes))
+
+        workers = self.max_workers or os.cpu_count() or 1
+        if sum(sizes) < PARALLEL_MIN_BYTES or len(tasks) == 1:
+            workers = 1
+        self.report.details.update(pages=len(tasks), workers=workers)
+
+        # Workers are spawned rather than forked: callers such as the app parse from threads
+        pool = (
+            ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context('spawn'))
+            if workers > 1 else nullcontext()
+        )
+        with pool as executor:
+            results = executor.map(_parse_page, tasks) if executor is not None else map(_parse_page, tasks)
+            last_sender = None
+            links = set()
+            for index, (columns, page_last_sender, page_links, chat_name) in enumerate(results):
+                if index == 0 and chat_name:
+                    self.report.details['chat_name'] = chat_name
+                links.update(page_links)
+                if self._tracker is not None:
+                    self._tracker.add_bytes(sizes[index])
+
+                # Joined messages at the top of a page continue the previous page
+                senders = columns['sender']
+                for row, sender in enumerate(senders):
+                    if sender is not None:
+                        break
+                    senders[row] = last_sender or 'Unknown'
+                last_sender = page_last_sender or last_sender
+                yield columns
+
+        missing = sorted(link for link in links if PurePosixPath(link).name not in names)
+        if missing:
+            logger.warning(f"Export is missing {len(missing)} linked pages (e.g. {missing[0]}); upload the whole export folder or zip")
+            self.report.details['missing_pages'] = missing
+
+    def _page_tasks(self) -> Tuple[List[Tuple[str, Union[str, bytes], Optional[str]]], List[int], Set[str]]:
+        """
+        Locate the pages of the export as worker tasks.
+
+        Returns:
+            Worker tasks, the size in bytes of each page and the page file names
+        """
+        if self.file_path is not None and not is_zip(self._read_head()):
+            if self.file_path.is_dir():
+                files = {path.relative_to(self.file_path).as_posix(): path for path in self.file_path.rglob('messages*.html')}
+                paths = [files[name] for name in find_pages(list(files))]
+            elif PAGE_PATTERN.search(self.file_path.name):
+                # A page of an extracted export: read its sibling pages too
+                paths = [self.file_path.parent / name for name in find_pages(
+                    [path.name for path in self.file_path.parent.glob('messages*.html')]
+                )]
+            else:
+                paths = [self.file_path]
+            return (
+                [('file', str(path), None) for path in paths],
+                [path.stat().st_size for path in paths],
+                {path.name for path in paths}
+            )
+
+        with self._open_source() as source:
+            if not is_zip(source.read(4)):
+                source.seek(0)
+                content = source.read()
+                name = PurePosixPath(getattr(source, 'name', '') or 'messages.html').name
+                return [('bytes', content, None)], [len(content)], {name}
+
+            with ZipExport(source) as archive:
+                infos = {info.filename: info for info in archive.zip_file.infolist() if not info.is_dir()}
+                pages = find_pages(list(infos))
+                self.media_manifest = [
+                    entry for entry in archive.media_manifest()
+                    if not entry.filename.endswith('.html') and not set(PurePosixPath(entry.filename).parts) & set(ASSET_FOLDERS)
+                ]
+                sizes = [infos[name].file_size for name in pages]
+                names = {PurePosixPath(name).name for name in pages}
+                if self.file_path is not None:
+                    return [('zip', str(self.file_path), name) for name in pages], sizes, names
+                return [('bytes', archive.zip_file.read(name), name) for name in pages], sizes, names
+
+    def _read_head(self) -> bytes:
+        """Leading bytes of a file path (empty for folders)."""
+        if self.file_path.is_dir():
+            return b''
+        with self.file_path.open('rb') as stream:
+            return stream.read(4)
+
@@ -4,14 +4,15 @@ WhatsApp chat parser implementation.
 
 import re
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
 import logging
 
-from tqdm import tqdm
-
 from models.message import Message
 from .base import BaseParser
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,15 @@ class WhatsAppParser(BaseParser):
     """
     Parser for WhatsApp chat exports.
     
-    Handles the standard WhatsApp chat export format:
-    DD/MM/YY, HH:MM - Sender: Message text
+    Handles the standard WhatsApp chat export formats:
+    DD/MM/YY, HH:MM - Sender: Message text (Android)
+    [DD/MM/YY, HH:MM:SS] Sender: Message text (iOS)
     """
     
+    # iOS zips name the chat "_chat.txt", Android ones "WhatsApp Chat with <name>.txt"
+    ARCHIVE_MEMBER_NAMES = ('_chat.txt',)
+    ARCHIVE_MEMBER_SUFFIXES = ('.txt',)
+    
     # Regex pattern for WhatsApp message format
     MESSAGE_PATTERN = re.compile(
         r'^(\d{2}/\d{2}/\d{2}), (\d{2}:\d{2}) - ([^:]+): (.*)$'
@@ -34,32 +40,105 @@ class WhatsAppParser(BaseParser):
         r'^(\d{1,2}/\d{1,2}/\d{2,4}), (\d{1,2}:\d{2}(?:\s*[AP]M)?) - ([^:]+): (.*)$'
     )
     
-    def parse(self, verbose: bool = False) -> List[Message]:
+    # iOS exports wrap the timestamp in brackets and include seconds
+    IOS_MESSAGE_PATTERN = re.compile(
+        r'^\u200e?\[(\d{1,2}/\d{1,2}/\d{2,4}), (\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?)\] ([^:]+): (.*)$'
+    )
+    
+    # Header patterns of all formats in a single expression, for the vectorized engine
+    VECTORIZED_HEADER_PATTERN = (
+        r'^\s*(?:' '\u200e' r'?\[(?P<ios_date>\d{1,2}/\d{1,2}/\d{2,4}), '
+        r'(?P<ios_time>\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?)\] '
+        r'|(?P<date>\d{1,2}/\d{1,2}/\d{2,4}), (?P<time>\d{1,2}:\d{2}(?:\s*[AP]M)?) - )'
+        r'(?P<sender>[^:]+): (?P<text>.*?)\s*$'
+    )
+    
+    # Datetime formats, tried in order
+    DATETIME_FORMATS = [
+        "%d/%m/%y %H:%M",
+        "%d/%m/%Y %H:%M",
+        "%m/%d/%y %H:%M",
+        "%m/%d/%Y %H:%M",
+        "%d/%m/%y %I:%M %p",
+        "%d/%m/%Y %I:%M %p",
+        "%d/%m/%y %H:%M:%S",
+        "%d/%m/%Y %H:%M:%S",
+        "%m/%d/%y %I:%M:%S %p",
+        "%m/%d/%Y %I:%M:%S %p",
+    ]
+    
+    # Text fragments marking media messages, checked in order
+    MEDIA_INDICATORS = {
+        '<Media omitted>': 'media',
+        'image omitted': 'image',
+        'video omitted': 'video',
+        'audio omitted': 'audio',
+        'document omitted': 'document',
+        'sticker omitted': 'sticker',
+        'GIF omitted': 'gif',
+        '.jpg': 'image',
+        '.png': 'image',
+        '.mp4': 'video',
+        '.pdf': 'document',
+    }
+    
+    ENGINES = ('object', 'vectorized')
+    
+    def parse(self, verbose: bool = False, engine: str = 'object') -> Union[List[Message], 'pd.DataFrame']:
         """
         Parse WhatsApp chat file.
         
+        The 'object' engine walks the file line by line and builds Message
+        objects. The 'vectorized' engine runs pandas string kernels over all
+        lines at once and returns a DataFrame with the same columns and
+        semantics as ``create_dataframe`` applied to the object result.
+        
         Args:
-            verbose: Whether to show progress bar during parsing
+            verbose: Whether to show a progress bar when no observer is attached
+            engine: 'object' or 'vectorized'
             
         Returns:
-            List of parsed Message objects
+            List of parsed Message objects, or a DataFrame for the vectorized engine
         """
-        messages = []
-        lines = self._get_file_lines()
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Expected one of {self.ENGINES}")
         
-        # Use tqdm for progress if verbose
-        iterator = tqdm(lines, desc="Parsing WhatsApp messages") if verbose else lines
+        self.report.details['engine'] = engine
+        with self._tracking(verbose, "Parsing WhatsApp messages"), self._timed('parse'):
+            if engine == 'vectorized':
+                result = self._parse_vectorized()
+            else:
+                result = list(self.iter_messages(verbose=verbose))
+            self._finish_progress(len(result))
         
+        self.report.messages = len(result)
+        return result
+    
+    def iter_messages(self, verbose: bool = False) -> Iterator[Message]:
+        """
+        Lazily parse the WhatsApp chat file, one message at a time.
+        
+        Args:
+            verbose: Whether to show a progress bar when no observer is attached
+            
+        Returns:
+            Iterator over valid Message objects in file order
+        """
+        with self._tracking(verbose, "Parsing WhatsApp messages"):
+            yield from self._track(self._iter_valid_messages(self._iter_raw_messages()))
+    
+    def _iter_raw_messages(self) -> Iterator[Message]:
+        """Group header and continuation lines into unvalidated messages."""
         current_message = None
         
-        for line in iterator:
+        for line in self._iter_file_lines():
             # Try to parse as a new message
             parsed = self._parse_message_line(line)
             
             if parsed:
-                # If we have a current message, add it to the list
+                # The current message is complete once the next header appears
                 if current_message:
-                    messages.append(current_message)
+                    yield current_message
                 
                 # Start a new message
                 date_str, time_str, sender, text = parsed
@@ -71,10 +150,89 @@ class WhatsAppParser(BaseParser):
         
         # Don't forget the last message
         if current_message:
-            messages.append(current_message)
+            yield current_message
+    
+    def _parse_vectorized(self) -> 'pd.DataFrame':
+        """
+        Parse the whole file with column-wise pandas operations.
+        
+        Returns:
+            DataFrame with datetime, sender, text and media_type columns
+        """
+        import pandas as pd
+        
+        # Arrow-backed strings run the string kernels in C++ when pyarrow is installed
+        try:
+            import pyarrow as pa
+            string_dtype = pd.ArrowDtype(pa.string())
+        except ImportError:
+            string_dtype = 'string'
+        lines = pd.Series(self._iter_file_lines(), dtype=string_dtype)
+        
+        # One regex pass finds every header line; groups of the other format come back empty.
+        # Lines are matched stripped, like the object engine does: "Bob:   " is no header
+        headers = lines.str.strip().str.extract(self.VECTORIZED_HEADER_PATTERN)
+        headers = headers.mask(headers == '')
+        is_header = headers['sender'].notna()
+        
+        # Each line belongs to the most recent header; lines before the first one are dropped
+        group_id = is_header.cumsum()
+        headers = headers[is_header]
+        headers.index = group_id[is_header]
+        
+        # Continuation lines are appended verbatim, one newline each
+        continuation = ~is_header & (group_id > 0)
+        continued_lines = ('\n' + lines[continuation]).astype('string')
+        continued_text = continued_lines.groupby(group_id[continuation]).sum()
+        
+        # Like Message creation: the header text is stripped, continuations are not
+        text = headers['text'].fillna('').str.strip().astype('string')
+        text = text + continued_text.reindex(text.index, fill_value='')
+        
+        # Datetimes are parsed column-wise, one fixed format at a time
+        datetime_str = (
+            headers['date'].fillna(headers['ios_date']) + ' ' +
+            headers['time'].fillna(headers['ios_time'])
+        ).str.strip()
+        # In the unit pandas gives datetime objects (ns before pandas 3, us since)
+        datetime_dtype = pd.Series([datetime(2000, 1, 1)]).dtype
+        parsed_datetime = pd.Series(pd.NaT, index=headers.index, dtype=datetime_dtype)
+        for fmt in self.DATETIME_FORMATS:
+            missing = parsed_datetime.isna()
+            if not missing.any():
+                break
+            parsed_datetime[missing] = pd.to_datetime(datetime_str[missing], format=fmt, errors='coerce')
+        
+        unparsed = parsed_datetime.isna()
+        if unparsed.any():
+            logger.warning(f"Could not parse {int(unparsed.sum())} datetimes, e.g. {datetime_str[unparsed].iloc[0]}")
+            parsed_datetime[unparsed] = pd.Timestamp.now()  # Fallback to current time
+        
+        # Media indicators are matched against the header line, first match wins
+        header_lower = headers['text'].fillna('').str.lower()
+        media_type = pd.Series(None, index=headers.index, dtype=object)
+        for indicator, indicator_type in self.MEDIA_INDICATORS.items():
+            matches = media_type.isna() & header_lower.str.contains(indicator.lower(), regex=False)
+            media_type[matches.astype(bool)] = indicator_type
+        
+        df = pd.DataFrame({
+            'datetime': parsed_datetime,
+            'sender': headers['sender'].str.strip().astype('string'),
+            'text': text,
+            'media_type': media_type
+        })
+        
+        # Same validation as the object engine
+        valid = (df['sender'] != '') & ((df['text'] != '') | df['media_type'].notna())
+        if not valid.all():
+            logger.warning(f"Invalid messages filtered out: {int((~valid).sum())}")
         
-        # Validate messages before returning
-        return self.validate_messages(messages)
+        df = df[valid.astype(bool)].reset_index(drop=True)
+        # Same dtypes as a DataFrame built from Message objects (NaN-backed 'str' on pandas 3)
+        for column in ('sender', 'text', 'media_type'):
+            df[column] = pd.Series(df[column].to_numpy(dtype=object, na_value=None), index=df.index)
+        self._aggregate_frame(df)
+        return df
     
     def _parse_message_line(self, line: str) -> Optional[Tuple[str, str, str, str]]:
         """
@@ -100,6 +258,11 @@ class WhatsAppParser(BaseParser):
         if match:
             return match.groups()
         
+        # Try iOS pattern
+        match = self.IOS_MESSAGE_PATTERN.match(line)
+        if match:
+            return match.groups()
+        
         return None
     
     def _create_message(self, date_str: str, time_str: str, sender: str, text: str) -> Message:
@@ -108,7 +271,7 @@ class WhatsAppParser(BaseParser):
         
         Args:
             date_str: Date string (DD/MM/YY)
-            time_str: Time string (HH:MM)
+            time_str: Time string (HH:MM or HH:MM:SS)
             sender: Sender name
             text: Message text
             
@@ -119,17 +282,8 @@ class WhatsAppParser(BaseParser):
         datetime_str = f"{date_str} {time_str}"
         
         # Try different datetime formats
-        datetime_formats = [
-            "%d/%m/%y %H:%M",
-            "%d/%m/%Y %H:%M",
-            "%m/%d/%y %H:%M",
-            "%m/%d/%Y %H:%M",
-            "%d/%m/%y %I:%M %p",
-            "%d/%m/%Y %I:%M %p",
-        ]
-        
         parsed_datetime = None
-        for fmt in datetime_formats:
+        for fmt in self.DATETIME_FORMATS:
             try:
                 parsed_datetime = datetime.strptime(datetime_str.strip(), fmt)
                 break
@@ -163,22 +317,8 @@ class WhatsAppParser(BaseParser):
         Returns:
             Media type if detected, None otherwise
         """
-        media_indicators = {
-            '<Media omitted>': 'media',
-            'image omitted': 'image',
-            'video omitted': 'video',
-            'audio omitted': 'audio',
-            'document omitted': 'document',
-            'sticker omitted': 'sticker',
-            'GIF omitted': 'gif',
-            '.jpg': 'image',
-            '.png': 'image',
-            '.mp4': 'video',
-            '.pdf': 'document',
-        }
-        
         text_lower = text.lower()
-        for indicator, media_type in media_indicators.items():
+        for indicator, media_type in self.MEDIA_INDICATORS.items():
             if indicator.lower() in text_lower:
                 return media_type
         
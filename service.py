@@ -0,0 +1,612 @@
+"""
+Local HTTP service that parses chat exports in a worker pool.
+
+Endpoints:
+    POST   /jobs?name=chat.txt[&platform=whatsapp]  Upload an export (raw body), returns 202 and the job
+    GET    /jobs/<id>                               Job status and progress
+    GET    /jobs/<id>/result                        Parsed messages as a Parquet file
+    DELETE /jobs/<id>                               Cancel a queued job or delete a finished one
+    GET    /health                                  Pool size and queue usage
+
+Request bodies are copied to a job directory in fixed-size chunks, so an
+upload never has to fit in memory; a worker process then streams the file
+through the parser and writes the messages to Parquet batch by batch.
+The number of unfinished jobs is bounded: when the queue is full, uploads
+are refused with 429 (before the body is sent, for clients that send
+'Expect: 100-continue').
+
+Usage:
+    python service.py --port 8765 --workers 4 --queue 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+logger = logging.getLogger(__name__)
+
+# Bytes copied at once from a request body or to a response
+CHUNK_SIZE = 1024 * 1024
+
+# Messages written to the result file at once
+RESULT_BATCH_SIZE = 50_000
+
+# Minimum seconds between progress updates of a worker
+PROGRESS_INTERVAL = 0.5
+
+DEFAULT_MAX_UPLOAD_MB = 2048
+
+# Refused uploads up to this size are read and discarded so that clients
+# which do not wait for '100 Continue' still receive the response
+DRAIN_LIMIT = 16 * 1024 * 1024
+
+# Finished jobs are deleted after this many seconds
+DEFAULT_RESULT_TTL = 3600
+
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no free slot."""
+
+
+def _write_progress(path: Path, progress: Dict[str, Any]) -> None:
+    """Atomically replace a job's progress file."""
+    temporary = path.with_suffix('.tmp')
+    temporary.write_text(json.dumps(progress))
+    os.replace(temporary, path)
+
+
+def _run_job(
+    input_path: str,
+    name: str,
+    result_path: str,
+    progress_path: str,
+    platform: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Worker: parse an export into a Parquet file.
+
+    Args:
+        input_path: Spooled upload
+        name: Client's file name of the upload, for platform detection
+        result_path: Destination Parquet file
+        progress_path: File receiving periodic progress updates
+        platform: Platform key, or None to detect it
+
+    Returns:
+        Summary with 'messages', 'parser' and 'timings'
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from parsers.registry import open_parser
+    from storage.partitioned import COLUMNS, message_schema
+
+    started = time.perf_counter()
+    progress_file = Path(progress_path)
+    input_bytes = os.path.getsize(input_path)
+    messages = 0
+    last_update = 0.0
+    writer = None
+    columns: Dict[str, list] = {name: [] for name in COLUMNS}
+
+    def flush() -> None:
+        nonlocal writer
+        if not columns['datetime']:
+            return
+        df = pd.DataFrame(columns)
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        if writer is None:
+            writer = pq.ParquetWriter(result_path, message_schema(df), compression='zstd')
+        writer.write_table(pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False))
+        for values in columns.values():
+            values.clear()
+
+    with open(input_path, 'rb') as stream:
+        parser = open_parser(stream, platform, file_name=name)
+        try:
+            for message in parser.iter_messages():
+                columns['datetime'].append(message.datetime)
+                columns['sender'].append(message.sender)
+                columns['text'].append(message.text)
+                columns['media_type'].append(message.media_type)
+                messages += 1
+
+                if len(columns['datetime']) >= RESULT_BATCH_SIZE:
+                    flush()
+                now = time.perf_counter()
+                if now - last_update >= PROGRESS_INTERVAL:
+                    # The stream position shows how much of the upload was consumed
+                    _write_progress(progress_file, {
+                        'messages': messages,
+                        'bytes_read': min(stream.tell(), input_bytes),
+                    })
+                    last_update = now
+            flush()
+            if writer is None:
+                pq.write_table(message_schema().empty_table(), result_path)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return {
+        'messages': messages,
+        'parser': parser.report.parser,
+        'timings': {**parser.report.timings, 'total': time.perf_counter() - started},
+    }
+
+
+@dataclass
+class Job:
+    """
+    A parse job.
+
+    Attributes:
+        id: Job id
+        name: File name of the upload
+        platform: Requested platform key (None to detect)
+        directory: Directory holding the upload, progress and result
+        state: 'uploading', 'queued', 'running', 'done', 'failed' or 'cancelled'
+        created: Submission time (epoch seconds)
+        finished: Completion time, or None
+        input_bytes: Size of the upload
+        summary: Worker summary once done
+        error: Error message if the job failed
+        future: Pool future of the job
+    """
+    id: str
+    name: str
+    platform: Optional[str]
+    directory: Path
+    state: str = 'uploading'
+    created: float = 0.0
+    finished: Optional[float] = None
+    input_bytes: int = 0
+    summary: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    future: Optional[Future] = None
+
+    @property
+    def input_path(self) -> Path:
+        # Never named after the client's file, which could be 'result.parquet'
+        return self.directory / 'upload.bin'
+
+    @property
+    def result_path(self) -> Path:
+        return self.directory / 'result.parquet'
+
+    @property
+    def progress_path(self) -> Path:
+        return self.directory / 'progress.json'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable status of the job."""
+        status = {
+            'id': self.id,
+            'name': self.name,
+            'platform': self.platform,
+            'state': self.state,
+            'created': self.created,
+            'finished': self.finished,
+            'input_bytes': self.input_bytes,
+            'progress': None,
+            'result': f'/jobs/{self.id}/result' if self.state == 'done' else None,
+            'error': self.error,
+        }
+        if self.state == 'running' and self.progress_path.exists():
+            try:
+                progress = json.loads(self.progress_path.read_text())
+            except (OSError, ValueError):
+                progress = None
+            if progress:
+                progress['fraction'] = progress['bytes_read'] / self.input_bytes if self.input_bytes else None
+                status['progress'] = progress
+        elif self.summary is not None:
+            status['progress'] = {'messages': self.summary['messages'], 'bytes_read': self.input_bytes, 'fraction': 1.0}
+            status['summary'] = self.summary
+        return status
+
+
+class ParseService:
+    """
+    Job store and bounded process pool behind the HTTP handler.
+    """
+
+    def __init__(
+        self,
+        work_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        max_upload_bytes: int = DEFAULT_MAX_UPLOAD_MB * 1024 * 1024,
+        result_ttl: float = DEFAULT_RESULT_TTL
+    ):
+        """
+        Start the worker pool.
+
+        Args:
+            work_dir: Directory for uploads and results (a temporary
+                directory when omitted)
+            max_workers: Worker processes (defaults to the CPU count)
+            max_queued: Unfinished jobs accepted at once, including running
+                ones (defaults to twice the workers)
+            max_upload_bytes: Largest accepted upload
+            result_ttl: Seconds finished jobs are kept
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queued = max_queued or self.max_workers * 2
+        self.max_upload_bytes = max_upload_bytes
+        self.result_ttl = result_ttl
+        self._owns_work_dir = work_dir is None
+        self.work_dir = Path(work_dir or tempfile.mkdtemp(prefix='chat-parse-service-'))
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        self._executor = self._new_executor()
+        self._jobs: Dict[str, Job] = {}
+        # Reentrant: cancelling a future runs its done callback right away
+        self._lock = threading.RLock()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool."""
+        # Workers are spawned rather than forked from the threaded server
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context('spawn'))
+
+    def close(self) -> None:
+        """Stop the pool and delete a temporary work directory."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._owns_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _unfinished(self) -> int:
+        """Number of jobs holding a queue slot (lock held)."""
+        return sum(job.state in ('uploading', 'queued', 'running') for job in self._jobs.values())
+
+    def has_capacity(self) -> bool:
+        """Whether a new upload would currently get a queue slot."""
+        with self._lock:
+            return self._unfinished() < self.max_queued
+
+    def health(self) -> Dict[str, Any]:
+        """Pool size and queue usage."""
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                'workers': self.max_workers,
+                'max_queued': self.max_queued,
+                'unfinished': self._unfinished(),
+                'jobs': states,
+            }
+
+    def reserve(self, name: str, platform: Optional[str]) -> Job:
+        """
+        Take a queue slot for a new upload.
+
+        Args:
+            name: File name of the upload (used for platform detection)
+            platform: Platform key, or None to detect it
+
+        Returns:
+            The new job in 'uploading' state
+
+        Raises:
+            QueueFull: If all slots are taken
+        """
+        self._expire()
+        with self._lock:
+            if self._unfinished() >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} jobs are already queued or running")
+            job_id = uuid.uuid4().hex[:12]
+            job = Job(
+                id=job_id,
+                name=Path(name).name or 'upload',
+                platform=platform,
+                directory=self.work_dir / job_id,
+                created=time.time()
+            )
+            self._jobs[job_id] = job
+        job.directory.mkdir()
+        return job
+
+    def submit(self, job: Job, body: IO[bytes], length: int) -> Job:
+        """
+        Copy an upload to the job directory and queue it.
+
+        If the job cannot be queued, it is deleted and its slot released.
+
+        Args:
+            job: Job returned by ``reserve``
+            body: Request body stream
+            length: Number of bytes to read from ``body``
+
+        Returns:
+            The queued job
+
+        Raises:
+            ConnectionError: If the body ends early
+        """
+        task = (_run_job, str(job.input_path), job.name, str(job.result_path), str(job.progress_path), job.platform)
+        try:
+            remaining = length
+            with job.input_path.open('wb') as spool:
+                while remaining:
+                    chunk = body.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError(f"Upload ended after {length - remaining} of {length} bytes")
+                    spool.write(chunk)
+                    remaining -= len(chunk)
+            job.input_bytes = length
+
+            with self._lock:
+                try:
+                    job.future = self._executor.submit(*task)
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); start a fresh pool
+                    logger.warning("Worker pool is broken; restarting it")
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._new_executor()
+                    job.future = self._executor.submit(*task)
+                job.state = 'queued'
+        except BaseException:
+            self.delete(job.id)
+            raise
+
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job: Job, future: Future) -> None:
+        """Record the outcome of a job."""
+        with self._lock:
+            job.finished = time.time()
+            if future.cancelled():
+                job.state = 'cancelled'
+                return
+            error = future.exception()
+            if error is not None:
+                job.state = 'failed'
+                job.error = f"{type(error).__name__}: {error}"
+                logger.warning("Job %s failed: %s", job.id, job.error)
+            else:
+                job.state = 'done'
+                job.summary = future.result()
+        # The upload is no longer needed once parsed
+        job.input_path.unlink(missing_ok=True)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job, marking queued jobs that a worker has picked up."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.state == 'queued' and job.future.running():
+                job.state = 'running'
+            return job
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Cancel a queued job or delete a finished one.
+
+        Running jobs cannot be interrupted and are left alone.
+
+        Returns:
+            Whether the job was removed
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job.future is not None and not job.future.done() and not job.future.cancel():
+                return False
+            del self._jobs[job_id]
+        shutil.rmtree(job.directory, ignore_errors=True)
+        return True
+
+    def _expire(self) -> None:
+        """Delete finished jobs older than the result TTL."""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job.id for job in self._jobs.values() if job.finished is not None and job.finished < cutoff]
+        for job_id in expired:
+            self.delete(job_id)
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the ParseService of the server."""
+
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def service(self) -> ParseService:
+        return self.server.service
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: HTTPStatus, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {'error': message}, headers)
+
+    def _refuse_upload(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """Reject an upload, discarding its body if it is small enough."""
+        length = int(self.headers.get('Content-Length') or 0)
+        if self.headers.get('Expect', '').lower() != '100-continue' and length <= DRAIN_LIMIT:
+            while length:
+                chunk = self.rfile.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+        else:
+            self.close_connection = True
+        self._send_error(status, message, headers)
+
+    def handle_expect_100(self) -> bool:
+        """Refuse uploads before their body is sent when the queue is full."""
+        if self.command == 'POST' and not self.service.has_capacity():
+            self._refuse_upload(HTTPStatus.TOO_MANY_REQUESTS, "The job queue is full", {'Retry-After': '1'})
+            return False
+        return super().handle_expect_100()
+
+    def _route(self):
+        """Split the path into (collection, job id, action)."""
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        parts += [None] * (3 - len(parts))
+        return parts[0], parts[1], parts[2], parse_qs(url.query)
+
+    def do_GET(self) -> None:
+        collection, job_id, action, _ = self._route()
+        if collection == 'health' and job_id is None:
+            self._send_json(HTTPStatus.OK, self.service.health())
+            return
+        if collection != 'jobs' or job_id is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+            return
+
+        job = self.service.get(job_id)
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {job_id}")
+        elif action is None:
+            self._send_json(HTTPStatus.OK, job.to_dict())
+        elif action == 'result':
+            self._send_result(job)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+
+    def _send_result(self, job: Job) -> None:
+        """Stream the result file of a finished job."""
+        if job.state != 'done':
+            self._send_error(HTTPStatus.CONFLICT, f"Job is {job.state}")
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', PARQUET_CONTENT_TYPE)
+        self.send_header('Content-Length', str(job.result_path.stat().st_size))
+        self.send_header('Content-Disposition', f'attachment; filename="{job.id}.parquet"')
+        self.end_headers()
+        with job.result_path.open('rb') as result:
+            shutil.copyfileobj(result, self.wfile, CHUNK_SIZE)
+
+    def do_POST(self) -> None:
+        collection, job_id, _, query = self._route()
+        if collection != 'jobs' or job_id is not None:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self._send_error(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+            return
+        length = int(length)
+        if length == 0:
+            self._send_error(HTTPStatus.BAD_REQUEST, "The upload is empty")
+            return
+        if length > self.service.max_upload_bytes:
+            self._refuse_upload(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Uploads are limited to {self.service.max_upload_bytes} bytes")
+            return
+
+        name = query.get('name', ['upload'])[0]
+        platform = query.get('platform', [None])[0]
+        try:
+            job = self.service.reserve(name, platform)
+        except QueueFull as e:
+            self._refuse_upload(HTTPStatus.TOO_MANY_REQUESTS, str(e), {'Retry-After': '1'})
+            return
+
+        try:
+            self.service.submit(job, self.rfile, length)
+        except ConnectionError as e:
+            logger.warning("Upload of job %s aborted: %s", job.id, e)
+            self.close_connection = True
+            return
+        except Exception as e:
+            logger.exception("Could not queue job %s", job.id)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Could not queue job: {e}")
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict(), {'Location': f'/jobs/{job.id}'})
+
+    def do_DELETE(self) -> None:
+        collection, job_id, action, _ = self._route()
+        if collection != 'jobs' or job_id is None or action is not None:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+            return
+        if self.service.get(job_id) is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {job_id}")
+        elif self.service.delete(job_id):
+            self._send_json(HTTPStatus.OK, {'deleted': job_id})
+        else:
+            self._send_error(HTTPStatus.CONFLICT, "Running jobs cannot be deleted")
+
+
+def make_server(host: str, port: int, service: ParseService) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a service.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        service: Service handling the requests
+
+    Returns:
+        Server ready for ``serve_forever``
+    """
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main() -> None:
+    """Run the service until interrupted."""
+    arg_parser = argparse.ArgumentParser(description="Local chat export parse service")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="Interface to bind (default: %(default)s)")
+    arg_parser.add_argument('--port', type=int, default=8765, help="Port to bind (default: %(default)s)")
+    arg_parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument('--queue', type=int, help="Unfinished jobs accepted at once (default: 2 x workers)")
+    arg_parser.add_argument('--work-dir', help="Directory for uploads and results (default: temporary)")
+    arg_parser.add_argument('--max-upload-mb', type=float, default=DEFAULT_MAX_UPLOAD_MB, help="Largest accepted upload (default: %(default).0f)")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    service = ParseService(
+        work_dir=args.work_dir,
+        max_workers=args.workers,
+        max_queued=args.queue,
+        max_upload_bytes=int(args.max_upload_mb * 1024 * 1024)
+    )
+    server = make_server(args.host, args.port, service)
+    logger.info("Serving on http://%s:%d with %d workers", *server.server_address[:2], service.max_workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""
+On-disk storage of parsed chats.
+"""
+
+from .blockstore import BlockStore, BlockStoreStats, pack, write_block_store
+from .partitioned import PartitionedArchive, PartitionedWriter, WriteStats, ingest
+
+__all__ = [
+    'BlockStore', 'BlockStoreStats', 'pack', 'write_block_store',
+    'PartitionedArchive', 'PartitionedWriter', 'WriteStats', 'ingest',
+]
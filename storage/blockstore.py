@@ -0,0 +1,574 @@
+"""
+Block-compressed column store for long-term chat archives.
+
+Timestamps, senders, media types and text lengths are stored as compact
+NumPy columns (senders and media types dictionary-encoded), which are
+memory-mapped on open. Message text is most of the size of a chat and
+compresses well, so it is kept apart: messages are sorted by time and
+their texts packed into independently compressed blocks of a few
+thousand messages, with a block index holding each block's row range,
+byte span and time range.
+
+Aggregations over the columns never decompress text. Reading a time
+range, a page of the explorer or a search decompresses only the blocks
+it touches; a search for a sender skips blocks without that sender, and
+a case-sensitive literal search skips blocks whose raw bytes do not
+contain the pattern before decoding them.
+
+Layout of a store directory::
+
+    meta.json       format version, codec, block size, dictionaries
+    datetime.npy    int64 microseconds since the epoch (UTC if tz-aware)
+    sender.npy      int32 codes into meta['senders']
+    media_type.npy  int16 codes into meta['media_types'] (-1 for none)
+    text_length.npy int32 characters per message
+    blocks.npy      block index (first row, rows, offset, size, first/last time)
+    text.bin        compressed text blocks
+"""
+
+import bz2
+import json
+import logging
+import lzma
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Messages per compressed text block
+DEFAULT_BLOCK_SIZE = 4096
+
+# Decoded text blocks kept in memory per open store
+DEFAULT_CACHE_BLOCKS = 16
+
+# Columns that are read without touching the text blocks
+COLUMN_NAMES = ('datetime', 'sender', 'media_type', 'text_length')
+
+# Codec name -> (compress(data, level), decompress(data), default level)
+CODECS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes], int]] = {
+    'zlib': (lambda data, level: zlib.compress(data, level), zlib.decompress, 6),
+    'bz2': (lambda data, level: bz2.compress(data, level), bz2.decompress, 9),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress, 6),
+}
+
+_BLOCK_DTYPE = [
+    ('first_row', '<i8'),
+    ('rows', '<i4'),
+    ('offset', '<i8'),
+    ('size', '<i8'),
+    ('first_time', '<i8'),
+    ('last_time', '<i8'),
+]
+
+
+@dataclass
+class BlockStoreStats:
+    """
+    Sizes of a written block store.
+
+    Attributes:
+        messages: Number of messages stored
+        blocks: Number of text blocks
+        text_bytes: UTF-8 size of all message texts
+        compressed_bytes: Size of the compressed text blocks
+        column_bytes: Size of the column files
+    """
+    messages: int = 0
+    blocks: int = 0
+    text_bytes: int = 0
+    compressed_bytes: int = 0
+    column_bytes: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        """Raw text size over compressed text size."""
+        return self.text_bytes / self.compressed_bytes if self.compressed_bytes else 0.0
+
+
+def _encode_block(texts: Sequence[str]) -> Tuple[bytes, int]:
+    """Pack texts as a uint32 byte-length header followed by their UTF-8 bytes."""
+    import numpy as np
+
+    encoded = [text.encode('utf-8', errors='surrogatepass') for text in texts]
+    lengths = np.fromiter((len(data) for data in encoded), dtype='<u4', count=len(encoded))
+    body = b''.join(encoded)
+    return lengths.tobytes() + body, len(body)
+
+
+def _decode_block(payload: bytes, rows: int) -> List[str]:
+    """Unpack the texts of a decompressed block."""
+    import numpy as np
+
+    header = rows * 4
+    ends = np.cumsum(np.frombuffer(payload, dtype='<u4', count=rows), dtype=np.int64) + header
+    starts = np.concatenate(([header], ends[:-1]))
+    return [
+        payload[start:end].decode('utf-8', errors='surrogatepass')
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+
+
+def _epoch_micros(timestamps: 'pd.Series') -> Tuple['np.ndarray', Optional[str]]:
+    """Timestamps as int64 microseconds since the epoch, and their timezone."""
+    tz = getattr(timestamps.dt, 'tz', None)
+    if tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    values = timestamps.to_numpy(dtype='datetime64[us]').astype('int64')
+    return values, str(tz) if tz is not None else None
+
+
+def _decode_labels(codes: 'np.ndarray', labels: Sequence[str]) -> 'pd.Series':
+    """
+    Labels of dictionary codes, with code -1 as a missing value.
+
+    The labels are gathered as Python objects, so pandas infers the same
+    dtype as for a parsed DataFrame (NaN-backed ``str`` on pandas 3, object
+    with None before) instead of spelling missing values 'nan'.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Code -1 picks the trailing None
+    return pd.Series(np.array([*labels, None], dtype=object)[codes])
+
+
+def write_block_store(
+    df: 'pd.DataFrame',
+    root: Union[str, Path],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    compression: str = 'zlib',
+    level: Optional[int] = None
+) -> BlockStoreStats:
+    """
+    Write messages as a block store, replacing any store at ``root``.
+
+    Args:
+        df: DataFrame with 'datetime', 'sender', 'text' and 'media_type'
+        root: Store directory (created if missing)
+        block_size: Messages per compressed text block
+        compression: Codec of the text blocks ('zlib', 'bz2' or 'lzma')
+        level: Compression level (the codec's default when omitted)
+
+    Returns:
+        BlockStoreStats of the written store
+
+    Raises:
+        ValueError: If the codec is unknown or the DataFrame lacks a column
+    """
+    import numpy as np
+    import pandas as pd
+
+    if compression not in CODECS:
+        raise ValueError(f"Unknown compression: {compression}. Expected one of {tuple(CODECS)}")
+    missing = {'datetime', 'sender', 'text', 'media_type'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {sorted(missing)}")
+    compress, _, default_level = CODECS[compression]
+    level = default_level if level is None else level
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    # Time order makes every block cover a contiguous time range
+    df = df.sort_values('datetime', kind='stable', ignore_index=True)
+    times, tz = _epoch_micros(pd.to_datetime(df['datetime']))
+    sender_codes, senders = pd.factorize(df['sender'].fillna(''))
+    media_codes, media_types = pd.factorize(df['media_type'])
+    texts = df['text'].fillna('').astype(str).tolist()
+
+    stats = BlockStoreStats(messages=len(df))
+    blocks = np.zeros((len(df) + block_size - 1) // block_size, dtype=_BLOCK_DTYPE)
+    with (root / 'text.bin').open('wb') as stream:
+        offset = 0
+        for index, first in enumerate(range(0, len(df), block_size)):
+            chunk = texts[first:first + block_size]
+            payload, text_bytes = _encode_block(chunk)
+            data = compress(payload, level)
+            stream.write(data)
+            blocks[index] = (first, len(chunk), offset, len(data), times[first], times[first + len(chunk) - 1])
+            offset += len(data)
+            stats.text_bytes += text_bytes
+        stats.compressed_bytes = offset
+    stats.blocks = len(blocks)
+
+    columns = {
+        'datetime': times,
+        'sender': sender_codes.astype('<i4'),
+        'media_type': media_codes.astype('<i2'),
+        'text_length': df['text'].fillna('').str.len().to_numpy(dtype='<i4'),
+        'blocks': blocks,
+    }
+    for name, values in columns.items():
+        np.save(root / f'{name}.npy', values)
+        stats.column_bytes += (root / f'{name}.npy').stat().st_size
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'messages': len(df),
+        'block_size': block_size,
+        'compression': compression,
+        'tz': tz,
+        'senders': [str(sender) for sender in senders],
+        'media_types': [str(media_type) for media_type in media_types],
+    }
+    (root / 'meta.json').write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding='utf-8')
+
+    logger.info(
+        "Wrote %d messages in %d blocks to %s (text %.1f MB -> %.1f MB)",
+        stats.messages, stats.blocks, root, stats.text_bytes / 1e6, stats.compressed_bytes / 1e6
+    )
+    return stats
+
+
+def pack(
+    source: Union[str, Path, IO],
+    root: Union[str, Path],
+    platform: Optional[str] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    compression: str = 'zlib'
+) -> BlockStoreStats:
+    """
+    Parse an export into a block store.
+
+    Args:
+        source: Path to the export or a seekable binary file object
+        root: Store directory
+        platform: Platform key; detected when omitted
+        block_size: Messages per compressed text block
+        compression: Codec of the text blocks
+
+    Returns:
+        BlockStoreStats of the written store
+    """
+    import pandas as pd
+    from parsers.registry import open_parser
+
+    columns: Dict[str, list] = {'datetime': [], 'sender': [], 'text': [], 'media_type': []}
+    for message in open_parser(source, platform).iter_messages():
+        columns['datetime'].append(message.datetime)
+        columns['sender'].append(message.sender)
+        columns['text'].append(message.text)
+        columns['media_type'].append(message.media_type)
+    return write_block_store(pd.DataFrame(columns), root, block_size, compression)
+
+
+class BlockStore:
+    """
+    Reader of a block store.
+
+    Columns are memory-mapped on open; text blocks are decompressed on
+    demand and the most recently used ones are kept decoded.
+    """
+
+    def __init__(self, root: Union[str, Path], cache_blocks: int = DEFAULT_CACHE_BLOCKS):
+        """
+        Open a store.
+
+        Args:
+            root: Store directory
+            cache_blocks: Decoded text blocks kept in memory
+
+        Raises:
+            FileNotFoundError: If the directory holds no block store
+            ValueError: If the store was written by a newer format version
+        """
+        import numpy as np
+
+        self.root = Path(root)
+        if not self.is_block_store(self.root):
+            raise FileNotFoundError(f"No block store found at {self.root}")
+
+        self.meta = json.loads((self.root / 'meta.json').read_text(encoding='utf-8'))
+        if self.meta['version'] > FORMAT_VERSION:
+            raise ValueError(f"Unsupported block store version {self.meta['version']}")
+        _, self._decompress, _ = CODECS[self.meta['compression']]
+
+        self.columns = {name: np.load(self.root / f'{name}.npy', mmap_mode='r') for name in COLUMN_NAMES}
+        self.blocks = np.load(self.root / 'blocks.npy')
+        self.cache_blocks = cache_blocks
+        self.blocks_read = 0
+        self._cache: 'OrderedDict[int, List[str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_block_store(path: Union[str, Path]) -> bool:
+        """Check whether a directory holds a block store."""
+        path = Path(path)
+        return (path / 'meta.json').is_file() and (path / 'text.bin').is_file()
+
+    def __len__(self) -> int:
+        return self.meta['messages']
+
+    @property
+    def senders(self) -> List[str]:
+        """Distinct senders, indexed by sender code."""
+        return self.meta['senders']
+
+    def row_range(self, start=None, end=None) -> Tuple[int, int]:
+        """
+        Rows of the messages in a time range.
+
+        Args:
+            start: First included timestamp (None for no lower bound)
+            end: First excluded timestamp (None for no upper bound)
+
+        Returns:
+            First row and end row (exclusive)
+        """
+        times = self.columns['datetime']
+        first = int(times.searchsorted(self._micros(start), 'left')) if start is not None else 0
+        last = int(times.searchsorted(self._micros(end), 'left')) if end is not None else len(times)
+        return first, max(first, last)
+
+    def block_range(self, first_row: int, end_row: int) -> range:
+        """Indexes of the text blocks holding a range of rows."""
+        if end_row <= first_row:
+            return range(0)
+        block_size = self.meta['block_size']
+        return range(first_row // block_size, (end_row - 1) // block_size + 1)
+
+    def to_dataframe(self, start=None, end=None, columns: Optional[Sequence[str]] = None) -> 'pd.DataFrame':
+        """
+        Read the messages of a time range.
+
+        Text is decompressed only if 'text' is among the columns, and then
+        only for the blocks overlapping the range.
+
+        Args:
+            start: First included timestamp
+            end: First excluded timestamp
+            columns: Columns to read, among 'datetime', 'sender', 'text',
+                'media_type' and 'text_length' (defaults to the first four)
+
+        Returns:
+            DataFrame sorted by time
+        """
+        first, last = self.row_range(start, end)
+        return self._rows(first, last, columns or ('datetime', 'sender', 'text', 'media_type'))
+
+    def page(self, offset: int, limit: int, start=None, end=None) -> 'pd.DataFrame':
+        """
+        One page of messages with text, e.g. for a message explorer.
+
+        Args:
+            offset: Messages to skip from the start of the range
+            limit: Maximum number of messages
+            start: First included timestamp
+            end: First excluded timestamp
+
+        Returns:
+            DataFrame with every column
+        """
+        first, last = self.row_range(start, end)
+        first = min(first + max(offset, 0), last)
+        return self._rows(first, min(first + limit, last), ('datetime', 'sender', 'text', 'media_type'))
+
+    def search(
+        self,
+        pattern: str,
+        start=None,
+        end=None,
+        sender: Optional[str] = None,
+        regex: bool = False,
+        case: bool = True,
+        limit: Optional[int] = None
+    ) -> 'pd.DataFrame':
+        """
+        Find messages whose text matches a pattern.
+
+        Blocks without rows of the sender are skipped without being read,
+        and for a case-sensitive literal pattern, so are blocks whose raw
+        bytes do not contain it.
+
+        Args:
+            pattern: Substring, or regular expression if ``regex`` is set
+            start: First included timestamp
+            end: First excluded timestamp
+            sender: Only search messages of this sender
+            regex: Whether ``pattern`` is a regular expression
+            case: Whether the match is case-sensitive
+            limit: Stop after this many matches
+
+        Returns:
+            DataFrame of the matching messages, in time order
+        """
+        import numpy as np
+
+        first, last = self.row_range(start, end)
+        sender_codes = self.columns['sender']
+        sender_code = self.senders.index(sender) if sender in self.senders else None
+        if sender is not None and sender_code is None:
+            return self._rows(0, 0, ('datetime', 'sender', 'text', 'media_type'))
+
+        if regex or not case:
+            compiled = re.compile(pattern if regex else re.escape(pattern), 0 if case else re.IGNORECASE)
+            matches = compiled.search
+            needle = None
+        else:
+            matches = lambda text: pattern in text
+            needle = pattern.encode('utf-8', errors='surrogatepass')
+
+        rows: List[int] = []
+        texts: List[str] = []
+        for block in self.block_range(first, last):
+            block_first = int(self.blocks[block]['first_row'])
+            lo = max(first, block_first)
+            hi = min(last, block_first + int(self.blocks[block]['rows']))
+            candidates = np.arange(lo, hi)
+            if sender_code is not None:
+                candidates = candidates[np.asarray(sender_codes[lo:hi]) == sender_code]
+                if not len(candidates):
+                    continue
+
+            block_texts = self._block_texts(block, needle)
+            if block_texts is None:
+                continue
+            for row in candidates.tolist():
+                text = block_texts[row - block_first]
+                if matches(text):
+                    rows.append(row)
+                    texts.append(text)
+            if limit is not None and len(rows) >= limit:
+                del rows[limit:], texts[limit:]
+                break
+
+        # The matched texts are kept, so evicted blocks are not read again
+        return self._take(np.asarray(rows, dtype=np.int64), ('datetime', 'sender', 'text', 'media_type'), texts)
+
+    def sender_counts(self, start=None, end=None) -> 'pd.Series':
+        """
+        Messages per sender in a time range, from the sender column alone.
+
+        Returns:
+            Counts indexed by sender, largest first
+        """
+        import numpy as np
+        import pandas as pd
+
+        first, last = self.row_range(start, end)
+        counts = np.bincount(np.asarray(self.columns['sender'][first:last]), minlength=len(self.senders))
+        return pd.Series(counts, index=pd.Index(self.senders, name='sender'), name='messages').sort_values(
+            ascending=False, kind='stable'
+        )
+
+    def _rows(self, first: int, last: int, columns: Sequence[str]) -> 'pd.DataFrame':
+        """Read a contiguous range of rows."""
+        import numpy as np
+
+        return self._take(np.arange(first, last, dtype=np.int64), columns)
+
+    def _take(
+        self,
+        rows: 'np.ndarray',
+        columns: Sequence[str],
+        texts: Optional[List[str]] = None
+    ) -> 'pd.DataFrame':
+        """Build a DataFrame of the given sorted rows, with their texts if already decoded."""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name in columns:
+            if name == 'datetime':
+                values = pd.to_datetime(np.asarray(self.columns['datetime'][rows]), unit='us')
+                if self.meta['tz']:
+                    values = values.tz_localize('UTC').tz_convert(self.meta['tz'])
+                data[name] = values
+            elif name == 'sender':
+                data[name] = _decode_labels(np.asarray(self.columns['sender'][rows]), self.senders)
+            elif name == 'media_type':
+                # Code -1 (no media) becomes a missing value
+                data[name] = _decode_labels(np.asarray(self.columns['media_type'][rows]), self.meta['media_types'])
+            elif name == 'text':
+                data[name] = texts if texts is not None else self._texts(rows)
+            elif name == 'text_length':
+                data[name] = np.asarray(self.columns['text_length'][rows])
+            else:
+                raise ValueError(f"Unknown column: {name}")
+        return pd.DataFrame(data, columns=list(columns))
+
+    def _texts(self, rows: 'np.ndarray') -> List[str]:
+        """Texts of sorted rows, decompressing each touched block once."""
+        block_size = self.meta['block_size']
+        texts: List[str] = []
+        block = None
+        block_texts: List[str] = []
+        for row in rows.tolist():
+            if row // block_size != block:
+                block = row // block_size
+                block_texts = self._block_texts(block)
+            texts.append(block_texts[row - block * block_size])
+        return texts
+
+    def _block_texts(self, block: int, needle: Optional[bytes] = None) -> Optional[List[str]]:
+        """
+        Decoded texts of a block, from the cache or the text file.
+
+        Args:
+            block: Block index
+            needle: If given, return None without decoding when the raw
+                block does not contain these bytes
+
+        Returns:
+            Texts of the block, or None if the needle is absent
+        """
+        with self._lock:
+            cached = self._cache.get(block)
+            if cached is not None:
+                self._cache.move_to_end(block)
+                return cached
+
+        entry = self.blocks[block]
+        with (self.root / 'text.bin').open('rb') as stream:
+            stream.seek(int(entry['offset']))
+            payload = self._decompress(stream.read(int(entry['size'])))
+        self.blocks_read += 1
+
+        rows = int(entry['rows'])
+        if needle is not None and needle not in memoryview(payload)[rows * 4:].tobytes():
+            return None
+
+        texts = _decode_block(payload, rows)
+        with self._lock:
+            self._cache[block] = texts
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return texts
+
+    def iter_blocks(self, start=None, end=None) -> Iterator['pd.DataFrame']:
+        """
+        Stream the messages of a time range one text block at a time.
+
+        Returns:
+            Iterator over DataFrames with every column
+        """
+        first, last = self.row_range(start, end)
+        block_size = self.meta['block_size']
+        for block in self.block_range(first, last):
+            lo = max(first, block * block_size)
+            hi = min(last, (block + 1) * block_size)
+            yield self._rows(lo, hi, ('datetime', 'sender', 'text', 'media_type'))
+
+    def _micros(self, value) -> int:
+        """A range bound as microseconds in the store's time convention."""
+        import pandas as pd
+
+        bound = pd.Timestamp(value)
+        if self.meta['tz']:
+            bound = bound.tz_localize(self.meta['tz']) if bound.tz is None else bound
+            bound = bound.tz_convert('UTC').tz_localize(None)
+        elif bound.tz is not None:
+            bound = bound.tz_localize(None)
+        return bound.value // 1_000
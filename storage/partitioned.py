@@ -0,0 +1,481 @@
+"""
+Month-partitioned on-disk archive of parsed messages.
+
+Parser output is streamed into a Hive-style Parquet dataset
+(``root/month=2023-01/part-....parquet``) while it is parsed. Messages are
+buffered per month as Arrow tables; whenever the buffered data reaches the
+memory budget, every buffered month is spilled to a new part file, so
+exports larger than RAM can be ingested with bounded memory.
+
+Archives are read lazily: a date range selects the month directories it
+overlaps, only those files are opened, and the range filter is pushed
+into the Parquet scan.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Union, TYPE_CHECKING
+
+from models.message import Message
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from parsers.progress import ObserverLike
+
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('datetime', 'sender', 'text', 'media_type')
+
+# Name of the Hive partition key
+PARTITION_KEY = 'month'
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Messages converted to Arrow at once while streaming
+DEFAULT_BATCH_SIZE = 50_000
+
+# Rough Python-object overhead of a buffered message, in bytes
+_MESSAGE_OVERHEAD = 200
+
+
+def _require_pyarrow():
+    """Import pyarrow, with a helpful message if it is missing."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Partitioned archives require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _month_bounds(start: Optional['pd.Timestamp'], end: Optional['pd.Timestamp']) -> tuple:
+    """Partition keys of the first and last month overlapping [start, end)."""
+    import pandas as pd
+
+    first = start.strftime('%Y-%m') if start is not None else None
+    last = (end - pd.Timedelta(1, 'ns')).strftime('%Y-%m') if end is not None else None
+    return first, last
+
+
+def _timestamp_bound(value, timestamp_type: 'pa.DataType') -> 'pd.Timestamp':
+    """Convert a range bound to the timezone convention of the archive."""
+    import pandas as pd
+
+    bound = pd.Timestamp(value)
+    if timestamp_type.tz and bound.tz is None:
+        return bound.tz_localize(timestamp_type.tz)
+    if not timestamp_type.tz and bound.tz is not None:
+        return bound.tz_localize(None)
+    return bound
+
+
+def message_schema(df: Optional['pd.DataFrame'] = None) -> 'pa.Schema':
+    """
+    Arrow schema of stored messages.
+
+    Args:
+        df: Sample of the messages; its 'datetime' timezone is kept
+
+    Returns:
+        Schema with 'datetime', 'sender', 'text' and 'media_type'
+    """
+    import pyarrow as pa
+
+    tz = getattr(df['datetime'].dt, 'tz', None) if df is not None else None
+    return pa.schema([
+        ('datetime', pa.timestamp('us', tz=str(tz) if tz is not None else None)),
+        ('sender', pa.string()),
+        ('text', pa.string()),
+        ('media_type', pa.string()),
+    ])
+
+
+@dataclass
+class WriteStats:
+    """
+    Counters collected while writing an archive.
+
+    Attributes:
+        messages: Number of messages written
+        files: Number of part files written
+        spills: Number of times the buffers were flushed to disk
+        bytes_written: Total size of the written part files
+        peak_buffered_bytes: Largest amount of buffered data held at once
+        partitions: Partition keys that received data
+    """
+    messages: int = 0
+    files: int = 0
+    spills: int = 0
+    bytes_written: int = 0
+    peak_buffered_bytes: int = 0
+    partitions: List[str] = field(default_factory=list)
+
+
+class PartitionedWriter:
+    """
+    Streams messages into a month-partitioned Parquet dataset.
+
+    Each writer names its part files with a unique token, so several
+    ingests can append to the same archive.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        compression: str = 'zstd'
+    ):
+        """
+        Prepare the archive directory.
+
+        Args:
+            root: Archive directory (created if missing)
+            memory_budget: Buffered bytes that trigger a spill to disk
+            compression: Parquet compression codec
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _require_pyarrow()
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.memory_budget = memory_budget
+        self.compression = compression
+        self.stats = WriteStats()
+        self.schema: Optional['pa.Schema'] = None
+        self._token = uuid.uuid4().hex[:8]
+        self._buffers: Dict[str, List['pa.Table']] = defaultdict(list)
+        self._buffered_bytes = 0
+
+    def __enter__(self) -> 'PartitionedWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_frame(self, df: 'pd.DataFrame') -> None:
+        """
+        Buffer a DataFrame of messages, spilling if the budget is reached.
+
+        Args:
+            df: DataFrame with 'datetime', 'sender', 'text' and 'media_type'
+        """
+        import pyarrow as pa
+
+        if df.empty:
+            return
+        if self.schema is None:
+            self.schema = message_schema(df)
+
+        frame = df.reindex(columns=list(COLUMNS))
+        for month, part in frame.groupby(frame['datetime'].dt.strftime('%Y-%m'), sort=False):
+            table = pa.Table.from_pandas(part, schema=self.schema, preserve_index=False)
+            self._buffers[month].append(table)
+            self._buffered_bytes += table.nbytes
+
+        self.stats.messages += len(df)
+        self.stats.peak_buffered_bytes = max(self.stats.peak_buffered_bytes, self._buffered_bytes)
+        if self._buffered_bytes >= self.memory_budget:
+            self.spill()
+
+    def write_messages(self, messages: Iterable[Message], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """
+        Buffer a stream of messages, converting them in batches.
+
+        Args:
+            messages: Messages, e.g. from ``parser.iter_messages()``
+            batch_size: Messages collected before conversion to Arrow
+        """
+        columns: Dict[str, list] = {name: [] for name in COLUMNS}
+        pending_bytes = 0
+
+        for message in messages:
+            columns['datetime'].append(message.datetime)
+            columns['sender'].append(message.sender)
+            columns['text'].append(message.text)
+            columns['media_type'].append(message.media_type)
+            pending_bytes += len(message.text) + _MESSAGE_OVERHEAD
+
+            # The pending batch counts towards the budget as well
+            if len(columns['datetime']) >= batch_size or self._buffered_bytes + pending_bytes >= self.memory_budget:
+                self._write_columns(columns)
+                columns = {name: [] for name in COLUMNS}
+                pending_bytes = 0
+
+        self._write_columns(columns)
+
+    def _write_columns(self, columns: Dict[str, list]) -> None:
+        """Buffer one batch of collected message columns."""
+        import pandas as pd
+
+        if not columns['datetime']:
+            return
+        df = pd.DataFrame(columns)
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        self.write_frame(df)
+
+    def spill(self) -> None:
+        """Write every buffered month to a new part file and clear the buffers."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._buffers:
+            return
+
+        for month, tables in sorted(self._buffers.items()):
+            directory = self.root / f'{PARTITION_KEY}={month}'
+            directory.mkdir(exist_ok=True)
+            path = directory / f'part-{self._token}-{self.stats.spills:05d}.parquet'
+
+            # Sorted files give tight row-group statistics for range filters
+            table = pa.concat_tables(tables).sort_by('datetime')
+            pq.write_table(table, path, compression=self.compression)
+
+            self.stats.files += 1
+            self.stats.bytes_written += path.stat().st_size
+            if month not in self.stats.partitions:
+                self.stats.partitions.append(month)
+
+        logger.debug("Spilled %d partitions (%d buffered bytes)", len(self._buffers), self._buffered_bytes)
+        self.stats.spills += 1
+        self._buffers.clear()
+        self._buffered_bytes = 0
+
+    def close(self) -> None:
+        """Flush the remaining buffers."""
+        self.spill()
+        self.stats.partitions.sort()
+
+
+def ingest(
+    source: Union[str, Path, IO],
+    root: Union[str, Path],
+    platform: Optional[str] = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional['ObserverLike'] = None
+) -> WriteStats:
+    """
+    Parse an export straight into a partitioned archive.
+
+    Messages are written while the parser emits them; parsers that stream
+    (e.g. WhatsApp) never hold the whole chat in memory.
+
+    Args:
+        source: Path to the export or a seekable binary file object
+        root: Archive directory
+        platform: Platform key; detected when omitted
+        memory_budget: Buffered bytes that trigger a spill to disk
+        batch_size: Messages converted to Arrow at once
+        progress: Observer of the parse progress (e.g. a TqdmProgress)
+
+    Returns:
+        WriteStats of the ingest
+    """
+    from parsers.registry import open_parser
+
+    parser = open_parser(source, platform).set_progress(progress)
+    with PartitionedWriter(root, memory_budget=memory_budget) as writer:
+        writer.write_messages(parser.iter_messages(), batch_size=batch_size)
+    return writer.stats
+
+
+class PartitionedArchive:
+    """
+    Lazy reader of a month-partitioned archive.
+
+    Nothing is read on construction; every query lists the month
+    directories first and opens only the ones its date range overlaps.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Open an archive.
+
+        Args:
+            root: Archive directory
+
+        Raises:
+            ImportError: If pyarrow is not installed
+            FileNotFoundError: If the directory holds no partitions
+        """
+        _require_pyarrow()
+        self.root = Path(root)
+        if not self.is_archive(self.root):
+            raise FileNotFoundError(f"No partitioned archive found at {self.root}")
+
+    @staticmethod
+    def is_archive(path: Union[str, Path]) -> bool:
+        """Check whether a directory holds month partitions."""
+        path = Path(path)
+        return path.is_dir() and any(path.glob(f'{PARTITION_KEY}=*'))
+
+    def partitions(self) -> List[str]:
+        """Partition keys ('YYYY-MM') in chronological order."""
+        return sorted(
+            path.name.split('=', 1)[1]
+            for path in self.root.glob(f'{PARTITION_KEY}=*')
+            if path.is_dir()
+        )
+
+    def files(self, start=None, end=None) -> List[Path]:
+        """
+        Part files of the months overlapping a date range.
+
+        Args:
+            start: First included timestamp (None for no lower bound)
+            end: First excluded timestamp (None for no upper bound)
+
+        Returns:
+            Paths of the selected part files
+        """
+        import pandas as pd
+
+        first, last = _month_bounds(
+            pd.Timestamp(start) if start is not None else None,
+            pd.Timestamp(end) if end is not None else None
+        )
+        return [
+            path
+            for month in self.partitions()
+            if (first is None or month >= first) and (last is None or month <= last)
+            for path in sorted((self.root / f'{PARTITION_KEY}={month}').glob('*.parquet'))
+        ]
+
+    def dataset(self, start=None, end=None) -> 'ds.Dataset':
+        """
+        Arrow dataset over the part files a date range touches.
+
+        Args:
+            start: First included timestamp
+            end: First excluded timestamp
+
+        Returns:
+            pyarrow Dataset (the 'month' partition key is a column)
+        """
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            [str(path) for path in self.files(start, end)],
+            format='parquet',
+            partitioning='hive',
+            partition_base_dir=str(self.root)
+        )
+
+    def _filter(self, dataset: 'ds.Dataset', start, end) -> Optional['ds.Expression']:
+        """Row filter for a date range, in the archive's timezone convention."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        timestamp_type = dataset.schema.field('datetime').type
+        expression = None
+        for bound, include in ((start, True), (end, False)):
+            if bound is None:
+                continue
+            value = pa.scalar(_timestamp_bound(bound, timestamp_type), type=timestamp_type)
+            condition = ds.field('datetime') >= value if include else ds.field('datetime') < value
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def to_table(self, start=None, end=None, columns: Optional[Sequence[str]] = None) -> 'pa.Table':
+        """
+        Read the messages of a date range as an Arrow table.
+
+        Args:
+            start: First included timestamp
+            end: First excluded timestamp
+            columns: Columns to read (defaults to the message columns)
+
+        Returns:
+            Arrow table
+        """
+        import pyarrow as pa
+
+        dataset = self.dataset(start, end)
+        columns = list(columns or COLUMNS)
+        if not dataset.files:
+            return pa.table({name: pa.array([], type=pa.string()) for name in columns})
+        return dataset.to_table(columns=columns, filter=self._filter(dataset, start, end))
+
+    def to_dataframe(self, start=None, end=None, columns: Optional[Sequence[str]] = None) -> 'pd.DataFrame':
+        """
+        Read the messages of a date range as a DataFrame.
+
+        Args:
+            start: First included timestamp
+            end: First excluded timestamp
+            columns: Columns to read (defaults to the message columns)
+
+        Returns:
+            DataFrame sorted by time
+        """
+        df = self.to_table(start, end, columns).to_pandas()
+        if 'datetime' in df.columns:
+            df = df.sort_values('datetime', kind='stable', ignore_index=True)
+        return df
+
+    def iter_batches(
+        self,
+        start=None,
+        end=None,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator['pd.DataFrame']:
+        """
+        Stream the messages of a date range in bounded DataFrame batches.
+
+        Args:
+            start: First included timestamp
+            end: First excluded timestamp
+            columns: Columns to read (defaults to the message columns)
+            batch_size: Maximum rows per batch
+
+        Returns:
+            Iterator over DataFrames, in partition order
+        """
+        dataset = self.dataset(start, end)
+        if not dataset.files:
+            return
+        scanner = dataset.scanner(
+            columns=list(columns or COLUMNS),
+            filter=self._filter(dataset, start, end),
+            batch_size=batch_size
+        )
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def count(self, start=None, end=None) -> int:
+        """Number of messages in a date range (whole months are counted from file footers)."""
+        dataset = self.dataset(start, end)
+        if not dataset.files:
+            return 0
+        return dataset.count_rows(filter=self._filter(dataset, start, end))
+
+    def summary(self) -> 'pd.DataFrame':
+        """
+        Per-partition overview read from the Parquet footers only.
+
+        Returns:
+            DataFrame with 'month', 'files', 'messages' and 'bytes'
+        """
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        rows = []
+        for month in self.partitions():
+            paths = sorted((self.root / f'{PARTITION_KEY}={month}').glob('*.parquet'))
+            rows.append({
+                'month': month,
+                'files': len(paths),
+                'messages': sum(pq.ParquetFile(path).metadata.num_rows for path in paths),
+                'bytes': sum(path.stat().st_size for path in paths),
+            })
+        return pd.DataFrame(rows, columns=['month', 'files', 'messages', 'bytes'])
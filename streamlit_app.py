@@ -4,18 +4,34 @@ Main Streamlit application for chat message parsing and analysis.
 
 import streamlit as st
 from app.styles import CUSTOM_CSS
-from app.utils import detect_file_type, parse_file, create_dataframe
+from app.registry import get_registry
+from app.background import background_threshold, cancel_parse_job, finish_parse_job, start_parse_job
+from app.session import find_dataframe, load_archive_dataframe, load_dataframe, upload_dataset_key
+from app.utils import approximate_threshold, archive_dataset_key, detect_file_type
+from parsers.detection import read_prefix
 from app.visualizations import (
     display_statistics, 
     display_sender_stats, 
     display_time_analysis,
-    display_word_stats
+    display_timeline,
+    display_word_stats,
+    display_media_stats,
+    display_conversation_analysis,
+    display_content_features,
+    display_approximate_overview,
+    get_chat_sketch
 )
 from app.components import (
     display_message_viewer,
     display_export_options,
     display_sidebar,
-    display_landing_page
+    display_archive_selector,
+    display_parse_report,
+    display_approximate_toggle,
+    display_registry_status,
+    display_query_tab,
+    display_landing_page,
+    describe_progress
 )
 
 
@@ -30,6 +46,118 @@ st.set_page_config(
 # Apply custom CSS
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
+# Seconds between refreshes of the live view while a file is parsed
+LIVE_REFRESH_SECONDS = 2
+
+# Seconds to wait for a cancelled parse to stop
+CANCEL_TIMEOUT_SECONDS = 5
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def display_parse_job(job):
+    """
+    Display a file that is still being parsed, refreshing as batches arrive.
+    
+    Args:
+        job: Running ParseJob
+    """
+    if not job.running:
+        # Show the full dashboard (or the error) once the worker stops
+        st.rerun()
+    
+    col1, col2 = st.columns([6, 1])
+    
+    with col1:
+        fraction = job.progress.fraction if job.progress is not None else None
+        st.progress(fraction or 0.0, text=describe_progress(job.progress, "🔄 Parsing in the background..."))
+    
+    with col2:
+        if st.button("⏹️ Cancel", key="cancel_parse", help="Stop parsing and keep the messages parsed so far"):
+            job.cancel()
+            job.wait(CANCEL_TIMEOUT_SECONDS)
+            st.rerun()
+    
+    df = job.dataframe()
+    if df is None:
+        st.info("⏳ Waiting for the first messages...")
+        return
+    
+    st.caption(f"Showing the {len(df):,} messages parsed so far; the view refreshes as more arrive.")
+    display_statistics(df)
+    display_timeline(df)
+    display_message_viewer(df)
+
+
+def display_dashboard(df, dataset_key: str):
+    """
+    Display the analysis tabs for a loaded dataset.
+    
+    Args:
+        df: DataFrame with message data
+        dataset_key: Identifies the dataset for cached computations
+    """
+    with st.sidebar:
+        display_parse_report(st.session_state.get('parse_report'))
+        display_registry_status(get_registry().stats())
+        approximate = display_approximate_toggle(len(df), approximate_threshold())
+    
+    # Create modern tabs; only the open tab is computed
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+        "📊 Overview", 
+        "📅 Time Analysis", 
+        "🔁 Conversations",
+        "💬 Messages",
+        "📝 Word Analysis",
+        "🧮 Query",
+        "💾 Export"
+    ], key="dashboard_tab", on_change="rerun")
+    
+    if tab1.open:
+        with tab1:
+            if approximate:
+                display_approximate_overview(get_chat_sketch(df, dataset_key, st.session_state.get('chat_sketch')))
+            else:
+                summary = st.session_state.get('chat_summary')
+                display_statistics(df, summary)
+                display_sender_stats(df, summary)
+            display_media_stats(st.session_state.get('media_manifest', []))
+    
+    if tab2.open:
+        with tab2:
+            display_time_analysis(df, st.session_state.get('chat_summary'))
+    
+    if tab3.open:
+        with tab3:
+            display_conversation_analysis(df, dataset_key)
+    
+    if tab4.open:
+        with tab4:
+            if approximate:
+                sample = get_chat_sketch(df, dataset_key, st.session_state.get('chat_sketch')).sample_dataframe()
+                st.info(f"⚡ Approximate mode: exploring a uniform random sample of {len(sample):,} messages")
+                display_message_viewer(sample)
+            else:
+                display_message_viewer(df)
+    
+    if tab5.open:
+        with tab5:
+            if approximate:
+                sample = get_chat_sketch(df, dataset_key, st.session_state.get('chat_sketch')).sample_dataframe()
+                st.info(f"⚡ Approximate mode: word and content statistics are computed on a uniform random sample of {len(sample):,} messages")
+                display_word_stats(sample, f"{dataset_key}:sample")
+                display_content_features(sample, f"{dataset_key}:sample")
+            else:
+                display_word_stats(df, dataset_key)
+                display_content_features(df, dataset_key)
+    
+    if tab6.open:
+        with tab6:
+            display_query_tab(df, dataset_key)
+    
+    if tab7.open:
+        with tab7:
+            display_export_options(df)
+
 
 def main():
     """Main Streamlit application."""
@@ -45,74 +173,84 @@ def main():
     with st.sidebar:
         uploaded_file = st.file_uploader(
             "Choose a file",
-            type=['txt', 'json', 'html'],
-            help="Upload WhatsApp (.txt), Telegram (.json), or Instagram (.html) export"
+            type=['txt', 'zip', 'json', 'html'],
+            help="Upload WhatsApp (.txt or .zip), Telegram (.json, .html or .zip), or Instagram (.zip or message_N.json) export"
         )
         
         display_sidebar(uploaded_file)
+        archive_selection = display_archive_selector() if uploaded_file is None else None
     
     # Main content area
     if uploaded_file is not None:
-        # Detect file type
-        file_content = uploaded_file.read()
-        uploaded_file.seek(0)  # Reset file pointer
-        
-        detected_platform = detect_file_type(uploaded_file.name, file_content)
+        # Detect file type from a bounded prefix; the parser streams the rest
+        detected_platform = detect_file_type(uploaded_file.name, read_prefix(uploaded_file), uploaded_file)
         
         if detected_platform:
             # Platform badge
-            platform_emoji = {"whatsapp": "💚", "telegram": "✈️", "instagram": "📷"}
+            platform_emoji = {"whatsapp": "💚", "telegram": "✈️", "telegram_html": "✈️", "instagram": "📷"}
+            platform_label = detected_platform.capitalize().replace('_html', ' (HTML)')
             st.markdown(f"""
                 <div style="background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); 
                             color: white; padding: 10px 20px; border-radius: 20px; 
                             display: inline-block; margin: 10px 0;">
-                    {platform_emoji.get(detected_platform, "💬")} Detected Platform: <strong>{detected_platform.capitalize()}</strong>
+                    {platform_emoji.get(detected_platform, "💬")} Detected Platform: <strong>{platform_label}</strong>
                 </div>
             """, unsafe_allow_html=True)
             
-            # Parse the file
-            messages = parse_file(uploaded_file, detected_platform)
+            # Parse each export once; reruns and other sessions reuse the DataFrame
+            dataset_key = upload_dataset_key(uploaded_file, detected_platform)
+            job = None
+            if uploaded_file.size < background_threshold():
+                cancel_parse_job()
+                df = load_dataframe(uploaded_file, detected_platform, dataset_key)
+            else:
+                # Large exports are parsed in a worker thread while partial results render
+                df = find_dataframe(dataset_key)
+                if df is not None:
+                    cancel_parse_job()
+                else:
+                    job = start_parse_job(uploaded_file, detected_platform, dataset_key)
+                    df = finish_parse_job(job) if not job.running and job.error is None else None
             
-            if messages:
+            if job is not None and job.running:
+                display_parse_job(job)
+            elif job is not None and job.error is not None:
+                st.error(f"❌ Error parsing file: {job.error}")
+            elif df is not None:
                 # Show balloons only when file is first processed
                 if not st.session_state.file_processed:
                     st.balloons()
                     st.session_state.file_processed = True
                 
-                # Convert to DataFrame
-                df = create_dataframe(messages)
-                
-                # Create modern tabs
-                tab1, tab2, tab3, tab4, tab5 = st.tabs([
-                    "📊 Overview", 
-                    "📅 Time Analysis", 
-                    "💬 Messages",
-                    "📝 Word Analysis",
-                    "💾 Export"
-                ])
-                
-                with tab1:
-                    display_statistics(df)
-                    display_sender_stats(df)
-                
-                with tab2:
-                    display_time_analysis(df)
+                if st.session_state.dataset.get('partial'):
+                    st.warning(f"⏹️ Parsing was cancelled; showing the first {len(df):,} messages.")
+                    if st.button("🔄 Parse the full file"):
+                        st.session_state.pop('dataset', None)
+                        st.rerun()
+                    # Cached results of the partial data must not be reused for the full file
+                    dataset_key = f"{dataset_key}:partial:{len(df)}"
                 
-                with tab3:
-                    display_message_viewer(df)
-                
-                with tab4:
-                    display_word_stats(df)
-                
-                with tab5:
-                    display_export_options(df)
+                display_dashboard(df, dataset_key)
             else:
                 st.error("❌ No messages were parsed from the file.")
         else:
             st.error("❌ Could not detect the chat platform. Please ensure you're uploading a valid chat export.")
+    elif archive_selection is not None:
+        # An archive is read lazily: only the selected months are loaded
+        path, first_month, last_month = archive_selection
+        cancel_parse_job()
+        df = load_archive_dataframe(path, first_month, last_month)
+        
+        if df is not None:
+            st.success(f"📂 Archive {path}: {len(df):,} messages from {first_month} to {last_month}")
+            display_dashboard(df, archive_dataset_key(path, first_month, last_month))
+        else:
+            st.warning("No messages in the selected months.")
     else:
         # Reset file processed state when no file is uploaded
         st.session_state.file_processed = False
+        st.session_state.pop('dataset', None)
+        cancel_parse_job()
         display_landing_page()
 
 